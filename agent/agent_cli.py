@@ -2,44 +2,80 @@
 """
 ZAYONA License Agent CLI
 Interactive command-line tool for license management
+
+Run without arguments for the interactive menu, or with a subcommand
+(generate, verify, info, fingerprint, health) or --batch FILE for
+scripted use with JSON output on stdout.
 """
 
 import os
 import sys
+import json
 import logging
 from datetime import datetime
-from colorama import init, Fore, Back, Style
-
-# Initialize colorama for cross-platform colored output
-init()
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agent.config import config
-from agent.utils.hardware_fingerprint import hardware_fingerprint
-from agent.utils.api_client import api_client
-from agent.utils.license_saver import license_saver
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, config.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(config.LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# colorama is imported by use_colors() for the interactive menu; scripted runs never load it
+Fore = Back = Style = None
+
+def use_colors():
+    """Import and initialise colorama for coloured terminal output"""
+    global Fore, Back, Style
+    if Fore is None:
+        import colorama
+        colorama.init()
+        Fore, Back, Style = colorama.Fore, colorama.Back, colorama.Style
+
+def setup_logging(console_level: str = None):
+    """Configure logging once a command actually runs
+
+    ``console_level`` quietens stderr for scripted runs; the log file
+    always gets ``LOG_LEVEL``.
+    """
+    console = logging.StreamHandler()
+    if console_level:
+        console.setLevel(getattr(logging, console_level))
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE),
+            console
+        ]
+    )
+
 class LicenseAgentCLI:
     """Interactive CLI for license management"""
     
+    # Utilities are imported on first use so each command only pays for what it needs
+    
     def __init__(self):
-        """Initialize the CLI"""
-        self.api_client = api_client
-        self.license_saver = license_saver
-        self.hardware_fingerprint = hardware_fingerprint
+        """Initialize the interactive CLI"""
+        use_colors()
+    
+    @property
+    def api_client(self):
+        """API client (imports requests)"""
+        from agent.utils.api_client import api_client
+        return api_client
+    
+    @property
+    def license_saver(self):
+        """License file helper"""
+        from agent.utils.license_saver import license_saver
+        return license_saver
+    
+    @property
+    def hardware_fingerprint(self):
+        """Hardware fingerprinting (probes, fingerprint cache)"""
+        from agent.utils.hardware_fingerprint import hardware_fingerprint
+        return hardware_fingerprint
     
     def print_banner(self):
         """Print application banner"""
@@ -222,6 +258,12 @@ class LicenseAgentCLI:
                 health_info = self.api_client.health_check()
                 print(f"{Fore.WHITE}Server Status: {Fore.GREEN}{health_info.get('status', 'Unknown')}{Style.RESET_ALL}")
                 print(f"{Fore.WHITE}Database: {Fore.GREEN}{health_info.get('database', 'Unknown')}{Style.RESET_ALL}")
+                
+                timing = self.api_client.last_timing
+                if timing:
+                    server_ms = timing['server_ms']
+                    server_text = f" (server {server_ms:.1f} ms)" if server_ms is not None else ""
+                    print(f"{Fore.WHITE}Latency: {Fore.CYAN}{timing['elapsed_ms']:.1f} ms{server_text}{Style.RESET_ALL}")
             else:
                 print(f"{Fore.RED}❌ API connection failed{Style.RESET_ALL}")
                 
@@ -235,13 +277,13 @@ class LicenseAgentCLI:
         
         try:
             print(f"{Fore.YELLOW}🔄 Generating hardware fingerprint...{Style.RESET_ALL}")
-            fingerprint = self.hardware_fingerprint.generate_fingerprint()
+            components = self.hardware_fingerprint.get_fingerprint_components()
+            fingerprint = components['full_fingerprint']
             
             print(f"{Fore.GREEN}✅ Hardware fingerprint generated{Style.RESET_ALL}")
             print(f"{Fore.WHITE}Fingerprint: {Fore.CYAN}{fingerprint}{Style.RESET_ALL}")
             
             # Show components
-            components = self.hardware_fingerprint.get_fingerprint_components()
             print(f"\n{Fore.WHITE}Components:{Style.RESET_ALL}")
             for key, value in components.items():
                 if key != 'full_fingerprint':
@@ -286,15 +328,97 @@ class LicenseAgentCLI:
                 print(f"\n{Fore.RED}❌ Unexpected error: {e}{Style.RESET_ALL}")
                 logger.error(f"Unexpected error in CLI: {e}")
 
+def build_parser():
+    """Command-line parser for scripted use"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="ZAYONA License Agent. Without a command, starts the interactive menu.",
+        epilog="Exit codes: 0 success, 1 rejected/failed, 2 usage error, 3 server unavailable."
+    )
+    parser.add_argument('--api-url', help=f'License server URL (default: {config.API_BASE_URL})')
+    parser.add_argument('--timeout', type=int, help=f'Request timeout in seconds (default: {config.API_TIMEOUT})')
+    parser.add_argument('--pretty', action='store_true', help='Indent JSON output')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Run generate/verify jobs from a JSON Lines file or JSON array ("-" for stdin)')
+    parser.add_argument('--concurrency', type=int, default=config.BATCH_CONCURRENCY,
+                        help=f'Jobs run at once in batch mode (default: {config.BATCH_CONCURRENCY})')
+
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    generate = subparsers.add_parser('generate', help='Generate a license for this machine')
+    generate.add_argument('--username', required=True)
+    generate.add_argument('--password', default=os.getenv('LICENSE_PASSWORD'),
+                          help='Account password (default: $LICENSE_PASSWORD)')
+    generate.add_argument('--product-id', required=True)
+    generate.add_argument('--customer-name', required=True)
+    generate.add_argument('--email', required=True)
+    generate.add_argument('--fingerprint', help='Bind to this fingerprint instead of the local one')
+    generate.add_argument('--output', help=f'License file to write (default: {config.LICENSE_FILE_PATH})')
+    generate.add_argument('--no-save', action='store_true', help='Print the license without saving it')
+
+    verify = subparsers.add_parser('verify', help='Verify a license with the server')
+    verify.add_argument('--license-key', help='License key (default: read from the license file)')
+    verify.add_argument('--license-file', help=f'License file (default: {config.LICENSE_FILE_PATH})')
+    verify.add_argument('--fingerprint', help='Fingerprint to verify against instead of the local one')
+
+    info = subparsers.add_parser('info', help='Show the saved license')
+    info.add_argument('--license-file', help=f'License file (default: {config.LICENSE_FILE_PATH})')
+    info.add_argument('--remote', action='store_true', help="Show the server's record instead")
+    info.add_argument('--license-key', help='License key for --remote (default: read from the license file)')
+
+    fingerprint = subparsers.add_parser('fingerprint', help='Show the hardware fingerprint')
+    fingerprint.add_argument('--refresh', action='store_true', help='Re-probe hardware, bypassing the cache')
+
+    subparsers.add_parser('health', help='Check the license server')
+
+    return parser
+
+def run_scripted(args) -> int:
+    """Run a subcommand or batch file, printing JSON to stdout"""
+    from agent import commands
+
+    if args.batch:
+        try:
+            for record in commands.run_batch(args.batch, args.concurrency, args.api_url, args.timeout):
+                commands.print_json(record, args.pretty)
+        except commands.CommandError as e:
+            commands.print_json({'ok': False, 'command': 'batch', 'error': str(e)}, args.pretty)
+            return e.exit_code
+        return commands.batch_exit_code(record['summary'])
+
+    if args.command == 'generate' and not args.password:
+        commands.print_json({'ok': False, 'command': 'generate',
+                             'error': 'A password is required (--password or $LICENSE_PASSWORD)'}, args.pretty)
+        return commands.EXIT_USAGE
+
+    code, output = commands.execute(args)
+    commands.print_json(output, args.pretty)
+    return code
+
 def main():
     """Main function"""
+    args = build_parser().parse_args()
+    scripted = bool(args.command or args.batch)
+    
     try:
+        # Keep stdout clean for JSON; only problems reach stderr
+        setup_logging('WARNING' if scripted else None)
+        if scripted:
+            sys.exit(run_scripted(args))
+        
         cli = LicenseAgentCLI()
         cli.run()
+    except KeyboardInterrupt:
+        sys.exit(130)
     except Exception as e:
-        print(f"{Fore.RED}❌ Failed to start CLI: {e}{Style.RESET_ALL}")
+        if scripted:
+            print(json.dumps({'ok': False, 'command': args.command or 'batch', 'error': str(e)}))
+        else:
+            use_colors()
+            print(f"{Fore.RED}❌ Failed to start CLI: {e}{Style.RESET_ALL}")
         logger.error(f"CLI startup error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
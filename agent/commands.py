@@ -0,0 +1,320 @@
+"""
+Non-interactive agent commands for scripted and bulk deployment
+
+Every command returns ``(exit_code, result)``; ``agent_cli`` prints the
+result as JSON and exits with the code.
+"""
+
+import json
+import time
+import logging
+from typing import Dict, Any, List, Tuple, Iterator
+
+from agent.config import config
+
+logger = logging.getLogger(__name__)
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1        # Request processed and rejected (invalid license, bad credentials, ...)
+EXIT_USAGE = 2         # Bad arguments or unreadable input
+EXIT_UNAVAILABLE = 3   # License server unreachable or timed out
+
+BATCH_COMMANDS = ('generate', 'verify')
+
+
+class CommandError(Exception):
+    """Command failed before reaching the server"""
+
+    def __init__(self, message: str, exit_code: int = EXIT_USAGE):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def _client(args):
+    """API client honouring --api-url/--timeout; batch mode passes a shared one"""
+    from agent.utils.api_client import LicenseAPIClient
+    return LicenseAPIClient(base_url=args.api_url, timeout=args.timeout)
+
+
+def _fingerprint(refresh: bool = False) -> str:
+    from agent.utils.hardware_fingerprint import hardware_fingerprint
+    return hardware_fingerprint.generate_fingerprint(refresh=refresh)
+
+
+def _saver(path: str = None):
+    from agent.utils.license_saver import LicenseSaver
+    if path:
+        return LicenseSaver(license_path=path, backup_path=f"{path}.backup")
+    return LicenseSaver()
+
+
+def _load_license(path: str = None) -> Dict[str, Any]:
+    saver = _saver(path)
+    if not saver.license_exists():
+        raise CommandError(f"No license file found at: {saver.get_license_path()}", EXIT_FAILED)
+    license_data = saver.load_license()
+    if not license_data:
+        raise CommandError(f"Failed to load license file: {saver.get_license_path()}", EXIT_FAILED)
+    return license_data
+
+
+def _api_call(func, *args, **kwargs) -> Tuple[int, Dict[str, Any]]:
+    """Call the API and map client errors onto exit codes"""
+    from agent.utils.api_client import APIError, APIUnavailableError
+
+    try:
+        return EXIT_OK, func(*args, **kwargs)
+    except APIUnavailableError as e:
+        return EXIT_UNAVAILABLE, {'error': str(e)}
+    except APIError as e:
+        return EXIT_FAILED, {'error': str(e), 'status_code': e.status_code}
+
+
+def generate(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Generate a license and save it unless --no-save"""
+    client = client or _client(args)
+    fingerprint = args.fingerprint or _fingerprint()
+
+    code, response = _api_call(
+        client.generate_license,
+        username=args.username,
+        password=args.password,
+        product_id=args.product_id,
+        customer_name=args.customer_name,
+        email=args.email,
+        hardware_fingerprint=fingerprint
+    )
+    if code != EXIT_OK:
+        return code, response
+    if not response.get('success'):
+        return EXIT_FAILED, {'error': response.get('message', 'Unknown error')}
+
+    license_data = response['license']
+    result = {'license_key': license_data.get('license_key'), 'license': license_data, 'saved_to': None}
+    if not args.no_save:
+        saver = _saver(args.output)
+        if not saver.save_license(license_data):
+            result['error'] = f"Failed to save license file: {saver.get_license_path()}"
+            return EXIT_FAILED, result
+        result['saved_to'] = saver.get_license_path()
+    return EXIT_OK, result
+
+
+def verify(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Verify a license key (or the one in the license file) with the server"""
+    license_key = args.license_key
+    if not license_key:
+        license_key = _load_license(args.license_file).get('license_key')
+        if not license_key:
+            raise CommandError("Invalid license file - missing license key", EXIT_FAILED)
+
+    client = client or _client(args)
+    fingerprint = args.fingerprint or _fingerprint()
+
+    code, response = _api_call(client.verify_license, license_key, fingerprint)
+    if code != EXIT_OK:
+        response['license_key'] = license_key
+        return code, response
+    if not response.get('success'):
+        return EXIT_FAILED, {'license_key': license_key, 'error': response.get('message', 'Unknown error')}
+    return EXIT_OK, {'license_key': license_key, 'license_info': response.get('license_info')}
+
+
+def info(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Show the local license file, or the server's record with --remote"""
+    if not args.remote:
+        return EXIT_OK, {'path': _saver(args.license_file).get_license_path(),
+                         'license': _load_license(args.license_file)}
+
+    license_key = args.license_key or _load_license(args.license_file).get('license_key')
+    if not license_key:
+        raise CommandError("No license key given and none found in the license file")
+    return _api_call((client or _client(args)).get_license_info, license_key)
+
+
+def fingerprint(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Show the hardware fingerprint and its components"""
+    from agent.utils.hardware_fingerprint import hardware_fingerprint
+
+    components = hardware_fingerprint.get_fingerprint_components(refresh=args.refresh)
+    return EXIT_OK, {'fingerprint': components.pop('full_fingerprint'), 'components': components}
+
+
+def health(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Check the license server"""
+    client = client or _client(args)
+    return _api_call(client.health_check)
+
+
+COMMANDS = {
+    'generate': generate,
+    'verify': verify,
+    'info': info,
+    'fingerprint': fingerprint,
+    'health': health,
+}
+
+
+def run_command(args, client=None) -> Tuple[int, Dict[str, Any]]:
+    """Run the selected subcommand, turning local failures into results"""
+    try:
+        return COMMANDS[args.command](args, client)
+    except CommandError as e:
+        return e.exit_code, {'error': str(e)}
+    except Exception as e:
+        logger.error(f"{args.command} failed: {e}")
+        return EXIT_FAILED, {'error': str(e)}
+
+
+def execute(args) -> Tuple[int, Dict[str, Any]]:
+    """Run one subcommand and build its JSON document, with request timing"""
+    remote = args.command in ('generate', 'verify', 'health') or getattr(args, 'remote', False)
+    client = _client(args) if remote else None
+
+    code, result = run_command(args, client)
+    output = {'ok': code == EXIT_OK, 'command': args.command}
+    if code == EXIT_OK:
+        output['result'] = result
+    else:
+        output.update(result)
+    if client is not None and client.last_timing:
+        output['timing'] = client.last_timing
+    return code, output
+
+
+# Batch mode
+
+class BatchJob:
+    """One line of a batch file, shaped like parsed subcommand arguments"""
+
+    # Defaults for every option a generate/verify job may set
+    FIELDS = {
+        'username': None, 'password': None, 'product_id': None, 'customer_name': None,
+        'email': None, 'fingerprint': None, 'output': None, 'no_save': False,
+        'license_key': None, 'license_file': None,
+    }
+    REQUIRED = {
+        'generate': ('username', 'password', 'product_id', 'customer_name', 'email'),
+        'verify': (),
+    }
+
+    def __init__(self, index: int, job: Dict[str, Any], api_url: str = None, timeout: int = None):
+        """Validate a job dictionary"""
+        if not isinstance(job, dict):
+            raise CommandError(f"job {index}: expected an object")
+        self.index = index
+        self.id = job.get('id', index)
+        self.command = job.get('command')
+        if self.command not in BATCH_COMMANDS:
+            raise CommandError(f"job {index}: command must be one of {', '.join(BATCH_COMMANDS)}")
+
+        unknown = set(job) - set(self.FIELDS) - {'id', 'command'}
+        if unknown:
+            raise CommandError(f"job {index}: unknown fields {', '.join(sorted(unknown))}")
+        missing = [name for name in self.REQUIRED[self.command] if not job.get(name)]
+        if missing:
+            raise CommandError(f"job {index}: missing {', '.join(missing)}")
+        if self.command == 'verify' and not (job.get('license_key') or job.get('license_file')):
+            raise CommandError(f"job {index}: verify needs license_key or license_file")
+
+        for name, default in self.FIELDS.items():
+            setattr(self, name, job.get(name, default))
+        # Concurrent jobs must not all overwrite the default license file
+        if self.command == 'generate' and not self.output:
+            self.no_save = True
+        self.api_url = api_url
+        self.timeout = timeout
+
+
+def read_batch(path: str) -> List[Dict[str, Any]]:
+    """Read jobs from a JSON array or a JSON Lines file ('-' for stdin)"""
+    import sys
+
+    try:
+        if path == '-':
+            text = sys.stdin.read()
+        else:
+            with open(path, 'r') as f:
+                text = f.read()
+    except OSError as e:
+        raise CommandError(f"Cannot read batch file: {e}")
+
+    stripped = text.lstrip()
+    try:
+        if stripped.startswith('['):
+            return json.loads(stripped)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError as e:
+        raise CommandError(f"Invalid JSON in batch file: {e}")
+
+
+def run_batch(path: str, concurrency: int = None, api_url: str = None,
+              timeout: int = None) -> Iterator[Dict[str, Any]]:
+    """Run generate/verify jobs concurrently over one pooled HTTP session
+
+    Yields one result per job in input order, then a ``{"summary": ...}``
+    record. Raises ``CommandError`` before running anything if a job is
+    malformed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from agent.utils.api_client import LicenseAPIClient
+
+    concurrency = max(1, concurrency or config.BATCH_CONCURRENCY)
+    jobs = [BatchJob(index, job, api_url, timeout) for index, job in enumerate(read_batch(path))]
+
+    # One connection per worker thread, all sharing keep-alive connections
+    client = LicenseAPIClient(base_url=api_url, timeout=timeout, pool_size=concurrency)
+
+    # Every job on this machine shares one fingerprint; probe it once, not per thread
+    if any(not job.fingerprint for job in jobs):
+        local_fingerprint = _fingerprint()
+        for job in jobs:
+            job.fingerprint = job.fingerprint or local_fingerprint
+
+    def run_job(job: BatchJob) -> Dict[str, Any]:
+        started = time.perf_counter()
+        client.timings.clear_last()
+        code, result = run_command(job, client)
+        return {
+            'id': job.id,
+            'command': job.command,
+            'ok': code == EXIT_OK,
+            'exit_code': code,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'timing': client.last_timing,
+            'result': result,
+        }
+
+    started = time.perf_counter()
+    counts = {'total': len(jobs), 'succeeded': 0, 'failed': 0, 'unavailable': 0}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for record in executor.map(run_job, jobs):
+            if record['ok']:
+                counts['succeeded'] += 1
+            elif record['exit_code'] == EXIT_UNAVAILABLE:
+                counts['unavailable'] += 1
+            else:
+                counts['failed'] += 1
+            yield record
+
+    counts['concurrency'] = concurrency
+    counts['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    counts['requests'] = client.timings.stats()
+    client.close()
+    yield {'summary': counts}
+
+
+def batch_exit_code(summary: Dict[str, Any]) -> int:
+    """Exit code for a finished batch: 0 only if every job succeeded"""
+    if summary['succeeded'] == summary['total']:
+        return EXIT_OK
+    if summary['failed'] == 0:
+        return EXIT_UNAVAILABLE
+    return EXIT_FAILED
+
+
+def print_json(data: Dict[str, Any], pretty: bool = False):
+    """Write one JSON document to stdout"""
+    print(json.dumps(data, indent=2 if pretty else None, default=str), flush=True)
+
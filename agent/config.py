@@ -3,10 +3,24 @@ Configuration for the License Agent CLI
 """
 
 import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+def _find_dotenv():
+    """Find .env the way python-dotenv does, walking up from this directory"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, '.env')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# Load environment variables (python-dotenv is only imported when there is a file to load)
+_dotenv_path = _find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 class AgentConfig:
     """Agent configuration settings"""
@@ -14,6 +28,18 @@ class AgentConfig:
     # API Server settings
     API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
     API_TIMEOUT = int(os.getenv('API_TIMEOUT', 30))
+    # Keep-alive connections kept per server
+    API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 10))
+    # Retries for verify/GET requests (generate is only retried if it never connected)
+    API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 3))
+    API_RETRY_BACKOFF = float(os.getenv('API_RETRY_BACKOFF', 0.5))
+    API_RETRY_BACKOFF_MAX = float(os.getenv('API_RETRY_BACKOFF_MAX', 8))
+    # Request bodies at least this large are gzip-compressed (0 disables)
+    API_GZIP_MIN_BYTES = int(os.getenv('API_GZIP_MIN_BYTES', 1024))
+    # License info answers remembered for If-None-Match polling (0 disables)
+    API_INFO_CACHE_SIZE = int(os.getenv('API_INFO_CACHE_SIZE', 1024))
+    # Jobs run at once by `agent_cli.py --batch` (also the HTTP connection pool size)
+    BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 16))
     
     # License file settings
     LICENSE_FILE_PATH = os.getenv('LICENSE_FILE_PATH', '/etc/octopyder/license.json')
@@ -24,6 +50,12 @@ class AgentConfig:
     
     # Hardware fingerprinting
     HARDWARE_FINGERPRINT_ENABLED = os.getenv('HARDWARE_FINGERPRINT_ENABLED', 'true').lower() == 'true'
+    # Probe results are reused until the TTL passes or boot id / devices change (0 disables)
+    FINGERPRINT_CACHE_PATH = os.getenv('FINGERPRINT_CACHE_PATH', '~/.cache/octopyder/fingerprint.json')
+    FINGERPRINT_CACHE_TTL = int(os.getenv('FINGERPRINT_CACHE_TTL', 3600))
+    # Probe backend (auto: sysfs on Linux, platform tools elsewhere) and per-probe timeout
+    FINGERPRINT_PROBE_BACKEND = os.getenv('FINGERPRINT_PROBE_BACKEND', 'auto')
+    FINGERPRINT_PROBE_TIMEOUT = float(os.getenv('FINGERPRINT_PROBE_TIMEOUT', 5))
     
     # User interface
     INTERACTIVE_MODE = os.getenv('INTERACTIVE_MODE', 'true').lower() == 'true'
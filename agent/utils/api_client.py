@@ -2,63 +2,156 @@
 API client for communicating with the license server
 """
 
-import requests
-import json
+import time
 import logging
+import threading
+from urllib.parse import urlencode
 from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
 from agent.config import config
+from agent.utils.transport import (
+    APIError, APIUnavailableError, RetryPolicy, TimingRecorder, ValidatorCache, RETRY_STATUSES,
+    encode_body, error_for_response, is_idempotent, parse_server_timing
+)
 
 logger = logging.getLogger(__name__)
 
+def _never_connected(error: requests.exceptions.RequestException) -> bool:
+    """Whether the request failed before a connection existed (safe to resend anything)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
 class LicenseAPIClient:
     """Client for communicating with the license API server"""
     
-    def __init__(self, base_url: str = None, timeout: int = None):
+    def __init__(self, base_url: str = None, timeout: int = None, pool_size: int = None,
+                 retry_policy: RetryPolicy = None, gzip_min_bytes: int = None):
         """Initialize API client"""
         self.base_url = base_url or config.API_BASE_URL
         self.timeout = timeout or config.API_TIMEOUT
-        self.session = requests.Session()
-        
-        # Set default headers
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'ZAYONA-License-Agent/1.0.0'
-        })
+        # Keep-alive connections per host; size it to the number of threads sharing the client
+        self.pool_size = pool_size or config.API_POOL_SIZE
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=config.API_MAX_RETRIES,
+            backoff=config.API_RETRY_BACKOFF,
+            backoff_max=config.API_RETRY_BACKOFF_MAX
+        )
+        # Request bodies at least this large are sent gzip-compressed (0 disables)
+        self.gzip_min_bytes = config.API_GZIP_MIN_BYTES if gzip_min_bytes is None else gzip_min_bytes
+        self.timings = TimingRecorder()
+        # ETags and bodies of license info answers for conditional polling
+        self.validators = ValidatorCache(config.API_INFO_CACHE_SIZE)
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first request"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # Retries are handled by RetryPolicy, which knows which requests are idempotent
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    
+                    # Set default headers (requests already asks for gzip responses)
+                    session.headers.update({
+                        'Content-Type': 'application/json',
+                        'User-Agent': 'ZAYONA-License-Agent/1.0.0'
+                    })
+                    self._session = session
+        return self._session
+    
+    @property
+    def last_timing(self) -> Optional[Dict[str, Any]]:
+        """Timing of the calling thread's last request"""
+        return self.timings.last
+    
+    def close(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict[str, Any]:
-        """Make HTTP request to API"""
-        url = f"{self.base_url}{endpoint}"
-        
+        """Make HTTP request to API, retrying transient failures"""
+        return self._parse_json(self._send(method, endpoint, data))
+    
+    def _parse_json(self, response: requests.Response) -> Dict[str, Any]:
+        """Decode a successful response body"""
         try:
-            if method.upper() == 'GET':
-                response = self.session.get(url, timeout=self.timeout)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, json=data, timeout=self.timeout)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Check if request was successful
-            response.raise_for_status()
-            
-            # Parse JSON response
             return response.json()
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"API request timeout: {url}")
-            raise Exception("API request timed out")
-        except requests.exceptions.ConnectionError:
-            logger.error(f"API connection error: {url}")
-            raise Exception("Could not connect to license server")
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"API HTTP error: {e.response.status_code} - {e.response.text}")
+        except ValueError as e:
+            raise APIError(f"Invalid JSON response: {e}", response.status_code)
+    
+    def _send(self, method: str, endpoint: str, data: Dict = None,
+              extra_headers: Dict[str, str] = None) -> requests.Response:
+        """Send a request with retries; error statuses are raised as APIError"""
+        method = method.upper()
+        if method not in ('GET', 'POST'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        url = f"{self.base_url}{endpoint}"
+        idempotent = is_idempotent(method, endpoint)
+        body, headers = encode_body(data, self.gzip_min_bytes) if method == 'POST' else (None, None)
+        if extra_headers:
+            headers = {**(headers or {}), **extra_headers}
+        compressed = bool(headers and 'Content-Encoding' in headers)
+        started = time.perf_counter()
+        attempt = 0
+        
+        while True:
+            attempt += 1
             try:
-                error_data = e.response.json()
-                raise Exception(error_data.get('detail', f"HTTP {e.response.status_code}"))
-            except:
-                raise Exception(f"HTTP {e.response.status_code}: {e.response.text}")
-        except Exception as e:
-            logger.error(f"API request failed: {e}")
-            raise Exception(f"API request failed: {e}")
+                response = self.session.request(method, url, data=body, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                unavailable = isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+                if unavailable and self.retry_policy.should_retry(
+                        attempt, idempotent, connect_failed=_never_connected(e)):
+                    delay = self.retry_policy.delay(attempt)
+                    logger.warning(f"API request to {url} failed ({e.__class__.__name__}), "
+                                   f"retrying in {delay:.2f}s (attempt {attempt})")
+                    time.sleep(delay)
+                    continue
+                
+                self.timings.record(method, endpoint, None, attempt, started,
+                                    request_bytes=len(body or b''), compressed=compressed)
+                if isinstance(e, requests.exceptions.Timeout):
+                    logger.error(f"API request timeout: {url}")
+                    raise APIUnavailableError("API request timed out")
+                if isinstance(e, requests.exceptions.ConnectionError):
+                    logger.error(f"API connection error: {url}")
+                    raise APIUnavailableError("Could not connect to license server")
+                logger.error(f"API request failed: {e}")
+                raise APIError(f"API request failed: {e}")
+            
+            status_code = response.status_code
+            if status_code in RETRY_STATUSES and self.retry_policy.should_retry(
+                    attempt, idempotent, status_code=status_code):
+                delay = self.retry_policy.delay(attempt, response.headers.get('Retry-After'))
+                logger.warning(f"API returned {status_code} for {url}, retrying in {delay:.2f}s (attempt {attempt})")
+                response.close()
+                time.sleep(delay)
+                continue
+            break
+        
+        self.timings.record(method, endpoint, status_code, attempt, started,
+                            server_ms=parse_server_timing(response.headers.get('Server-Timing')),
+                            request_bytes=len(body or b''), compressed=compressed)
+        
+        if status_code >= 400:
+            logger.error(f"API HTTP error: {status_code} - {response.text}")
+            raise error_for_response(status_code, response.text)
+        
+        return response
     
     def generate_license(self, 
                         username: str,
@@ -101,13 +194,43 @@ class LicenseAPIClient:
         return response
     
     def get_license_info(self, license_key: str) -> Dict[str, Any]:
-        """Get license information"""
+        """Get license information
+        
+        The ETag of the last answer is sent back as ``If-None-Match``; when
+        the license is unchanged the server replies 304 with no body and the
+        stored answer is returned.
+        """
         logger.info(f"Getting license info: {license_key}")
         
-        response = self._make_request('GET', f'/api/v1/licenses/{license_key}')
+        etag = self.validators.etag(license_key)
+        response = self._send('GET', f'/api/v1/licenses/{license_key}',
+                              extra_headers={'If-None-Match': etag} if etag else None)
+        
+        if response.status_code == 304:
+            cached = self.validators.body(license_key, etag)
+            if cached is not None:
+                logger.info(f"License info unchanged: {license_key}")
+                return cached
+            # Stored answer was replaced meanwhile: fetch the full body
+            response = self._send('GET', f'/api/v1/licenses/{license_key}')
+        
+        result = self._parse_json(response)
+        self.validators.store(license_key, response.headers.get('ETag'), response.content)
         
         logger.info(f"License info retrieved: {license_key}")
-        return response
+        return result
+    
+    def get_license_changes(self, since: int = None, wait: float = 0) -> Dict[str, Any]:
+        """Get revocation/expiry changes after version ``since``
+        
+        Changes name licenses by ``license_key_id(license_key)``. Pass the
+        returned ``cursor`` as ``since`` next time; with ``wait`` the server
+        holds the request until a change arrives (long-poll).
+        """
+        params = {'wait': wait}
+        if since is not None:
+            params['since'] = since
+        return self._make_request('GET', f'/api/v1/license-changes?{urlencode(params)}')
     
     def health_check(self) -> Dict[str, Any]:
         """Check API server health"""
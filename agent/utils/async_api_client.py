@@ -0,0 +1,273 @@
+"""
+Asyncio client for high-concurrency callers of the license API
+"""
+
+import time
+import asyncio
+import logging
+from urllib.parse import urlencode
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from agent.config import config
+from agent.utils.transport import (
+    APIError, APIUnavailableError, DeadlineExceededError, RetryPolicy, TimingRecorder,
+    ValidatorCache, RETRY_STATUSES, encode_body, error_for_response, is_idempotent,
+    parse_server_timing
+)
+
+logger = logging.getLogger(__name__)
+
+# Failures where the request never left this machine, so it is safe to resend anything
+NEVER_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class AsyncLicenseAPIClient:
+    """Asyncio counterpart of ``LicenseAPIClient`` with the same methods and errors
+
+    One pooled ``httpx.AsyncClient`` is shared by every call; a semaphore
+    caps the number of requests in flight at ``max_concurrency`` so a
+    caller can ``gather`` tens of thousands of verifications without
+    opening as many sockets. Every method takes an optional ``deadline``
+    (``time.monotonic()`` value): waiting for a slot, each attempt and
+    each backoff are cut short by it and ``DeadlineExceededError`` is
+    raised once it passes.
+
+    Use as ``async with AsyncLicenseAPIClient() as client: ...`` or call
+    ``aclose()`` when done.
+    """
+
+    def __init__(self, base_url: str = None, timeout: float = None, max_concurrency: int = None,
+                 retry_policy: RetryPolicy = None, gzip_min_bytes: int = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        """Initialize client; the HTTP pool is opened on first request"""
+        self.base_url = base_url or config.API_BASE_URL
+        self.timeout = timeout or config.API_TIMEOUT
+        self.max_concurrency = max_concurrency or config.API_POOL_SIZE
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=config.API_MAX_RETRIES,
+            backoff=config.API_RETRY_BACKOFF,
+            backoff_max=config.API_RETRY_BACKOFF_MAX
+        )
+        self.gzip_min_bytes = config.API_GZIP_MIN_BYTES if gzip_min_bytes is None else gzip_min_bytes
+        self.timings = TimingRecorder()
+        self.validators = ValidatorCache(config.API_INFO_CACHE_SIZE)
+        # Custom transport, e.g. httpx.ASGITransport(app) to test against an app in-process
+        self._transport = transport
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on first request inside the running loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                headers={'User-Agent': 'ZAYONA-License-Agent/1.0.0'}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    @property
+    def last_timing(self) -> Optional[Dict[str, Any]]:
+        """Timing of the calling task's last request"""
+        return self.timings.last
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _remaining(self, deadline: Optional[float]) -> float:
+        """Seconds left for the next wait, never more than the request timeout"""
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("Deadline exceeded")
+        return min(self.timeout, remaining)
+
+    async def _make_request(self, method: str, endpoint: str, data: Dict = None,
+                            deadline: float = None) -> Dict[str, Any]:
+        """Make HTTP request to API, retrying transient failures within the deadline"""
+        return self._parse_json(await self._send(method, endpoint, data, deadline))
+
+    def _parse_json(self, response: httpx.Response) -> Dict[str, Any]:
+        """Decode a successful response body"""
+        try:
+            return response.json()
+        except ValueError as e:
+            raise APIError(f"Invalid JSON response: {e}", response.status_code)
+
+    async def _send(self, method: str, endpoint: str, data: Dict = None, deadline: float = None,
+                    extra_headers: Dict[str, str] = None) -> httpx.Response:
+        """Send a request with retries; error statuses are raised as APIError"""
+        method = method.upper()
+        if method not in ('GET', 'POST'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        client = self.client
+        idempotent = is_idempotent(method, endpoint)
+        body, headers = encode_body(data, self.gzip_min_bytes) if method == 'POST' else (None, None)
+        if extra_headers:
+            headers = {**(headers or {}), **extra_headers}
+        compressed = bool(headers and 'Content-Encoding' in headers)
+        started = time.perf_counter()
+        attempt = 0
+
+        def record(status_code, response=None):
+            server_ms = parse_server_timing(response.headers.get('Server-Timing')) if response is not None else None
+            self.timings.record(method, endpoint, status_code, attempt, started, server_ms=server_ms,
+                                request_bytes=len(body or b''), compressed=compressed)
+
+        try:
+            while True:
+                attempt += 1
+                wait = self._remaining(deadline)
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), wait)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError("Deadline exceeded waiting for a connection slot")
+                try:
+                    response = await client.request(method, endpoint, content=body, headers=headers,
+                                                    timeout=self._remaining(deadline))
+                    status_code = response.status_code
+                    retry = status_code in RETRY_STATUSES and self.retry_policy.should_retry(
+                        attempt, idempotent, status_code=status_code)
+                    error = None
+                except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                    response = None
+                    retry = self.retry_policy.should_retry(
+                        attempt, idempotent, connect_failed=isinstance(e, NEVER_SENT_ERRORS))
+                    error = e
+                finally:
+                    self._semaphore.release()
+
+                if not retry:
+                    break
+                delay = self.retry_policy.delay(
+                    attempt, response.headers.get('Retry-After') if response is not None else None)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                reason = error.__class__.__name__ if error is not None else response.status_code
+                logger.warning(f"API request to {endpoint} failed ({reason}), "
+                               f"retrying in {delay:.2f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+        except DeadlineExceededError:
+            record(None)
+            logger.error(f"API request deadline exceeded: {endpoint}")
+            raise
+
+        if error is not None:
+            record(None)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceededError("Deadline exceeded")
+            if isinstance(error, httpx.TimeoutException):
+                logger.error(f"API request timeout: {endpoint}")
+                raise APIUnavailableError("API request timed out")
+            logger.error(f"API connection error: {endpoint}")
+            raise APIUnavailableError("Could not connect to license server")
+
+        record(status_code, response)
+        if status_code >= 400:
+            logger.error(f"API HTTP error: {status_code} - {response.text}")
+            raise error_for_response(status_code, response.text)
+
+        return response
+
+    async def generate_license(self,
+                               username: str,
+                               password: str,
+                               product_id: str,
+                               customer_name: str,
+                               email: str,
+                               hardware_fingerprint: str = None,
+                               deadline: float = None) -> Dict[str, Any]:
+        """Generate a new license"""
+        data = {
+            'username': username,
+            'password': password,
+            'product_id': product_id,
+            'customer_name': customer_name,
+            'email': email
+        }
+        if hardware_fingerprint:
+            data['hardware_fingerprint'] = hardware_fingerprint
+
+        return await self._make_request('POST', '/api/v1/generate-license', data, deadline)
+
+    async def verify_license(self, license_key: str, hardware_fingerprint: str,
+                             deadline: float = None) -> Dict[str, Any]:
+        """Verify an existing license"""
+        data = {
+            'license_key': license_key,
+            'hardware_fingerprint': hardware_fingerprint
+        }
+        return await self._make_request('POST', '/api/v1/verify-license', data, deadline)
+
+    async def get_license_info(self, license_key: str, deadline: float = None) -> Dict[str, Any]:
+        """Get license information, revalidating the stored answer with its ETag"""
+        endpoint = f'/api/v1/licenses/{license_key}'
+        etag = self.validators.etag(license_key)
+        response = await self._send('GET', endpoint, deadline=deadline,
+                                    extra_headers={'If-None-Match': etag} if etag else None)
+
+        if response.status_code == 304:
+            cached = self.validators.body(license_key, etag)
+            if cached is not None:
+                return cached
+            response = await self._send('GET', endpoint, deadline=deadline)
+
+        result = self._parse_json(response)
+        self.validators.store(license_key, response.headers.get('ETag'), response.content)
+        return result
+
+    async def get_license_changes(self, since: int = None, wait: float = 0,
+                                  deadline: float = None) -> Dict[str, Any]:
+        """Get revocation/expiry changes after version ``since`` (long-polls with ``wait``)"""
+        params = {'wait': wait}
+        if since is not None:
+            params['since'] = since
+        return await self._make_request('GET', f'/api/v1/license-changes?{urlencode(params)}',
+                                        deadline=deadline)
+
+    async def health_check(self, deadline: float = None) -> Dict[str, Any]:
+        """Check API server health"""
+        return await self._make_request('GET', '/health', deadline=deadline)
+
+    async def test_connection(self) -> bool:
+        """Test connection to API server"""
+        try:
+            await self.health_check()
+            return True
+        except Exception as e:
+            logger.error(f"API connection test failed: {e}")
+            return False
+
+    async def verify_many(self, items: List[Tuple[str, str]],
+                          deadline: float = None) -> List[Any]:
+        """Verify ``(license_key, hardware_fingerprint)`` pairs concurrently
+
+        Returns one entry per item in order: the response dictionary, or
+        the ``APIError`` raised for it. Concurrency is bounded by the
+        client's semaphore, not by the number of items.
+        """
+        results = await asyncio.gather(
+            *(self.verify_license(license_key, fingerprint, deadline) for license_key, fingerprint in items),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, APIError):
+                raise result
+        return results
@@ -0,0 +1,137 @@
+"""
+Persistent cache for hardware fingerprint probe results
+"""
+
+import os
+import json
+import time
+import logging
+import platform
+import tempfile
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Cheap signals that change when hardware may have changed
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+NET_CLASS_PATH = '/sys/class/net'
+BLOCK_CLASS_PATH = '/sys/block'
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _list_dir(path: str) -> Optional[list]:
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return None
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def current_signals() -> Dict[str, Any]:
+    """Collect change-detection signals without spawning any process
+
+    Disks and NICs cannot be swapped without a reboot or a hotplug event;
+    a new boot id or a changed interface/block device list invalidates the
+    cached probes. On systems without these files only the TTL applies.
+    """
+    return {
+        'node': platform.node(),
+        'boot_id': _read_text(BOOT_ID_PATH),
+        'net_mtime': _mtime(NET_CLASS_PATH),
+        'net_interfaces': _list_dir(NET_CLASS_PATH),
+        'block_devices': _list_dir(BLOCK_CLASS_PATH),
+    }
+
+
+class FingerprintCache:
+    """JSON file holding the last probe results with a TTL
+
+    An entry is reused while it is younger than ``ttl_seconds`` and the
+    signals from ``current_signals`` are unchanged. The file is replaced
+    atomically and readable only by its owner.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        """Initialize cache backed by ``path``"""
+        self.path = os.path.expanduser(path) if path else None
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is switched on"""
+        return bool(self.path) and self.ttl_seconds > 0
+
+    def load(self, signals: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Get cached components, or None if missing, stale or invalidated"""
+        if not self.enabled:
+            return None
+
+        try:
+            with open(self.path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+            return None
+
+        age = time.time() - entry.get('created_at', 0)
+        if age < 0 or age >= self.ttl_seconds:
+            logger.debug("Fingerprint cache expired")
+            return None
+
+        if signals is None:
+            signals = current_signals()
+        if entry.get('signals') != signals:
+            logger.info("Hardware change signals differ; re-probing fingerprint")
+            return None
+
+        return entry.get('components')
+
+    def store(self, components: Dict[str, Any], signals: Dict[str, Any] = None):
+        """Persist probe results with the current signals"""
+        if not self.enabled:
+            return
+
+        entry = {
+            'version': CACHE_VERSION,
+            'created_at': time.time(),
+            'signals': signals if signals is not None else current_signals(),
+            'components': components,
+        }
+
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fingerprint-')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entry, f)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            # Caching is an optimisation; never fail fingerprinting over it
+            logger.warning(f"Could not write fingerprint cache {self.path}: {e}")
+
+    def clear(self):
+        """Delete the cache file"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
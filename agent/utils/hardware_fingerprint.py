@@ -2,28 +2,53 @@
 Hardware fingerprinting utilities for the agent
 """
 
+import os
 import platform
-import subprocess
 import hashlib
 import uuid
 import re
-from typing import Dict, List, Optional
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+from agent.config import config
+from agent.utils import linux_probes
+from agent.utils.fingerprint_cache import FingerprintCache, current_signals
+
+logger = logging.getLogger(__name__)
+
+PROBE_BACKENDS = ('auto', 'sysfs', 'subprocess')
 
 class HardwareFingerprint:
     """Hardware fingerprinting for license protection"""
     
-    def __init__(self):
+    def __init__(self, cache: FingerprintCache = None, backend: str = 'auto', probe_timeout: float = 5.0):
         """Initialize hardware fingerprinting"""
+        if backend not in PROBE_BACKENDS:
+            raise ValueError(f"Unknown probe backend: {backend}")
         self.system = platform.system().lower()
+        self.cache = cache
+        self.probe_timeout = probe_timeout
+        if backend == 'auto':
+            # sysfs reads need no fork/exec; other platforms keep their tools
+            backend = 'sysfs' if self.system == "linux" and os.path.isdir(linux_probes.NET_CLASS_PATH) else 'subprocess'
+        self.backend = backend
+    
+    def _run(self, command: List[str]) -> 'subprocess.CompletedProcess':
+        """Run a probe command, killing it if it hangs"""
+        # Imported here: the sysfs backend and cached fingerprints never fork
+        import subprocess
+        return subprocess.run(command, capture_output=True, text=True, timeout=self.probe_timeout)
     
     def get_mac_addresses(self) -> List[str]:
         """Get MAC addresses of network interfaces"""
         mac_addresses = []
         
         try:
-            if self.system == "windows":
+            if self.backend == 'sysfs':
+                mac_addresses = linux_probes.read_mac_addresses()
+            
+            elif self.system == "windows":
                 # Windows: use ipconfig
-                result = subprocess.run(['ipconfig', '/all'], capture_output=True, text=True)
+                result = self._run(['ipconfig', '/all'])
                 if result.returncode == 0:
                     # Extract MAC addresses from ipconfig output
                     mac_pattern = r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})'
@@ -33,7 +58,7 @@ class HardwareFingerprint:
             
             elif self.system == "linux":
                 # Linux: use ip link
-                result = subprocess.run(['ip', 'link'], capture_output=True, text=True)
+                result = self._run(['ip', 'link'])
                 if result.returncode == 0:
                     # Extract MAC addresses from ip link output
                     mac_pattern = r'([0-9a-f]{2}:){5}[0-9a-f]{2}'
@@ -41,7 +66,7 @@ class HardwareFingerprint:
             
             elif self.system == "darwin":  # macOS
                 # macOS: use ifconfig
-                result = subprocess.run(['ifconfig'], capture_output=True, text=True)
+                result = self._run(['ifconfig'])
                 if result.returncode == 0:
                     # Extract MAC addresses from ifconfig output
                     mac_pattern = r'([0-9a-f]{2}:){5}[0-9a-f]{2}'
@@ -63,9 +88,12 @@ class HardwareFingerprint:
         cpu_info = {}
         
         try:
-            if self.system == "windows":
+            if self.backend == 'sysfs':
+                cpu_info = linux_probes.read_cpu_info()
+            
+            elif self.system == "windows":
                 # Windows: use wmic
-                result = subprocess.run(['wmic', 'cpu', 'get', 'ProcessorId'], capture_output=True, text=True)
+                result = self._run(['wmic', 'cpu', 'get', 'ProcessorId'])
                 if result.returncode == 0:
                     lines = result.stdout.strip().split('\n')
                     if len(lines) > 1:
@@ -85,7 +113,7 @@ class HardwareFingerprint:
             
             elif self.system == "darwin":  # macOS
                 # macOS: use system_profiler
-                result = subprocess.run(['system_profiler', 'SPHardwareDataType'], capture_output=True, text=True)
+                result = self._run(['system_profiler', 'SPHardwareDataType'])
                 if result.returncode == 0:
                     # Extract processor info
                     processor_match = re.search(r'Processor Name:\s+(.+)', result.stdout)
@@ -102,9 +130,12 @@ class HardwareFingerprint:
         disks = []
         
         try:
-            if self.system == "windows":
+            if self.backend == 'sysfs':
+                disks = linux_probes.read_disk_serials()
+            
+            elif self.system == "windows":
                 # Windows: use wmic
-                result = subprocess.run(['wmic', 'diskdrive', 'get', 'SerialNumber'], capture_output=True, text=True)
+                result = self._run(['wmic', 'diskdrive', 'get', 'SerialNumber'])
                 if result.returncode == 0:
                     lines = result.stdout.strip().split('\n')
                     for line in lines[1:]:  # Skip header
@@ -115,7 +146,7 @@ class HardwareFingerprint:
             elif self.system == "linux":
                 # Linux: use lsblk or read from /sys
                 try:
-                    result = subprocess.run(['lsblk', '-no', 'SERIAL'], capture_output=True, text=True)
+                    result = self._run(['lsblk', '-no', 'SERIAL'])
                     if result.returncode == 0:
                         serials = result.stdout.strip().split('\n')
                         for serial in serials:
@@ -126,7 +157,7 @@ class HardwareFingerprint:
             
             elif self.system == "darwin":  # macOS
                 # macOS: use diskutil
-                result = subprocess.run(['diskutil', 'info', '/dev/disk0'], capture_output=True, text=True)
+                result = self._run(['diskutil', 'info', '/dev/disk0'])
                 if result.returncode == 0:
                     serial_match = re.search(r'Serial Number:\s+(.+)', result.stdout)
                     if serial_match:
@@ -140,9 +171,12 @@ class HardwareFingerprint:
     def get_system_uuid(self) -> Optional[str]:
         """Get system UUID"""
         try:
-            if self.system == "windows":
+            if self.backend == 'sysfs':
+                return linux_probes.read_system_uuid()
+            
+            elif self.system == "windows":
                 # Windows: use wmic
-                result = subprocess.run(['wmic', 'csproduct', 'get', 'UUID'], capture_output=True, text=True)
+                result = self._run(['wmic', 'csproduct', 'get', 'UUID'])
                 if result.returncode == 0:
                     lines = result.stdout.strip().split('\n')
                     if len(lines) > 1:
@@ -158,7 +192,7 @@ class HardwareFingerprint:
             
             elif self.system == "darwin":  # macOS
                 # macOS: use system_profiler
-                result = subprocess.run(['system_profiler', 'SPHardwareDataType'], capture_output=True, text=True)
+                result = self._run(['system_profiler', 'SPHardwareDataType'])
                 if result.returncode == 0:
                     uuid_match = re.search(r'Hardware UUID:\s+(.+)', result.stdout)
                     if uuid_match:
@@ -169,19 +203,70 @@ class HardwareFingerprint:
         
         return None
     
-    def generate_fingerprint(self) -> str:
-        """Generate a comprehensive hardware fingerprint"""
+    def _run_probes(self) -> Tuple[Dict[str, Any], bool]:
+        """Run the independent probes concurrently, each bounded by ``probe_timeout``
+        
+        Returns the components and whether every probe finished in time.
+        A probe that times out contributes its empty value.
+        """
+        probes = {
+            'mac_addresses': (self.get_mac_addresses, []),
+            'cpu_info': (self.get_cpu_info, {}),
+            'disks': (self.get_disk_info, []),
+            'system_uuid': (self.get_system_uuid, None),
+        }
+        
+        from concurrent.futures import ThreadPoolExecutor, wait
+        
+        executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="hw-probe")
+        try:
+            futures = {name: executor.submit(probe) for name, (probe, _) in probes.items()}
+            wait(futures.values(), timeout=self.probe_timeout)
+        finally:
+            # Do not wait for a hung probe; subprocess probes are killed by their own timeout
+            executor.shutdown(wait=False)
+        
+        components = {}
+        complete = True
+        for name, future in futures.items():
+            if future.done() and future.exception() is None:
+                components[name] = future.result()
+            else:
+                complete = False
+                components[name] = probes[name][1]
+                logger.warning(f"Hardware probe {name} did not finish within {self.probe_timeout}s")
+        return components, complete
+    
+    def probe_components(self) -> Dict[str, Any]:
+        """Run every hardware probe once"""
+        return self._run_probes()[0]
+    
+    def collect_components(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get probe results, from the cache when hardware looks unchanged"""
+        if self.cache is None or not self.cache.enabled:
+            return self.probe_components()
+        
+        signals = current_signals()
+        components = None if refresh else self.cache.load(signals)
+        if components is None:
+            components, complete = self._run_probes()
+            if complete:
+                self.cache.store(components, signals)
+        return components
+    
+    def build_fingerprint(self, components: Dict[str, Any]) -> str:
+        """Build the fingerprint string from probe results"""
         fingerprint_parts = []
         
         # Get MAC addresses (primary identifier)
-        mac_addresses = self.get_mac_addresses()
+        mac_addresses = components.get('mac_addresses')
         if mac_addresses:
             # Use the first non-loopback MAC address
             primary_mac = mac_addresses[0] if mac_addresses else "00:00:00:00:00:00"
             fingerprint_parts.append(f"MAC:{primary_mac}")
         
         # Get CPU info
-        cpu_info = self.get_cpu_info()
+        cpu_info = components.get('cpu_info') or {}
         if cpu_info.get('processor_id'):
             fingerprint_parts.append(f"CPU:{cpu_info['processor_id']}")
         elif cpu_info.get('processor_name'):
@@ -190,12 +275,12 @@ class HardwareFingerprint:
             fingerprint_parts.append(f"CPU:{cpu_hash}")
         
         # Get disk info
-        disks = self.get_disk_info()
+        disks = components.get('disks')
         if disks and disks[0].get('serial'):
             fingerprint_parts.append(f"DISK:{disks[0]['serial']}")
         
         # Get system UUID
-        system_uuid = self.get_system_uuid()
+        system_uuid = components.get('system_uuid')
         if system_uuid:
             fingerprint_parts.append(f"UUID:{system_uuid}")
         
@@ -209,6 +294,25 @@ class HardwareFingerprint:
         fingerprint = "|".join(fingerprint_parts)
         
         return fingerprint
+    
+    def generate_fingerprint(self, refresh: bool = False) -> str:
+        """Generate a comprehensive hardware fingerprint"""
+        return self.build_fingerprint(self.collect_components(refresh))
+    
+    def get_fingerprint_components(self, refresh: bool = False) -> Dict[str, str]:
+        """Get individual fingerprint components (probes run at most once)"""
+        components = self.collect_components(refresh)
+        return {
+            'mac_addresses': ','.join(components.get('mac_addresses') or []),
+            'cpu_info': str(components.get('cpu_info') or {}),
+            'disk_info': str(components.get('disks') or []),
+            'system_uuid': components.get('system_uuid') or 'Unknown',
+            'full_fingerprint': self.build_fingerprint(components)
+        }
 
 # Global instance
-hardware_fingerprint = HardwareFingerprint() 
\ No newline at end of file
+hardware_fingerprint = HardwareFingerprint(
+    cache=FingerprintCache(config.FINGERPRINT_CACHE_PATH, config.FINGERPRINT_CACHE_TTL),
+    backend=config.FINGERPRINT_PROBE_BACKEND,
+    probe_timeout=config.FINGERPRINT_PROBE_TIMEOUT
+) 
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Transport policy shared by the license API clients: errors, retries,
+request compression and per-request timing
+"""
+
+import gzip
+import hashlib
+import json
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
+
+# Responses worth retrying: the server (or a proxy in front of it) is
+# restarting, overloaded or being rolled out
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Endpoints that may be repeated without side effects beyond an extra audit row
+IDEMPOTENT_POST_ENDPOINTS = frozenset({'/api/v1/verify-license', '/api/v1/verify-licenses'})
+
+
+class APIError(Exception):
+    """Request rejected by the license server"""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class APIUnavailableError(APIError):
+    """License server could not be reached or timed out"""
+
+
+class DeadlineExceededError(APIUnavailableError):
+    """The caller's deadline passed before the server answered"""
+
+
+def error_for_response(status_code: int, text: str) -> APIError:
+    """Exception for an HTTP error response, carrying the server's ``detail``"""
+    try:
+        detail = json.loads(text).get('detail', f"HTTP {status_code}")
+    except (ValueError, AttributeError):
+        detail = f"HTTP {status_code}: {text}"
+    # The server never answered usefully: treat exhausted 5xx retries as an outage
+    error_class = APIUnavailableError if status_code in (502, 503, 504) else APIError
+    return error_class(str(detail), status_code)
+
+
+def license_key_id(license_key: str) -> str:
+    """Identifier the server's change feed uses for a license"""
+    return hashlib.sha256(license_key.encode('utf-8')).hexdigest()
+
+
+def is_idempotent(method: str, endpoint: str) -> bool:
+    """Whether a request may be sent again after it possibly reached the server"""
+    method = method.upper()
+    return method in ('GET', 'HEAD') or (method == 'POST' and endpoint in IDEMPOTENT_POST_ENDPOINTS)
+
+
+class RetryPolicy:
+    """Idempotency-aware retries with full-jitter exponential backoff
+
+    Idempotent requests are retried after connection errors, timeouts and
+    ``RETRY_STATUSES``. Other requests (license generation) are retried
+    only when the connection was never established, so the server cannot
+    have acted on them.
+    """
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, backoff_max: float = 8.0):
+        """Initialize policy; ``max_retries=0`` sends every request once"""
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def should_retry(self, attempt: int, idempotent: bool, status_code: int = None,
+                     connect_failed: bool = False) -> bool:
+        """Decide whether attempt number ``attempt`` (1-based) gets another try"""
+        if attempt > self.max_retries:
+            return False
+        if connect_failed:
+            return True
+        if not idempotent:
+            return False
+        return status_code is None or status_code in RETRY_STATUSES
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """Seconds to sleep before the next attempt
+
+        A numeric ``Retry-After`` from the server wins (capped at
+        ``backoff_max``); otherwise the delay is uniform in
+        ``[0, backoff * 2 ** (attempt - 1)]`` so a fleet of agents does not
+        reconnect in lockstep after a server restart.
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+
+
+def encode_body(data: Any, gzip_min_bytes: int) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize a JSON body, gzip-compressed when it is at least ``gzip_min_bytes``"""
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if gzip_min_bytes and len(body) >= gzip_min_bytes:
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
+
+
+def parse_server_timing(header: Optional[str]) -> Optional[float]:
+    """Total ``dur`` in ms from a ``Server-Timing`` header, if present"""
+    if not header:
+        return None
+    total = None
+    for metric in header.split(','):
+        for param in metric.split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'dur':
+                try:
+                    total = (total or 0.0) + float(value)
+                except ValueError:
+                    pass
+    return total
+
+
+class ValidatorCache:
+    """Last ETag and body per resource, for conditional GETs
+
+    The body is kept as the raw bytes the server sent and parsed again on a
+    304, so callers never share (and mutate) one response dictionary.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """Remember at most ``max_size`` resources, least recently used first out"""
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (etag, body)
+        self._lock = threading.Lock()
+
+    def etag(self, key: str) -> Optional[str]:
+        """ETag to send as ``If-None-Match``, if the resource was seen before"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def body(self, key: str, etag: str) -> Optional[Any]:
+        """Parsed body stored under ``etag``, or None if it has been replaced"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            body = entry[1]
+        return json.loads(body)
+
+    def store(self, key: str, etag: Optional[str], body: bytes):
+        """Remember a 200 response; one without an ETag forgets the resource"""
+        with self._lock:
+            if not etag or self.max_size <= 0:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class TimingRecorder:
+    """Per-request timings, with the last one kept per thread or asyncio task
+
+    ``elapsed_ms`` covers every attempt including backoff; ``server_ms`` is
+    what the server reported spending on the final attempt, so the
+    difference is network and queueing time.
+    """
+
+    def __init__(self, window: int = 1000):
+        """Keep the last ``window`` timings for percentiles"""
+        self._recent = deque(maxlen=window)
+        self._last = ContextVar(f'last_timing_{id(self)}', default=None)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+
+    def record(self, method: str, endpoint: str, status_code: Optional[int], attempts: int,
+               started: float, server_ms: float = None, request_bytes: int = 0,
+               compressed: bool = False) -> Dict[str, Any]:
+        """Store the timing of one finished request (``started`` from ``perf_counter``)"""
+        timing = {
+            'method': method,
+            'endpoint': endpoint,
+            'status_code': status_code,
+            'attempts': attempts,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'server_ms': server_ms,
+            'request_bytes': request_bytes,
+            'request_compressed': compressed,
+        }
+        self._last.set(timing)
+        with self._lock:
+            self._requests += 1
+            self._retries += attempts - 1
+            if status_code is None or status_code >= 400:
+                self._failures += 1
+            self._recent.append(timing['elapsed_ms'])
+        return timing
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Timing of the last request made by the calling thread or task"""
+        return self._last.get()
+
+    def clear_last(self):
+        """Forget the calling thread's last timing before starting a new job"""
+        self._last.set(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counts and latency percentiles over the recent window"""
+        with self._lock:
+            latencies = sorted(self._recent)
+            stats = {
+                'requests': self._requests,
+                'retries': self._retries,
+                'failures': self._failures,
+            }
+        if latencies:
+            stats['p50_ms'] = latencies[len(latencies) // 2]
+            stats['p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats['max_ms'] = latencies[-1]
+        return stats
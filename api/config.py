@@ -19,7 +19,21 @@ class Config:
     DATABASE_USER = os.getenv('DATABASE_USER', 'root')
     DATABASE_PASSWORD = os.getenv('DATABASE_PASSWORD', 'password')
     
-    # RSA Key paths
+    # Connection pool settings
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 20))
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 5))
+    DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))
+    DB_POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', 5))
+    
+    # Worker pool for CPU-heavy work (bcrypt, license signing)
+    CPU_WORKERS = int(os.getenv('CPU_WORKERS', os.cpu_count() or 4))
+    
+    # Processes that sign licenses (0 signs on the CPU worker threads instead)
+    SIGNING_WORKERS = int(os.getenv('SIGNING_WORKERS', '0'))
+    
+    # Signing key paths (RSA or Ed25519; the key type selects the license signature_algorithm)
     PRIVATE_KEY_PATH = os.getenv('PRIVATE_KEY_PATH', '../rsa/private_key.pem')
     PUBLIC_KEY_PATH = os.getenv('PUBLIC_KEY_PATH', '../rsa/public_key.pem')
     
@@ -27,15 +41,36 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    ADMIN_API_KEY = os.getenv('ADMIN_API_KEY', '')  # Empty disables the admin endpoints
+    
+    # License lookup cache (verify and info endpoints)
+    LICENSE_CACHE_SIZE = int(os.getenv('LICENSE_CACHE_SIZE', 10000))
+    LICENSE_CACHE_TTL_SECONDS = float(os.getenv('LICENSE_CACHE_TTL_SECONDS', 60))
+    
+    # Revocation/expiry change feed (license_changes)
+    CHANGE_FEED_POLL_INTERVAL = float(os.getenv('CHANGE_FEED_POLL_INTERVAL', 1.0))
+    CHANGE_FEED_BUFFER_SIZE = int(os.getenv('CHANGE_FEED_BUFFER_SIZE', 10000))
+    CHANGE_FEED_PAGE_SIZE = int(os.getenv('CHANGE_FEED_PAGE_SIZE', 1000))
+    CHANGE_FEED_MAX_WAIT = float(os.getenv('CHANGE_FEED_MAX_WAIT', 25))  # long-poll cap, below agent timeouts
+    CHANGE_FEED_HEARTBEAT = float(os.getenv('CHANGE_FEED_HEARTBEAT', 15))  # SSE keep-alive comments
     
     # Rate limiting
     MAX_VERIFICATIONS_PER_DAY = int(os.getenv('MAX_VERIFICATIONS_PER_DAY', 10))
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'sql')  # sql or memory
+    RATE_LIMIT_SHARDS = int(os.getenv('RATE_LIMIT_SHARDS', 16))
+    RATE_LIMIT_SYNC_INTERVAL = float(os.getenv('RATE_LIMIT_SYNC_INTERVAL', 5))
+    
+    # Batch verification
+    BATCH_VERIFY_MAX_ITEMS = int(os.getenv('BATCH_VERIFY_MAX_ITEMS', 10000))
+    BATCH_VERIFY_CHUNK_SIZE = int(os.getenv('BATCH_VERIFY_CHUNK_SIZE', 500))
+    BATCH_VERIFY_STREAM_THRESHOLD = int(os.getenv('BATCH_VERIFY_STREAM_THRESHOLD', 1000))
     OFFLINE_GRACE_PERIOD_HOURS = int(os.getenv('OFFLINE_GRACE_PERIOD_HOURS', 48))
     VERIFICATION_INTERVAL_HOURS = int(os.getenv('VERIFICATION_INTERVAL_HOURS', 24))
     
     # License settings
     LICENSE_KEY_PREFIX = os.getenv('LICENSE_KEY_PREFIX', 'OSPL')
     COMPANY_ABBREVIATION = os.getenv('COMPANY_ABBREVIATION', 'OSPL')
+    LICENSE_KEY_MAX_ATTEMPTS = int(os.getenv('LICENSE_KEY_MAX_ATTEMPTS', 5))
     
     # Server settings
     HOST = os.getenv('HOST', '0.0.0.0')
@@ -46,9 +81,61 @@ class Config:
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'license_api.log')
     
+    # Audit log writer (license_logs)
+    LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 500))
+    LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 1.0))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_OVERFLOW_POLICY = os.getenv('LOG_OVERFLOW_POLICY', 'spill')  # block, drop or spill
+    # Each worker process spills to its own file: the pid is added before the extension
+    LOG_SPILL_PATH = os.getenv('LOG_SPILL_PATH', 'license_logs.spill.jsonl')
+    LOG_BLOCK_TIMEOUT = float(os.getenv('LOG_BLOCK_TIMEOUT', 0.1))
+    
+    # Per-phase verify timings written to license_verifications (batch settings shared with LOG_*)
+    VERIFICATION_RECORDING_ENABLED = os.getenv('VERIFICATION_RECORDING_ENABLED', 'true').lower() == 'true'
+    VERIFICATION_SPILL_PATH = os.getenv('VERIFICATION_SPILL_PATH', 'license_verifications.spill.jsonl')
+    
+    # license_logs partitions: months created ahead, months kept before a
+    # partition is archived to LOG_ARCHIVE_DIR and dropped (0 keeps everything).
+    # Off by default: enable it on one worker per deployment (a MySQL named lock
+    # also keeps concurrent runs from archiving the same partition).
+    LOG_PARTITION_MAINTENANCE_ENABLED = os.getenv('LOG_PARTITION_MAINTENANCE_ENABLED', 'false').lower() == 'true'
+    LOG_PARTITION_MONTHS_AHEAD = int(os.getenv('LOG_PARTITION_MONTHS_AHEAD', 3))
+    LOG_RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', 12))
+    LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'log_archive')
+    LOG_PARTITION_MAINTENANCE_INTERVAL = float(os.getenv('LOG_PARTITION_MAINTENANCE_INTERVAL', 6 * 3600))
+    
+    # Daily statistics rollup of license_logs/license_verifications. Off by default:
+    # enable it on exactly one worker per deployment.
+    STATS_ROLLUP_ENABLED = os.getenv('STATS_ROLLUP_ENABLED', 'false').lower() == 'true'
+    STATS_ROLLUP_INTERVAL = float(os.getenv('STATS_ROLLUP_INTERVAL', 60))
+    STATS_ROLLUP_PAGE_SIZE = int(os.getenv('STATS_ROLLUP_PAGE_SIZE', 10000))
+    STATS_QUERY_MAX_DAYS = int(os.getenv('STATS_QUERY_MAX_DAYS', 366))
+    
     # Hardware fingerprinting
     HARDWARE_FINGERPRINT_REQUIRED = os.getenv('HARDWARE_FINGERPRINT_REQUIRED', 'true').lower() == 'true'
-    AUTO_REVOKE_ON_SHARING = os.getenv('AUTO_REVOKE_ON_SHARING', 'true').lower() == 'true'
+    AUTO_REVOKE_ON_SHARING = os.getenv('AUTO_REVOKE_ON_SHARING', 'false').lower() == 'true'
+    # Sharing detection over license_logs: flag licenses seen on more than
+    # SHARING_MAX_MACHINES machines or SHARING_MAX_IPS source IPs within
+    # SHARING_WINDOW_SECONDS. Only more than SHARING_MAX_MACHINES machines that
+    # verified successfully revoke, and only when AUTO_REVOKE_ON_SHARING; rejected
+    # attempts can be forged by anyone holding the key, so they only flag.
+    # Off by default: enable it on exactly one worker per deployment.
+    SHARING_DETECTION_ENABLED = os.getenv('SHARING_DETECTION_ENABLED', 'false').lower() == 'true'
+    SHARING_WINDOW_SECONDS = float(os.getenv('SHARING_WINDOW_SECONDS', 86400))
+    SHARING_MAX_MACHINES = int(os.getenv('SHARING_MAX_MACHINES', 2))
+    SHARING_MAX_IPS = int(os.getenv('SHARING_MAX_IPS', 10))
+    SHARING_POLL_INTERVAL = float(os.getenv('SHARING_POLL_INTERVAL', 2.0))
+    # Weighted share of bound components (UUID, BIOS, DISK, CPU, MAC) a machine
+    # must still present to pass; 1.0 requires every bound component. CPU alone
+    # never passes: at least one of UUID, BIOS, DISK or MAC has to match.
+    FINGERPRINT_MATCH_THRESHOLD = float(os.getenv('FINGERPRINT_MATCH_THRESHOLD', 0.6))
+    
+    # HTTP compression: responses at least GZIP_MIN_SIZE bytes are gzipped for
+    # clients that accept it (0 disables); gzip request bodies are inflated up to
+    # MAX_REQUEST_BODY_BYTES
+    GZIP_MIN_SIZE = int(os.getenv('GZIP_MIN_SIZE', 500))
+    GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+    MAX_REQUEST_BODY_BYTES = int(os.getenv('MAX_REQUEST_BODY_BYTES', 8 * 1024 * 1024))
     
     # API settings
     API_PREFIX = "/api/v1"
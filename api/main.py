@@ -7,13 +7,15 @@ FastAPI server for license verification and management
 import os
 import sys
 import json
+import hmac
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import pymysql
 import bcrypt
 
@@ -21,9 +23,21 @@ import bcrypt
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api.config import config
-from api.utils.crypto_utils import license_crypto
+from api.utils.signing_pool import SigningPool
 from api.utils.license_generator import license_generator
-from api.utils.hardware_fingerprint import hardware_fingerprint
+from api.utils.hardware_fingerprint import hardware_fingerprint, component_hashes, DISCRIMINATING_COMPONENTS
+from api.utils.db_pool import ConnectionPool, PoolTimeout
+from api.utils.workers import WorkerPool
+from api.utils.async_db import AsyncDatabase
+from api.utils.license_cache import LicenseCache, license_cache_key, record_etag
+from api.utils.batch_writer import BatchWriter
+from api.utils.log_partitions import LogPartitionManager
+from api.utils.stats_rollup import DailyRollup, query_daily_stats
+from api.utils.rate_limiter import create_rate_limiter
+from api.utils.change_feed import ChangeFeed
+from api.utils.sharing_detector import SharingDetector
+from api.utils.http_middleware import CompressionMiddleware, ServerTimingMiddleware
+from api.utils.verify_timing import PhaseTimer, LatencyHistograms
 
 # Configure logging
 logging.basicConfig(
@@ -36,13 +50,196 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Database connection
+def create_db_connection():
+    """Open a new database connection for the pool"""
+    return pymysql.connect(
+        host=config.DATABASE_HOST,
+        port=config.DATABASE_PORT,
+        user=config.DATABASE_USER,
+        password=config.DATABASE_PASSWORD,
+        database=config.DATABASE_NAME,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True
+    )
+
+db_pool = ConnectionPool(
+    create_db_connection,
+    min_size=config.DB_POOL_MIN_SIZE,
+    max_size=config.DB_POOL_MAX_SIZE,
+    acquire_timeout=config.DB_POOL_ACQUIRE_TIMEOUT,
+    idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+    max_lifetime=config.DB_POOL_MAX_LIFETIME,
+    ping_interval=config.DB_POOL_PING_INTERVAL
+)
+
+# Blocking work runs on dedicated pools so the event loop never waits on it
+db_workers = WorkerPool(config.DB_POOL_MAX_SIZE, name="db")
+cpu_workers = WorkerPool(config.CPU_WORKERS, name="cpu")
+database = AsyncDatabase(db_pool, db_workers)
+
+# License signing (RSA private key loaded once per signing process)
+license_signer = SigningPool(
+    config.PRIVATE_KEY_PATH,
+    workers=config.SIGNING_WORKERS,
+    fallback=cpu_workers
+)
+
+# Audit rows are written in batches by a background thread
+LICENSE_LOG_COLUMNS = (
+    'license_id', 'status', 'access_time', 'source_ip', 'user_agent',
+    'hardware_fingerprint', 'verification_type', 'error_message'
+)
+
+license_log_writer = BatchWriter(
+    db_pool,
+    'license_logs',
+    LICENSE_LOG_COLUMNS,
+    batch_size=config.LOG_BATCH_SIZE,
+    flush_interval=config.LOG_FLUSH_INTERVAL,
+    queue_size=config.LOG_QUEUE_SIZE,
+    overflow_policy=config.LOG_OVERFLOW_POLICY,
+    spill_path=config.LOG_SPILL_PATH,
+    block_timeout=config.LOG_BLOCK_TIMEOUT
+)
+
+# Verify response times, split by phase, for latency history
+LICENSE_VERIFICATION_COLUMNS = (
+    'license_id', 'verification_time', 'verification_type', 'status', 'hardware_fingerprint',
+    'source_ip', 'response_time_ms', 'phase_timings', 'error_details'
+)
+
+license_verification_writer = BatchWriter(
+    db_pool,
+    'license_verifications',
+    LICENSE_VERIFICATION_COLUMNS,
+    batch_size=config.LOG_BATCH_SIZE,
+    flush_interval=config.LOG_FLUSH_INTERVAL,
+    queue_size=config.LOG_QUEUE_SIZE,
+    overflow_policy=config.LOG_OVERFLOW_POLICY,
+    spill_path=config.VERIFICATION_SPILL_PATH,
+    block_timeout=config.LOG_BLOCK_TIMEOUT
+)
+
+# In-process verify latency per phase, reported by /metrics; batch chunks are timed separately
+verify_latency = LatencyHistograms()
+batch_verify_latency = LatencyHistograms()
+
+# Monthly license_logs partitions: created ahead, archived and dropped after retention
+log_partitions = LogPartitionManager(
+    db_pool,
+    table='license_logs',
+    months_ahead=config.LOG_PARTITION_MONTHS_AHEAD,
+    retention_months=config.LOG_RETENTION_MONTHS,
+    archive_dir=config.LOG_ARCHIVE_DIR,
+    interval=config.LOG_PARTITION_MAINTENANCE_INTERVAL
+)
+
+# Per-day verification counts and response time percentiles for dashboards
+stats_rollup = DailyRollup(
+    db_pool,
+    interval=config.STATS_ROLLUP_INTERVAL,
+    page_size=config.STATS_ROLLUP_PAGE_SIZE
+)
+
+# Daily verification limits (sql: conditional UPDATE, memory: token buckets)
+rate_limiter = create_rate_limiter(
+    config.RATE_LIMIT_BACKEND,
+    db_pool,
+    default_limit=config.MAX_VERIFICATIONS_PER_DAY,
+    shards=config.RATE_LIMIT_SHARDS,
+    sync_interval=config.RATE_LIMIT_SYNC_INTERVAL
+)
+
+# Hot cache of joined license records for the verify/info paths
+license_cache = LicenseCache(
+    max_size=config.LICENSE_CACHE_SIZE,
+    ttl_seconds=config.LICENSE_CACHE_TTL_SECONDS
+)
+
+# Revocation/expiry feed; every change also drops the license from this worker's cache
+license_change_feed = ChangeFeed(
+    database,
+    poll_interval=config.CHANGE_FEED_POLL_INTERVAL,
+    buffer_size=config.CHANGE_FEED_BUFFER_SIZE,
+    page_size=config.CHANGE_FEED_PAGE_SIZE,
+    on_change=license_cache.invalidate
+)
+
+async def handle_sharing_flag(flag: Dict[str, Any]):
+    """Revoke a license the sharing detector flagged, when configured to"""
+    if not (config.AUTO_REVOKE_ON_SHARING and flag['revocable']):
+        return
+    row = await database.fetchone(
+        "SELECT license_key FROM licenses WHERE id = %s AND is_revoked = FALSE", (flag['license_id'],)
+    )
+    if not row:
+        return
+    reason = f"Sharing detected: {flag['distinct_machines']} machines in {flag['window_seconds'] / 3600:g}h"
+    await update_license(
+        row['license_key'],
+        "is_revoked = TRUE, revoked_at = %s, revoked_reason = %s",
+        (datetime.now(), reason),
+        database
+    )
+    logger.warning(f"License auto-revoked for sharing: {row['license_key']}")
+
+# Tails license_logs for licenses used from too many machines or networks
+sharing_detector = SharingDetector(
+    database,
+    window_seconds=config.SHARING_WINDOW_SECONDS,
+    max_machines=config.SHARING_MAX_MACHINES,
+    max_ips=config.SHARING_MAX_IPS,
+    poll_interval=config.SHARING_POLL_INTERVAL,
+    on_flag=handle_sharing_flag
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open pooled resources on startup and release them on shutdown"""
+    try:
+        db_pool.warm_up()
+    except Exception as e:
+        # Connections will be opened on demand once the database is reachable
+        logger.warning(f"Database pool warm-up failed: {e}")
+    
+    license_log_writer.start()
+    license_verification_writer.start()
+    rate_limiter.start()
+    license_signer.start()
+    license_change_feed.start()
+    if config.SHARING_DETECTION_ENABLED:
+        sharing_detector.start()
+    if config.LOG_PARTITION_MAINTENANCE_ENABLED:
+        log_partitions.start()
+    if config.STATS_ROLLUP_ENABLED:
+        stats_rollup.start()
+    
+    yield
+    
+    stats_rollup.stop()
+    log_partitions.stop()
+    sharing_detector.stop()
+    license_change_feed.stop()
+    
+    # Drain queued audit rows and rate-limit counts before the pool goes away
+    rate_limiter.stop()
+    license_log_writer.stop()
+    license_verification_writer.stop()
+    license_signer.stop()
+    db_workers.shutdown()
+    cpu_workers.shutdown()
+    db_pool.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title=config.TITLE,
     description=config.DESCRIPTION,
     version=config.VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -54,107 +251,281 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database connection
-def get_db_connection():
-    """Get database connection"""
-    try:
-        connection = pymysql.connect(
-            host=config.DATABASE_HOST,
-            port=config.DATABASE_PORT,
-            user=config.DATABASE_USER,
-            password=config.DATABASE_PASSWORD,
-            database=config.DATABASE_NAME,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        return connection
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        raise HTTPException(status_code=500, detail="Database connection failed")
+# gzip request/response bodies; Server-Timing lets agents separate server time from network time
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.GZIP_MIN_SIZE,
+    compresslevel=config.GZIP_LEVEL,
+    max_request_size=config.MAX_REQUEST_BODY_BYTES
+)
+app.add_middleware(ServerTimingMiddleware)
+
+async def get_database() -> AsyncDatabase:
+    """FastAPI dependency providing the shared async database layer"""
+    return database
 
 # Rate limiting
-def check_rate_limit(license_id: int, db_connection) -> bool:
+async def check_rate_limit(license_id: int, daily_limit: int = None) -> bool:
     """Check if license has exceeded daily verification limit"""
     try:
-        with db_connection.cursor() as cursor:
-            # Get current license info
-            cursor.execute(
-                "SELECT verification_count_today, last_verification_reset, daily_verification_limit FROM licenses WHERE id = %s",
-                (license_id,)
-            )
-            license_info = cursor.fetchone()
-            
-            if not license_info:
-                return False
-            
-            # Check if it's a new day
-            today = datetime.now().date()
-            last_reset = license_info['last_verification_reset']
-            
-            if last_reset is None or last_reset.date() < today:
-                # Reset counter for new day
-                cursor.execute(
-                    "UPDATE licenses SET verification_count_today = 0, last_verification_reset = %s WHERE id = %s",
-                    (today, license_id)
-                )
-                db_connection.commit()
-                return True
-            
-            # Check if limit exceeded
-            if license_info['verification_count_today'] >= license_info['daily_verification_limit']:
-                return False
-            
-            # Increment counter
-            cursor.execute(
-                "UPDATE licenses SET verification_count_today = verification_count_today + 1 WHERE id = %s",
-                (license_id,)
-            )
-            db_connection.commit()
-            return True
-            
+        if rate_limiter.requires_io:
+            return await db_workers.run(rate_limiter.allow, license_id, daily_limit)
+        return rate_limiter.allow(license_id, daily_limit)
     except Exception as e:
         logger.error(f"Rate limit check failed: {e}")
         return False
 
 # Log license activity
-def log_license_activity(license_id: int, status: str, source_ip: str, user_agent: str, 
-                        hardware_fingerprint: str = None, verification_type: str = "ONLINE", 
-                        error_message: str = None, db_connection = None):
-    """Log license verification activity"""
-    if db_connection is None:
-        db_connection = get_db_connection()
+async def log_license_activity(license_id: int, status: str, source_ip: str, user_agent: str, 
+                         hardware_fingerprint: str = None, verification_type: str = "ONLINE", 
+                         error_message: str = None):
+    """Queue a license activity row for the background log writer"""
+    await license_log_writer.submit_async({
+        'license_id': license_id,
+        'status': status,
+        'access_time': datetime.now(),
+        'source_ip': source_ip,
+        'user_agent': user_agent,
+        'hardware_fingerprint': hardware_fingerprint,
+        'verification_type': verification_type,
+        'error_message': error_message
+    })
+
+# license_verifications status of each license_logs verify outcome; the rest are FAILED
+VERIFICATION_STATUSES = {"VALID": "SUCCESS", "EXPIRED": "EXPIRED", "REVOKED": "REVOKED"}
+
+async def finish_verification(timer: PhaseTimer, license_info: Optional[Dict], log_status: str,
+                        client_ip: str, user_agent: str, hardware_fingerprint: str, detail: str = None):
+    """Log a verify outcome and record how long each phase took"""
+    with timer.phase('logging'):
+        if license_info:
+            await log_license_activity(license_info['id'], log_status, client_ip, user_agent, hardware_fingerprint)
+        else:
+            await log_license_activity(0, log_status, client_ip, user_agent, error_message=detail)
     
-    try:
-        with db_connection.cursor() as cursor:
-            cursor.execute(
-                """INSERT INTO license_logs 
-                   (license_id, status, source_ip, user_agent, hardware_fingerprint, verification_type, error_message)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-                (license_id, status, source_ip, user_agent, hardware_fingerprint, verification_type, error_message)
-            )
-            db_connection.commit()
-    except Exception as e:
-        logger.error(f"Failed to log license activity: {e}")
+    total_ms = timer.total_ms
+    verify_latency.record(timer, log_status, total_ms)
+    # Unknown keys have no license row to reference
+    if license_info and config.VERIFICATION_RECORDING_ENABLED:
+        await license_verification_writer.submit_async(verification_row(
+            license_info, log_status, client_ip, hardware_fingerprint, detail,
+            'ONLINE', total_ms, json.dumps(timer.rounded())
+        ))
+
+def verification_row(license_info: Dict, log_status: str, client_ip: str, hardware_fingerprint: str,
+                     detail: Optional[str], verification_type: str, total_ms: float,
+                     phase_timings: str) -> Dict[str, Any]:
+    """license_verifications row for one verify outcome"""
+    status = VERIFICATION_STATUSES.get(log_status, "FAILED")
+    return {
+        'license_id': license_info['id'],
+        'verification_time': datetime.now(),
+        'verification_type': verification_type,
+        'status': status,
+        'hardware_fingerprint': hardware_fingerprint,
+        'source_ip': client_ip,
+        'response_time_ms': round(total_ms),
+        'phase_timings': phase_timings,
+        'error_details': None if status == "SUCCESS" else f"{log_status}: {detail}" if detail else log_status
+    }
 
 # Authentication
-def verify_user_credentials(username: str, password: str, db_connection) -> Optional[Dict]:
+async def verify_user_credentials(username: str, password: str, db: AsyncDatabase) -> Optional[Dict]:
     """Verify user credentials"""
     try:
-        with db_connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT id, name, username, password_hash, email FROM users WHERE username = %s AND is_active = TRUE",
-                (username,)
-            )
-            user = cursor.fetchone()
-            
-            if user and bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-                return user
-            return None
-            
+        user = await db.fetchone(
+            "SELECT id, name, username, password_hash, email FROM users WHERE username = %s AND is_active = TRUE",
+            (username,)
+        )
+        
+        # bcrypt is deliberately slow, so keep it off the event loop
+        if user and await cpu_workers.run(
+            bcrypt.checkpw, password.encode('utf-8'), user['password_hash'].encode('utf-8')
+        ):
+            return user
+        return None
+        
+    except PoolTimeout:
+        raise
     except Exception as e:
         logger.error(f"User verification failed: {e}")
         return None
 
+async def require_admin(request: Request):
+    """FastAPI dependency guarding admin endpoints with the X-Admin-Key header"""
+    if not config.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    
+    provided_key = request.headers.get('x-admin-key', '')
+    if not hmac.compare_digest(provided_key.encode('utf-8'), config.ADMIN_API_KEY.encode('utf-8')):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+# License lookups
+LICENSE_RECORD_SELECT = """SELECT l.*, u.username, u.name as customer_name, p.name as product_name, p.product_code 
+   FROM licenses l 
+   JOIN users u ON l.user_id = u.id 
+   JOIN products p ON l.product_id = p.id"""
+
+LICENSE_RECORD_QUERY = LICENSE_RECORD_SELECT + " WHERE l.license_key = %s"
+
+async def fetch_license_record(license_key: str, db: AsyncDatabase) -> Optional[Dict]:
+    """Get the joined license record, served from the hot cache when possible"""
+    record = license_cache.get(license_key)
+    if record is not None:
+        return record
+    
+    token = license_cache.begin_load()
+    record = await db.fetchone(LICENSE_RECORD_QUERY, (license_key,))
+    if record is not None:
+        license_cache.put(record['license_key'], record, token)
+    return record
+
+async def fetch_license_entry(license_key: str, db: AsyncDatabase) -> Optional[Tuple[Dict, str]]:
+    """Get the joined license record and its ETag, reusing the cached ETag on a hit"""
+    entry = license_cache.get_with_etag(license_key)
+    if entry is not None:
+        return entry
+    
+    token = license_cache.begin_load()
+    record = await db.fetchone(LICENSE_RECORD_QUERY, (license_key,))
+    if record is None:
+        return None
+    etag = record_etag(record)
+    license_cache.put(record['license_key'], record, token, etag=etag)
+    return record, etag
+
+async def fetch_license_records(license_keys: List[str], db: AsyncDatabase) -> Dict[str, Dict]:
+    """Get many joined license records with one IN query for the cache misses
+
+    Results are keyed by ``license_cache_key``, since MySQL matches keys
+    case-insensitively and returns them in their stored case.
+    """
+    records = {}
+    missing = []
+    for key, license_key in {license_cache_key(k): k for k in license_keys}.items():
+        record = license_cache.get(license_key)
+        if record is not None:
+            records[key] = record
+        else:
+            missing.append(license_key)
+    
+    if missing:
+        token = license_cache.begin_load()
+        placeholders = ', '.join(['%s'] * len(missing))
+        rows = await db.fetchall(
+            f"{LICENSE_RECORD_SELECT} WHERE l.license_key IN ({placeholders})",
+            tuple(missing)
+        )
+        for row in rows:
+            records[license_cache_key(row['license_key'])] = row
+            license_cache.put(row['license_key'], row, token)
+    
+    return records
+
+def is_duplicate_license_key(error: Exception) -> bool:
+    """Check if an IntegrityError is a duplicate entry on licenses.license_key"""
+    # MySQL error 1062: Duplicate entry '...' for key 'license_key'
+    return bool(error.args) and error.args[0] == 1062 and 'license_key' in str(error)
+
+async def update_license(license_key: str, assignments: str, params: tuple, db: AsyncDatabase) -> int:
+    """Apply an UPDATE to one license and invalidate its cached record"""
+    try:
+        return await db.execute(
+            f"UPDATE licenses SET {assignments} WHERE license_key = %s",
+            params + (license_key,)
+        )
+    finally:
+        # Invalidate after the write commits so concurrent loads can't re-cache old data
+        license_cache.invalidate(license_key)
+
+# Hashed fingerprint components, indexed for "which licenses share this hardware"
+def replace_fingerprint_components(connection, rows: List[Tuple[int, str, str]], license_ids: List[int]):
+    """Swap the component rows of ``license_ids`` for ``rows`` in one transaction"""
+    placeholders = ', '.join(['%s'] * len(license_ids))
+    try:
+        connection.begin()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM license_fingerprint_components WHERE license_id IN ({placeholders})",
+                tuple(license_ids)
+            )
+            if rows:
+                cursor.executemany(
+                    """INSERT INTO license_fingerprint_components (license_id, component_type, component_hash)
+                       VALUES (%s, %s, %s)""",
+                    rows
+                )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+def fingerprint_component_rows(license_id: int, fingerprint: Optional[str]) -> List[Tuple[int, str, str]]:
+    """Component index rows for one license; CPU ids are shared by many machines and left out"""
+    return [(license_id, kind, digest) for kind, digest in component_hashes(fingerprint or '').items()
+            if kind in DISCRIMINATING_COMPONENTS]
+
+async def index_license_fingerprint(license_id: int, fingerprint: Optional[str], db: AsyncDatabase):
+    """Re-index one license's bound fingerprint; the index can be rebuilt, so failures only warn"""
+    try:
+        await db.run(replace_fingerprint_components, fingerprint_component_rows(license_id, fingerprint), [license_id])
+    except Exception as e:
+        logger.warning(f"Fingerprint component index update failed for license {license_id}: {e}")
+
+# Conditional GET support for license info polling
+def license_info_etag(row_etag: str, is_active: bool) -> str:
+    """Weak ETag for the info response; status flips at expiry without a row change"""
+    return f'W/"{row_etag}-{"a" if is_active else "i"}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+# Verification checks shared by the single and batch endpoints
+def check_license_state(license_info: Optional[Dict]) -> Optional[Tuple[str, int, str]]:
+    """Check existence, revocation and expiry; returns (log status, HTTP status, detail) on failure"""
+    if not license_info:
+        return "REJECTED", 404, "License not found"
+    
+    # Check if license is revoked
+    if license_info['is_revoked']:
+        return "REVOKED", 403, "License has been revoked"
+    
+    # Check if license is expired
+    if datetime.now() > license_info['valid_till']:
+        return "EXPIRED", 403, "License has expired"
+    
+    return None
+
+def check_hardware_fingerprint(license_info: Dict, current_fingerprint: str) -> Optional[Tuple[str, int, str]]:
+    """Compare the presented fingerprint with the bound one, tolerating single component changes"""
+    if not hardware_fingerprint.validate_fingerprint(
+            license_info['hardware_fingerprint'], current_fingerprint, config.FINGERPRINT_MATCH_THRESHOLD):
+        return "SHARING_DETECTED", 403, "Hardware fingerprint mismatch - potential license sharing"
+    return None
+
+def verified_license_info(license_info: Dict) -> Dict[str, Any]:
+    """Public fields returned for a successful verification"""
+    return {
+        "license_key": license_info['license_key'],
+        "username": license_info['username'],
+        "product_name": license_info['product_name'],
+        "product_code": license_info['product_code'],
+        "valid_till": license_info['valid_till'].isoformat(),
+        "status": "Active"
+    }
+
 # API Endpoints
 
 @app.get("/")
@@ -167,14 +538,13 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        db = get_db_connection()
-        with db.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        db.close()
+        with db_pool.connection() as db:
+            with db.cursor() as cursor:
+                cursor.execute("SELECT 1")
         
         return {
             "status": "healthy",
@@ -185,8 +555,29 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail="Service unhealthy")
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics endpoint"""
+    return {
+        "db_pool": db_pool.stats(),
+        "db_workers": db_workers.stats(),
+        "cpu_workers": cpu_workers.stats(),
+        "license_signer": license_signer.stats(),
+        "license_cache": license_cache.stats(),
+        "license_log_writer": license_log_writer.stats(),
+        "license_verification_writer": license_verification_writer.stats(),
+        "verify_latency": verify_latency.stats(),
+        "batch_verify_latency": batch_verify_latency.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "license_change_feed": license_change_feed.stats(),
+        "sharing_detector": sharing_detector.stats(),
+        "log_partitions": log_partitions.stats(),
+        "stats_rollup": stats_rollup.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/api/v1/generate-license")
-async def generate_license(request: Request):
+async def generate_license(request: Request, db: AsyncDatabase = Depends(get_database)):
     """Generate a new license for a user"""
     try:
         # Get request data
@@ -202,57 +593,43 @@ async def generate_license(request: Request):
         client_ip = request.client.host
         user_agent = request.headers.get('user-agent', 'Unknown')
         
-        # Connect to database
-        db = get_db_connection()
+        # Verify user credentials
+        user = await verify_user_credentials(data['username'], data['password'], db)
+        if not user:
+            await log_license_activity(0, "REJECTED", client_ip, user_agent, error_message="Invalid credentials")
+            raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        try:
-            # Verify user credentials
-            user = verify_user_credentials(data['username'], data['password'], db)
-            if not user:
-                log_license_activity(0, "REJECTED", client_ip, user_agent, error_message="Invalid credentials")
-                raise HTTPException(status_code=401, detail="Invalid credentials")
-            
-            # Get product information
-            with db.cursor() as cursor:
-                cursor.execute(
-                    "SELECT id, name, product_code FROM products WHERE product_code = %s",
-                    (data['product_id'],)
-                )
-                product = cursor.fetchone()
-                
-                if not product:
-                    log_license_activity(0, "REJECTED", client_ip, user_agent, error_message="Invalid product")
-                    raise HTTPException(status_code=400, detail="Invalid product")
-            
-            # Check if user already has a license for this product
-            with db.cursor() as cursor:
-                cursor.execute(
-                    "SELECT id FROM licenses WHERE user_id = %s AND product_id = %s AND is_revoked = FALSE",
-                    (user['id'], product['id'])
-                )
-                existing_license = cursor.fetchone()
-                
-                if existing_license:
-                    log_license_activity(existing_license['id'], "REJECTED", client_ip, user_agent, error_message="License already exists")
-                    raise HTTPException(status_code=400, detail="License already exists for this user and product")
-            
-            # Get existing license keys for uniqueness check
-            with db.cursor() as cursor:
-                cursor.execute("SELECT license_key FROM licenses")
-                existing_keys = [row['license_key'] for row in cursor.fetchall()]
-            
-            # Generate unique license key
-            license_key = license_generator.generate_unique_license_key(
-                product['product_code'], 
-                user['username'], 
-                existing_keys
-            )
-            
-            # Get hardware fingerprint from request or generate one
-            hw_fingerprint = data.get('hardware_fingerprint')
-            if not hw_fingerprint:
-                # Generate a mock fingerprint for testing
-                hw_fingerprint = hardware_fingerprint.generate_fingerprint()
+        # Get product information
+        product = await db.fetchone(
+            "SELECT id, name, product_code FROM products WHERE product_code = %s",
+            (data['product_id'],)
+        )
+        
+        if not product:
+            await log_license_activity(0, "REJECTED", client_ip, user_agent, error_message="Invalid product")
+            raise HTTPException(status_code=400, detail="Invalid product")
+        
+        # Check if user already has a license for this product
+        existing_license = await db.fetchone(
+            "SELECT id FROM licenses WHERE user_id = %s AND product_id = %s AND is_revoked = FALSE",
+            (user['id'], product['id'])
+        )
+        
+        if existing_license:
+            await log_license_activity(existing_license['id'], "REJECTED", client_ip, user_agent, error_message="License already exists")
+            raise HTTPException(status_code=400, detail="License already exists for this user and product")
+        
+        # Get hardware fingerprint from request or generate one
+        hw_fingerprint = data.get('hardware_fingerprint')
+        if not hw_fingerprint:
+            # Generate a mock fingerprint for testing
+            hw_fingerprint = await cpu_workers.run(hardware_fingerprint.generate_fingerprint)
+        
+        # Keys carry enough randomness that collisions are rare; the UNIQUE
+        # constraint on license_key catches the ones that do happen
+        license_id = None
+        for attempt in range(config.LICENSE_KEY_MAX_ATTEMPTS):
+            license_key = license_generator.generate_license_key(product['product_code'], user['username'])
             
             # Create license data
             license_data = license_generator.format_license_json(
@@ -264,13 +641,14 @@ async def generate_license(request: Request):
                 email=data['email']
             )
             
-            # Sign the license
-            signature = license_crypto.sign_license(license_data)
+            # Sign the license; the algorithm field is part of the signed payload
+            license_data['signature_algorithm'] = license_signer.algorithm
+            signature = await license_signer.sign(license_data)
             license_data['signature'] = signature
             
             # Save license to database
-            with db.cursor() as cursor:
-                cursor.execute(
+            try:
+                license_id = await db.insert(
                     """INSERT INTO licenses 
                        (user_id, product_id, license_key, valid_till, hardware_fingerprint, max_installations, current_installations)
                        VALUES (%s, %s, %s, %s, %s, %s, %s)""",
@@ -284,30 +662,38 @@ async def generate_license(request: Request):
                         1   # current_installations
                     )
                 )
-                license_id = cursor.lastrowid
-                db.commit()
-            
-            # Log successful license generation
-            log_license_activity(license_id, "VALID", client_ip, user_agent, hw_fingerprint, "ONLINE")
-            
-            return {
-                "success": True,
-                "message": "License generated successfully",
-                "license": license_data,
-                "license_id": license_id
-            }
-            
-        finally:
-            db.close()
+                break
+            except pymysql.err.IntegrityError as e:
+                if not is_duplicate_license_key(e):
+                    raise
+                logger.warning(f"License key collision on attempt {attempt + 1}: {license_key}")
+        
+        if license_id is None:
+            raise Exception(f"Could not generate unique license key after {config.LICENSE_KEY_MAX_ATTEMPTS} attempts")
+        
+        await index_license_fingerprint(license_id, hw_fingerprint, db)
+        
+        # Log successful license generation
+        await log_license_activity(license_id, "VALID", client_ip, user_agent, hw_fingerprint, "ONLINE")
+        
+        return {
+            "success": True,
+            "message": "License generated successfully",
+            "license": license_data,
+            "license_id": license_id
+        }
             
     except HTTPException:
         raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
     except Exception as e:
         logger.error(f"License generation failed: {e}")
         raise HTTPException(status_code=500, detail="License generation failed")
 
 @app.post("/api/v1/verify-license")
-async def verify_license(request: Request):
+async def verify_license(request: Request, db: AsyncDatabase = Depends(get_database)):
     """Verify an existing license"""
     try:
         # Get request data
@@ -318,133 +704,666 @@ async def verify_license(request: Request):
         for field in required_fields:
             if field not in data:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
+            if not isinstance(data[field], str):
+                raise HTTPException(status_code=400, detail=f"Field must be a string: {field}")
         
         # Get client IP and user agent
         client_ip = request.client.host
         user_agent = request.headers.get('user-agent', 'Unknown')
+        current_fingerprint = data['hardware_fingerprint']
+        timer = PhaseTimer()
         
-        # Connect to database
-        db = get_db_connection()
+        # Get license information
+        with timer.phase('lookup'):
+            license_info = await fetch_license_record(data['license_key'], db)
         
-        try:
-            # Get license information
-            with db.cursor() as cursor:
-                cursor.execute(
-                    """SELECT l.*, u.username, p.name as product_name, p.product_code 
-                       FROM licenses l 
-                       JOIN users u ON l.user_id = u.id 
-                       JOIN products p ON l.product_id = p.id 
-                       WHERE l.license_key = %s""",
-                    (data['license_key'],)
-                )
-                license_info = cursor.fetchone()
-                
-                if not license_info:
-                    log_license_activity(0, "REJECTED", client_ip, user_agent, error_message="License not found")
-                    raise HTTPException(status_code=404, detail="License not found")
-            
-            # Check if license is revoked
-            if license_info['is_revoked']:
-                log_license_activity(license_info['id'], "REVOKED", client_ip, user_agent, data['hardware_fingerprint'])
-                raise HTTPException(status_code=403, detail="License has been revoked")
-            
-            # Check if license is expired
-            if datetime.now() > license_info['valid_till']:
-                log_license_activity(license_info['id'], "EXPIRED", client_ip, user_agent, data['hardware_fingerprint'])
-                raise HTTPException(status_code=403, detail="License has expired")
-            
-            # Check rate limiting
-            if not check_rate_limit(license_info['id'], db):
-                log_license_activity(license_info['id'], "RATE_LIMITED", client_ip, user_agent, data['hardware_fingerprint'])
-                raise HTTPException(status_code=429, detail="Rate limit exceeded")
-            
-            # Check hardware fingerprint
-            stored_fingerprint = license_info['hardware_fingerprint']
-            current_fingerprint = data['hardware_fingerprint']
-            
-            if stored_fingerprint != current_fingerprint:
-                log_license_activity(license_info['id'], "SHARING_DETECTED", client_ip, user_agent, current_fingerprint)
-                raise HTTPException(status_code=403, detail="Hardware fingerprint mismatch - potential license sharing")
-            
-            # Log successful verification
-            log_license_activity(license_info['id'], "VALID", client_ip, user_agent, current_fingerprint, "ONLINE")
-            
-            return {
-                "success": True,
-                "message": "License verification successful",
-                "license_info": {
-                    "license_key": license_info['license_key'],
-                    "username": license_info['username'],
-                    "product_name": license_info['product_name'],
-                    "product_code": license_info['product_code'],
-                    "valid_till": license_info['valid_till'].isoformat(),
-                    "status": "Active"
-                }
-            }
-            
-        finally:
-            db.close()
+        # Check existence, revocation and expiry
+        failure = check_license_state(license_info)
+        if failure:
+            log_status, status_code, detail = failure
+            await finish_verification(timer, license_info, log_status, client_ip, user_agent, current_fingerprint, detail)
+            raise HTTPException(status_code=status_code, detail=detail)
+        
+        # Check rate limiting
+        with timer.phase('rate_limit'):
+            allowed = await check_rate_limit(license_info['id'], license_info['daily_verification_limit'])
+        if not allowed:
+            await finish_verification(timer, license_info, "RATE_LIMITED", client_ip, user_agent, current_fingerprint,
+                                "Rate limit exceeded")
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        
+        # Check hardware fingerprint
+        with timer.phase('fingerprint'):
+            failure = check_hardware_fingerprint(license_info, current_fingerprint)
+        if failure:
+            log_status, status_code, detail = failure
+            await finish_verification(timer, license_info, log_status, client_ip, user_agent, current_fingerprint, detail)
+            raise HTTPException(status_code=status_code, detail=detail)
+        
+        # Log successful verification
+        await finish_verification(timer, license_info, "VALID", client_ip, user_agent, current_fingerprint)
+        
+        return {
+            "success": True,
+            "message": "License verification successful",
+            "license_info": verified_license_info(license_info)
+        }
             
     except HTTPException:
         raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
     except Exception as e:
         logger.error(f"License verification failed: {e}")
         raise HTTPException(status_code=500, detail="License verification failed")
 
-@app.get("/api/v1/licenses/{license_key}")
-async def get_license_info(license_key: str, request: Request):
-    """Get license information"""
+async def verify_license_chunk(items: List[Any], client_ip: str, user_agent: str,
+                               db: AsyncDatabase) -> List[Dict[str, Any]]:
+    """Verify a chunk of (license_key, hardware_fingerprint) pairs in bulk
+
+    The chunk is timed as a whole, phase by phase: each item's
+    license_verifications row carries the chunk's timings (type BATCH).
+    """
+    timer = PhaseTimer()
+    results = [None] * len(items)
+    log_rows = []
+    outcomes = []  # (license_info, log_status, fingerprint, detail) of known licenses
+    now = datetime.now()
+    
+    def finish(index, item, license_info, log_status, status_code, detail):
+        license_key = item['license_key']
+        fingerprint = item['hardware_fingerprint']
+        results[index] = {
+            "license_key": license_key,
+            "success": log_status == "VALID",
+            "status": log_status,
+            "status_code": status_code,
+            "message": detail
+        }
+        if log_status == "VALID":
+            results[index]["license_info"] = verified_license_info(license_info)
+        log_rows.append({
+            'license_id': license_info['id'] if license_info else 0,
+            'status': log_status,
+            'access_time': now,
+            'source_ip': client_ip,
+            'user_agent': user_agent,
+            'hardware_fingerprint': fingerprint if license_info else None,
+            'verification_type': "ONLINE",
+            'error_message': None if license_info else detail
+        })
+        if license_info:
+            outcomes.append((license_info, log_status, fingerprint, detail))
+    
+    def is_well_formed(item):
+        return (isinstance(item, dict)
+                and isinstance(item.get('license_key'), str) and item['license_key']
+                and isinstance(item.get('hardware_fingerprint'), str) and item['hardware_fingerprint'])
+    
+    # Resolve every key in the chunk with one query
+    with timer.phase('lookup'):
+        records = await fetch_license_records(
+            [item['license_key'] for item in items if is_well_formed(item)], db
+        )
+    
+    # Revocation and expiry checks
+    pending = []
+    for index, item in enumerate(items):
+        if not is_well_formed(item):
+            license_key = item.get('license_key') if isinstance(item, dict) else None
+            results[index] = {
+                "license_key": license_key if isinstance(license_key, str) else None,
+                "success": False,
+                "status": "INVALID_REQUEST",
+                "status_code": 400,
+                "message": "Each item needs license_key and hardware_fingerprint strings"
+            }
+            continue
+        
+        license_info = records.get(license_cache_key(item['license_key']))
+        failure = check_license_state(license_info)
+        if failure:
+            finish(index, item, license_info, *failure)
+        else:
+            pending.append((index, item, license_info))
+    
+    # Rate limiting for everything still in play, in one round
+    if pending:
+        requests = [(info['id'], info['daily_verification_limit']) for _, _, info in pending]
+        with timer.phase('rate_limit'):
+            try:
+                if rate_limiter.requires_io:
+                    allowed = await db_workers.run(rate_limiter.allow_many, requests)
+                else:
+                    allowed = rate_limiter.allow_many(requests)
+            except Exception as e:
+                logger.error(f"Batch rate limit check failed: {e}")
+                allowed = [False] * len(pending)
+        
+        for (index, item, license_info), is_allowed in zip(pending, allowed):
+            if not is_allowed:
+                finish(index, item, license_info, "RATE_LIMITED", 429, "Rate limit exceeded")
+                continue
+            
+            with timer.phase('fingerprint'):
+                failure = check_hardware_fingerprint(license_info, item['hardware_fingerprint'])
+            if failure:
+                finish(index, item, license_info, *failure)
+            else:
+                finish(index, item, license_info, "VALID", 200, "License verification successful")
+    
+    # One batch of audit rows for the whole chunk
+    with timer.phase('logging'):
+        await license_log_writer.submit_many_async(log_rows)
+    
+    total_ms = timer.total_ms
+    batch_verify_latency.record(timer, "CHUNK", total_ms)
+    if outcomes and config.VERIFICATION_RECORDING_ENABLED:
+        phase_timings = json.dumps({**timer.rounded(), "chunk_size": len(items)})
+        await license_verification_writer.submit_many_async([
+            verification_row(license_info, log_status, client_ip, fingerprint, detail,
+                             'BATCH', total_ms, phase_timings)
+            for license_info, log_status, fingerprint, detail in outcomes
+        ])
+    return results
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count batch results by status"""
+    summary = {"total": len(results)}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return summary
+
+@app.post("/api/v1/verify-licenses")
+async def verify_licenses(request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Verify many licenses in one request
+    
+    Accepts a JSON array (or {"licenses": [...]}) of license_key/hardware_fingerprint
+    pairs. Large batches, or requests sending Accept: application/x-ndjson, are
+    streamed back as one JSON object per line followed by a summary line.
+    Items are verified in chunks; each chunk's phase timings go to the
+    ``batch_verify_latency`` metrics and to license_verifications (type BATCH).
+    """
     try:
+        data = await request.json()
+        items = data.get('licenses') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected an array of licenses")
+        
+        if len(items) > config.BATCH_VERIFY_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(items)} items (maximum {config.BATCH_VERIFY_MAX_ITEMS})"
+            )
+        
         # Get client IP and user agent
         client_ip = request.client.host
         user_agent = request.headers.get('user-agent', 'Unknown')
+        chunk_size = config.BATCH_VERIFY_CHUNK_SIZE
         
-        # Connect to database
-        db = get_db_connection()
+        stream = (len(items) > config.BATCH_VERIFY_STREAM_THRESHOLD
+                  or 'application/x-ndjson' in request.headers.get('accept', ''))
         
-        try:
-            # Get license information
-            with db.cursor() as cursor:
-                cursor.execute(
-                    """SELECT l.*, u.username, u.name as customer_name, p.name as product_name, p.product_code 
-                       FROM licenses l 
-                       JOIN users u ON l.user_id = u.id 
-                       JOIN products p ON l.product_id = p.id 
-                       WHERE l.license_key = %s""",
-                    (license_key,)
-                )
-                license_info = cursor.fetchone()
-                
-                if not license_info:
-                    raise HTTPException(status_code=404, detail="License not found")
-            
-            # Don't return sensitive information like hardware fingerprint
-            safe_license_info = {
-                "license_key": license_info['license_key'],
-                "customer_name": license_info['customer_name'],
-                "username": license_info['username'],
-                "product_name": license_info['product_name'],
-                "product_code": license_info['product_code'],
-                "valid_till": license_info['valid_till'].isoformat(),
-                "issued_at": license_info['issued_at'].isoformat(),
-                "is_revoked": license_info['is_revoked'],
-                "status": "Active" if not license_info['is_revoked'] and datetime.now() <= license_info['valid_till'] else "Inactive"
-            }
+        if stream:
+            async def stream_results():
+                summary = {"total": 0}
+                for start in range(0, len(items), chunk_size):
+                    try:
+                        chunk_results = await verify_license_chunk(items[start:start + chunk_size], client_ip, user_agent, db)
+                    except Exception as e:
+                        # Headers are already sent; report the failure in-band and stop
+                        logger.error(f"Batch license verification failed: {e}")
+                        yield json.dumps({"error": "License verification failed", "offset": start}) + "\n"
+                        return
+                    for result in chunk_results:
+                        summary["total"] += 1
+                        summary[result['status']] = summary.get(result['status'], 0) + 1
+                        yield json.dumps(result) + "\n"
+                yield json.dumps({"summary": summary}) + "\n"
             
-            return {
+            return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+        
+        results = []
+        for start in range(0, len(items), chunk_size):
+            results.extend(await verify_license_chunk(items[start:start + chunk_size], client_ip, user_agent, db))
+        
+        return {
+            "success": True,
+            "results": results,
+            "summary": summarize_results(results)
+        }
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Batch license verification failed: {e}")
+        raise HTTPException(status_code=500, detail="License verification failed")
+
+@app.get("/api/v1/licenses/{license_key}")
+async def get_license_info(license_key: str, request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Get license information
+    
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
+    """
+    try:
+        # Get license information
+        entry = await fetch_license_entry(license_key, db)
+        
+        if not entry:
+            raise HTTPException(status_code=404, detail="License not found")
+        license_info, row_etag = entry
+        
+        is_active = not license_info['is_revoked'] and datetime.now() <= license_info['valid_till']
+        etag = license_info_etag(row_etag, is_active)
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers=cache_headers)
+        
+        # Don't return sensitive information like hardware fingerprint
+        safe_license_info = {
+            "license_key": license_info['license_key'],
+            "customer_name": license_info['customer_name'],
+            "username": license_info['username'],
+            "product_name": license_info['product_name'],
+            "product_code": license_info['product_code'],
+            "valid_till": license_info['valid_till'].isoformat(),
+            "issued_at": license_info['issued_at'].isoformat(),
+            "is_revoked": license_info['is_revoked'],
+            "status": "Active" if is_active else "Inactive"
+        }
+        
+        return JSONResponse(
+            {
                 "success": True,
                 "license": safe_license_info
-            }
-            
-        finally:
-            db.close()
+            },
+            headers=cache_headers
+        )
             
     except HTTPException:
         raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
     except Exception as e:
         logger.error(f"Get license info failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to get license information")
 
+# Revocation feed: agents cache a valid verdict until valid_till and drop it on a change
+
+def parse_feed_cursor(value: Optional[str]) -> Optional[int]:
+    """Parse a ``since`` cursor or Last-Event-ID"""
+    if value is None or value == '':
+        return None
+    try:
+        cursor = int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor must be an integer version")
+    if cursor < 0:
+        raise HTTPException(status_code=400, detail="Cursor must not be negative")
+    return cursor
+
+@app.get("/api/v1/license-changes")
+async def get_license_changes(since: Optional[str] = None, wait: float = 0, limit: Optional[int] = None):
+    """Long-poll for license changes after the ``since`` version
+    
+    Without ``since`` the current head is returned so a new client starts
+    from now. With ``wait`` > 0 the request is held (up to
+    CHANGE_FEED_MAX_WAIT seconds) until a change arrives.
+    """
+    cursor = parse_feed_cursor(since)
+    limit = min(limit or config.CHANGE_FEED_PAGE_SIZE, config.CHANGE_FEED_PAGE_SIZE)
+    try:
+        changes, next_cursor = await license_change_feed.changes_since(cursor, limit)
+        if not changes and cursor is not None and wait > 0:
+            if await license_change_feed.wait(cursor, min(wait, config.CHANGE_FEED_MAX_WAIT)):
+                changes, next_cursor = await license_change_feed.changes_since(cursor, limit)
+        
+        return {
+            "success": True,
+            "changes": changes,
+            "cursor": next_cursor,
+            "more": next_cursor < license_change_feed.head
+        }
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"License change feed read failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read license changes")
+
+@app.get("/api/v1/license-changes/stream")
+async def stream_license_changes(request: Request, since: Optional[str] = None):
+    """Server-sent events stream of license changes
+    
+    Each change is sent as an ``event: change`` whose id is its version, so
+    reconnecting clients resume from Last-Event-ID. Comments are sent every
+    CHANGE_FEED_HEARTBEAT seconds to keep idle connections open.
+    """
+    cursor = parse_feed_cursor(request.headers.get('last-event-id') or since)
+    if cursor is None:
+        try:
+            cursor = await license_change_feed.current_head()
+        except PoolTimeout as e:
+            logger.error(f"Database pool exhausted: {e}")
+            raise HTTPException(status_code=503, detail="Database busy, please retry")
+        except Exception as e:
+            logger.error(f"License change feed read failed: {e}")
+            raise HTTPException(status_code=500, detail="Failed to read license changes")
+    
+    async def events():
+        nonlocal cursor
+        yield f"retry: 5000\nevent: head\ndata: {json.dumps({'cursor': cursor})}\n\n"
+        while not await request.is_disconnected():
+            try:
+                changes, cursor = await license_change_feed.changes_since(cursor)
+            except Exception as e:
+                # Headers are already sent; the client reconnects with its last event id
+                logger.error(f"License change stream failed: {e}")
+                return
+            for change in changes:
+                yield f"id: {change['version']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+            if not changes and not await license_change_feed.wait(cursor, config.CHANGE_FEED_HEARTBEAT):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Admin Endpoints
+
+async def read_json_body(request: Request) -> Dict[str, Any]:
+    """Parse an optional JSON request body"""
+    body = await request.body()
+    if not body:
+        return {}
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+@app.post("/api/v1/admin/licenses/{license_key}/revoke", dependencies=[Depends(require_admin)])
+async def revoke_license(license_key: str, request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Revoke a license"""
+    try:
+        data = await read_json_body(request)
+        
+        if not await fetch_license_record(license_key, db):
+            raise HTTPException(status_code=404, detail="License not found")
+        
+        await update_license(
+            license_key,
+            "is_revoked = TRUE, revoked_at = %s, revoked_reason = %s",
+            (datetime.now(), data.get('reason', 'Revoked by administrator')),
+            db
+        )
+        logger.info(f"License revoked: {license_key}")
+        
+        return {"success": True, "message": "License revoked", "license_key": license_key}
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"License revocation failed: {e}")
+        raise HTTPException(status_code=500, detail="License revocation failed")
+
+@app.post("/api/v1/admin/licenses/{license_key}/expiry", dependencies=[Depends(require_admin)])
+async def update_license_expiry(license_key: str, request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Change the expiry date of a license"""
+    try:
+        data = await read_json_body(request)
+        if 'valid_till' not in data:
+            raise HTTPException(status_code=400, detail="Missing required field: valid_till")
+        
+        try:
+            valid_till = datetime.fromisoformat(data['valid_till'])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="valid_till must be an ISO date or datetime")
+        
+        if not await fetch_license_record(license_key, db):
+            raise HTTPException(status_code=404, detail="License not found")
+        
+        await update_license(license_key, "valid_till = %s", (valid_till,), db)
+        logger.info(f"License expiry changed: {license_key} -> {valid_till.isoformat()}")
+        
+        return {"success": True, "message": "License expiry updated", "valid_till": valid_till.isoformat()}
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"License expiry update failed: {e}")
+        raise HTTPException(status_code=500, detail="License expiry update failed")
+
+@app.post("/api/v1/admin/licenses/{license_key}/rebind", dependencies=[Depends(require_admin)])
+async def rebind_license(license_key: str, request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Bind a license to a new hardware fingerprint"""
+    try:
+        data = await read_json_body(request)
+        if not data.get('hardware_fingerprint'):
+            raise HTTPException(status_code=400, detail="Missing required field: hardware_fingerprint")
+        
+        license_info = await fetch_license_record(license_key, db)
+        if not license_info:
+            raise HTTPException(status_code=404, detail="License not found")
+        
+        await update_license(license_key, "hardware_fingerprint = %s", (data['hardware_fingerprint'],), db)
+        await index_license_fingerprint(license_info['id'], data['hardware_fingerprint'], db)
+        sharing_detector.reset(license_info['id'])
+        logger.info(f"License rebound to new hardware: {license_key}")
+        
+        return {"success": True, "message": "License hardware fingerprint updated"}
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"License rebind failed: {e}")
+        raise HTTPException(status_code=500, detail="License rebind failed")
+
+@app.get("/api/v1/admin/licenses/{license_key}/shared-hardware", dependencies=[Depends(require_admin)])
+async def get_shared_hardware(license_key: str, db: AsyncDatabase = Depends(get_database)):
+    """Other licenses bound to hardware that shares a component with this one"""
+    try:
+        license_info = await fetch_license_record(license_key, db)
+        if not license_info:
+            raise HTTPException(status_code=404, detail="License not found")
+        
+        rows = await db.fetchall(
+            """SELECT mine.component_type, l.license_key, l.is_revoked, u.username
+               FROM license_fingerprint_components mine
+               JOIN license_fingerprint_components other
+                 ON other.component_type = mine.component_type
+                AND other.component_hash = mine.component_hash
+                AND other.license_id <> mine.license_id
+               JOIN licenses l ON l.id = other.license_id
+               JOIN users u ON u.id = l.user_id
+               WHERE mine.license_id = %s
+               ORDER BY l.license_key, mine.component_type""",
+            (license_info['id'],)
+        )
+        
+        shared = {}
+        for row in rows:
+            entry = shared.setdefault(row['license_key'], {
+                "license_key": row['license_key'],
+                "username": row['username'],
+                "is_revoked": bool(row['is_revoked']),
+                "components": []
+            })
+            entry['components'].append(row['component_type'])
+        
+        return {"success": True, "license_key": license_key, "shared_with": list(shared.values())}
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Shared hardware lookup failed: {e}")
+        raise HTTPException(status_code=500, detail="Shared hardware lookup failed")
+
+@app.get("/api/v1/admin/sharing/flagged", dependencies=[Depends(require_admin)])
+async def get_sharing_flags(limit: int = 100):
+    """Licenses the sharing detector flagged most recently"""
+    return {
+        "success": True,
+        "flagged": sharing_detector.flagged(max(1, min(limit, 1000))),
+        "auto_revoke": config.AUTO_REVOKE_ON_SHARING,
+        "detector": sharing_detector.stats()
+    }
+
+@app.post("/api/v1/admin/fingerprint-index/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_fingerprint_index(request: Request, db: AsyncDatabase = Depends(get_database)):
+    """Re-index one page of licenses after ``after_id``; call again with ``next_after_id`` until done"""
+    try:
+        data = await read_json_body(request)
+        try:
+            after_id = int(data.get('after_id', 0))
+            limit = max(1, min(int(data.get('limit', 1000)), 10000))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="after_id and limit must be integers")
+        
+        licenses = await db.fetchall(
+            "SELECT id, hardware_fingerprint FROM licenses WHERE id > %s ORDER BY id LIMIT %s",
+            (after_id, limit)
+        )
+        if licenses:
+            rows = []
+            for license_row in licenses:
+                rows.extend(fingerprint_component_rows(license_row['id'], license_row['hardware_fingerprint']))
+            await db.run(replace_fingerprint_components, rows, [row['id'] for row in licenses])
+        
+        return {
+            "success": True,
+            "indexed": len(licenses),
+            "next_after_id": licenses[-1]['id'] if licenses else after_id,
+            "done": len(licenses) < limit
+        }
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Fingerprint index rebuild failed: {e}")
+        raise HTTPException(status_code=500, detail="Fingerprint index rebuild failed")
+
+@app.get("/api/v1/admin/stats/daily", dependencies=[Depends(require_admin)])
+async def get_daily_stats(start: str, end: Optional[str] = None, license_key: Optional[str] = None,
+                          product_id: Optional[int] = None, source: Optional[str] = None,
+                          db: AsyncDatabase = Depends(get_database)):
+    """Daily verification counts and p50/p95 response times from the rollup tables
+    
+    Rows are per product, or per license when ``license_key`` is given;
+    ``source`` selects license_logs ("log") or license_verifications
+    ("verification") rows.
+    """
+    try:
+        start_day = datetime.strptime(start, '%Y-%m-%d').date()
+        end_day = datetime.strptime(end, '%Y-%m-%d').date() if end else datetime.now().date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD dates")
+    if end_day < start_day:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end_day - start_day).days >= config.STATS_QUERY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {config.STATS_QUERY_MAX_DAYS} days per query")
+    if source is not None and source not in ('log', 'verification'):
+        raise HTTPException(status_code=400, detail="source must be 'log' or 'verification'")
+    
+    try:
+        license_id = None
+        if license_key:
+            license_info = await fetch_license_record(license_key, db)
+            if not license_info:
+                raise HTTPException(status_code=404, detail="License not found")
+            license_id = license_info['id']
+        
+        rows = await db.run(query_daily_stats, start_day, end_day, license_id, product_id, source)
+        
+        totals = {}
+        for row in rows:
+            totals[row['status']] = totals.get(row['status'], 0) + row['count']
+        
+        return {
+            "success": True,
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "rows": rows,
+            "totals_by_status": totals
+        }
+        
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Daily statistics query failed: {e}")
+        raise HTTPException(status_code=500, detail="Daily statistics query failed")
+
+@app.get("/api/v1/admin/log-partitions", dependencies=[Depends(require_admin)])
+def get_log_partitions():
+    """license_logs partitions and maintenance counters"""
+    try:
+        partitions = log_partitions.partitions()
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Log partition listing failed: {e}")
+        raise HTTPException(status_code=500, detail="Log partition listing failed")
+    
+    return {
+        "success": True,
+        "partitions": [
+            {**p, "less_than": p['less_than'].isoformat() if p['less_than'] else None} for p in partitions
+        ],
+        "maintenance": log_partitions.stats()
+    }
+
+@app.post("/api/v1/admin/log-partitions/maintain", dependencies=[Depends(require_admin)])
+def run_log_partition_maintenance():
+    """Create future partitions and archive expired ones now"""
+    try:
+        result = log_partitions.run_once()
+    except PoolTimeout as e:
+        logger.error(f"Database pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Log partition maintenance failed: {e}")
+        raise HTTPException(status_code=500, detail="Log partition maintenance failed")
+    
+    return {"success": True, **result, "maintenance": log_partitions.stats()}
+
+@app.post("/api/v1/admin/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_license_cache(request: Request):
+    """Invalidate one cached license, or the whole cache when no key is given"""
+    data = await read_json_body(request)
+    license_key = data.get('license_key')
+    
+    if license_key:
+        license_cache.invalidate(license_key)
+    else:
+        license_cache.clear()
+    
+    return {"success": True, "license_cache": license_cache.stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,68 @@
+"""
+Asyncio data-access layer over the pooled pymysql connections
+"""
+
+from typing import Dict, Any, Callable, List, Optional
+
+from api.utils.db_pool import ConnectionPool
+from api.utils.workers import WorkerPool
+
+
+class AsyncDatabase:
+    """Awaitable query helpers backed by a dedicated, bounded executor
+
+    Each call checks a connection out of the pool inside a worker thread,
+    so the event loop only ever awaits. The executor is sized to the pool
+    so queued queries wait for a thread rather than for a connection.
+    """
+
+    def __init__(self, pool: ConnectionPool, workers: WorkerPool):
+        """Initialize with a connection pool and the worker pool that drives it"""
+        self.pool = pool
+        self.workers = workers
+
+    def _with_connection(self, func: Callable, args, kwargs):
+        """Run ``func(connection, ...)`` on a pooled connection"""
+        with self.pool.connection() as connection:
+            return func(connection, *args, **kwargs)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking ``func(connection, *args)`` unit of work"""
+        return await self.workers.run(self._with_connection, func, args, kwargs)
+
+    async def fetchone(self, sql: str, params: tuple = None) -> Optional[Dict[str, Any]]:
+        """Execute a query and return the first row"""
+        return await self.run(_fetchone, sql, params)
+
+    async def fetchall(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """Execute a query and return all rows"""
+        return await self.run(_fetchall, sql, params)
+
+    async def execute(self, sql: str, params: tuple = None) -> int:
+        """Execute a statement, commit, and return the affected row count"""
+        rowcount, _ = await self.run(_execute, sql, params)
+        return rowcount
+
+    async def insert(self, sql: str, params: tuple = None) -> int:
+        """Execute an INSERT, commit, and return the new row id"""
+        _, lastrowid = await self.run(_execute, sql, params)
+        return lastrowid
+
+
+def _fetchone(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def _fetchall(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _execute(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        connection.commit()
+        return cursor.rowcount, cursor.lastrowid
@@ -0,0 +1,441 @@
+"""
+Background batched INSERT writer for append-only audit tables
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+from datetime import datetime, date
+from typing import Dict, Any, List, Sequence
+
+from api.utils.db_pool import ConnectionPool, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop', 'spill')
+
+_STOP = object()
+
+
+def process_spill_path(path: str, pid: int = None) -> str:
+    """Spill file of one process: ``license_logs.spill.jsonl`` -> ``license_logs.spill.<pid>.jsonl``"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this id exists; unknown counts as alive"""
+    if pid == os.getpid():
+        return True
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+# How often a coroutine waiting under the block policy retries the full queue
+ASYNC_BLOCK_POLL_INTERVAL = 0.005
+
+
+class BatchWriter:
+    """Buffer rows in a bounded queue and write them with multi-row INSERTs
+
+    A single daemon thread drains the queue and flushes whenever
+    ``batch_size`` rows are pending or the oldest pending row is
+    ``flush_interval`` seconds old. When the queue is full the
+    ``overflow_policy`` decides what happens to new rows:
+
+    - ``block``: wait up to ``block_timeout`` seconds for room, then drop.
+      ``submit`` waits in the calling thread; coroutines must use
+      ``submit_async`` so the wait never stalls the event loop
+    - ``drop``:  discard the row and count it
+    - ``spill``: append the row as JSON to ``spill_path``
+
+    Whatever the policy, rows that cannot be written because the database
+    is unreachable also go to ``spill_path`` when one is set, and every
+    spilled row is replayed the next time the writer starts.
+
+    Each process spills to its own file (the pid is added to ``spill_path``)
+    because several server workers share one working directory. On start a
+    writer replays its own leftovers and claims, by an atomic rename, the
+    files of processes that no longer exist.
+    """
+
+    def __init__(self,
+                 pool: ConnectionPool,
+                 table: str,
+                 columns: Sequence[str],
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 queue_size: int = 10000,
+                 overflow_policy: str = 'spill',
+                 spill_path: str = None,
+                 block_timeout: float = 0.1):
+        """Initialize writer for ``table``"""
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if overflow_policy == 'spill' and not spill_path:
+            raise ValueError("spill_path is required for the spill overflow policy")
+
+        self.pool = pool
+        self.table = table
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_base = spill_path
+        self.block_timeout = block_timeout
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._insert_sql = (
+            f"INSERT INTO {table} ({', '.join(self.columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(self.columns))})"
+        )
+
+        # Statistics
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._failed = 0
+        self._corrupt = 0
+        self._last_flush_ms = 0.0
+
+    @property
+    def spill_path(self):
+        """This process's spill file; resolved on use so forked workers each get their own"""
+        return process_spill_path(self.spill_base) if self.spill_base else None
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.spill_path:
+            try:
+                self.replay_spill()
+            except Exception as e:
+                # Spilled rows stay on disk for the next start; never keep the server down
+                logger.error(f"Replaying spilled {self.table} rows failed: {e}")
+        self._thread = threading.Thread(target=self._run, name=f"{self.table}-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still queued and stop the thread"""
+        if self._thread is None:
+            return
+        # Always wait for room: the sentinel must not be dropped
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"{self.table} writer did not drain within {timeout}s")
+        self._thread = None
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Queue one row; returns False if it was dropped"""
+        values = tuple(row.get(column) for column in self.columns)
+        return self._enqueue(values)
+
+    def submit_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Queue many rows; returns the number accepted"""
+        return sum(1 for row in rows if self.submit(row))
+
+    async def submit_async(self, row: Dict[str, Any]) -> bool:
+        """Queue one row from a coroutine; returns False if it was dropped"""
+        return await self.submit_many_async([row]) == 1
+
+    async def submit_many_async(self, rows: List[Dict[str, Any]]) -> int:
+        """Queue many rows from a coroutine; returns the number accepted
+
+        Under the block policy the whole call waits at most ``block_timeout``
+        seconds, yielding to the event loop while the queue is full.
+        """
+        if self.overflow_policy != 'block':
+            return self.submit_many(rows)
+
+        accepted = 0
+        deadline = time.monotonic() + self.block_timeout
+        for row in rows:
+            values = tuple(row.get(column) for column in self.columns)
+            while True:
+                try:
+                    self._queue.put_nowait(values)
+                except queue.Full:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        await asyncio.sleep(min(ASYNC_BLOCK_POLL_INTERVAL, remaining))
+                        continue
+                    self._count('_dropped')
+                else:
+                    self._count('_enqueued')
+                    accepted += 1
+                break
+        return accepted
+
+    def _enqueue(self, values: tuple) -> bool:
+        try:
+            if self.overflow_policy == 'block':
+                self._queue.put(values, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(values)
+        except queue.Full:
+            if self.overflow_policy == 'spill':
+                return self._spill([values])
+            self._count('_dropped')
+            return False
+
+        self._count('_enqueued')
+        return True
+
+    def _count(self, field: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def _run(self):
+        """Drain the queue in batches until the stop sentinel arrives"""
+        batch = []
+        deadline = None
+
+        while True:
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = None
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                # Take whatever else is queued, then flush and exit
+                while True:
+                    try:
+                        pending = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pending is not _STOP:
+                        batch.append(pending)
+                self._flush(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+    def _flush(self, batch: List[tuple]):
+        """Write one batch, isolating bad rows if the multi-row insert fails"""
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            self._write(batch)
+            self._count('_written', len(batch))
+        except Exception as e:
+            logger.warning(f"Batch insert into {self.table} failed ({e}); retrying row by row")
+            self._flush_rows(batch)
+        finally:
+            self._count('_batches')
+            self._last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def _flush_rows(self, batch: List[tuple]):
+        """Fallback path: insert rows individually"""
+        for index, values in enumerate(batch):
+            try:
+                self._write([values])
+                self._count('_written')
+            except Exception as e:
+                if _is_unreachable(e):
+                    # Database is down; keep the remainder instead of failing each row
+                    remainder = batch[index:]
+                    if self.spill_path:
+                        self._spill(remainder)
+                    else:
+                        self._count('_dropped', len(remainder))
+                        logger.error(f"Dropped {len(remainder)} {self.table} rows: {e}")
+                    return
+                self._count('_failed')
+                logger.error(f"Failed to write {self.table} row: {e}")
+
+    def _write(self, rows: List[tuple]):
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                # pymysql rewrites INSERT ... VALUES executemany into one multi-row statement
+                cursor.executemany(self._insert_sql, rows)
+            connection.commit()
+
+    def _spill(self, rows: List[tuple]) -> bool:
+        """Append rows to the spill file"""
+        try:
+            with self._spill_lock:
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    for values in rows:
+                        f.write(json.dumps([_to_json(value) for value in values]) + '\n')
+            self._count('_spilled', len(rows))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to spill {len(rows)} {self.table} rows: {e}")
+            self._count('_dropped', len(rows))
+            return False
+
+    def replay_spill(self) -> int:
+        """Insert rows left in spill files by earlier runs
+
+        Replay files left by a start that died mid-replay are picked up
+        too. Malformed lines (a torn last line after a crash) are skipped
+        and counted as ``corrupt``.
+        """
+        if not self.spill_base:
+            return 0
+        return sum(self._replay_file(path) for path in self._claim_spill_files())
+
+    def _claim_spill_files(self) -> List[str]:
+        """Rename this process's spill file and those of dead processes to replay files of its own"""
+        root, ext = os.path.splitext(self.spill_base)
+        directory = os.path.dirname(root) or '.'
+        # <root>[.<pid>]<ext>[.replay[-<n>]]; no pid is a file from before per-process spilling
+        pattern = re.compile(rf"{re.escape(os.path.basename(root))}(?:\.(\d+))?{re.escape(ext)}(\.replay(?:-\d+)?)?")
+        own = self.spill_path
+        claimed = []
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return claimed
+
+        for name in names:
+            match = pattern.fullmatch(name)
+            if not match:
+                continue
+            pid = int(match.group(1)) if match.group(1) else None
+            if pid is not None and pid != os.getpid() and _pid_alive(pid):
+                continue
+            path = os.path.join(directory, name)
+            if pid == os.getpid() and match.group(2):
+                claimed.append(path)
+                continue
+
+            index = 0
+            while os.path.exists(f"{own}.replay-{index}"):
+                index += 1
+            target = f"{own}.replay-{index}"
+            try:
+                with self._spill_lock:
+                    os.replace(path, target)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            claimed.append(target)
+        return claimed
+
+    def _replay_file(self, replay_path: str) -> int:
+        """Insert the rows of one claimed spill file, then remove it"""
+        replayed = 0
+        rows = []
+        unreplayed = []
+        with open(replay_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                values = self._parse_spilled(line)
+                if values is None:
+                    continue
+                if unreplayed:
+                    # Database failed earlier; keep the rest for the next start
+                    unreplayed.append(values)
+                    continue
+                rows.append(values)
+                if len(rows) >= self.batch_size:
+                    replayed += self._replay_batch(rows, unreplayed)
+                    rows = []
+        if rows and not unreplayed:
+            replayed += self._replay_batch(rows, unreplayed)
+        elif rows:
+            unreplayed.extend(rows)
+
+        if unreplayed:
+            self._spill(unreplayed)
+        os.remove(replay_path)
+        if unreplayed:
+            logger.error(f"Could not replay {len(unreplayed)} spilled {self.table} rows; kept for next start")
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled {self.table} rows")
+        return replayed
+
+    def _parse_spilled(self, line: str):
+        """Row values of one spill file line, or None for a blank or malformed line"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            values = json.loads(line)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            self._count('_corrupt')
+            logger.warning(f"Skipped a malformed line in the {self.table} spill file")
+            return None
+        return tuple(values)
+
+    def _replay_batch(self, rows: List[tuple], unreplayed: List[tuple]) -> int:
+        """Write a replayed batch, collecting it in ``unreplayed`` on failure"""
+        try:
+            self._write(rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to replay spilled {self.table} rows: {e}")
+            unreplayed.extend(rows)
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and write counters"""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "overflow_policy": self.overflow_policy,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "dropped": self._dropped,
+                "spilled": self._spilled,
+                "failed": self._failed,
+                "corrupt": self._corrupt,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+            }
+
+
+def _to_json(value):
+    """Make a column value JSON serialisable for the spill file"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _is_unreachable(error: Exception) -> bool:
+    """Check if an error means the database could not be reached at all"""
+    if isinstance(error, PoolTimeout):
+        return True
+    try:
+        import pymysql
+    except ImportError:
+        return False
+    # 2003/2006/2013: can't connect, server gone away, lost connection
+    return (isinstance(error, pymysql.err.OperationalError)
+            and bool(error.args) and error.args[0] in (2003, 2006, 2013))
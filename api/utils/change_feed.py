@@ -0,0 +1,226 @@
+"""
+Revocation/expiry change feed over the license_changes sequence
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from api.utils.async_db import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+CHANGE_COLUMNS = "seq, license_key, is_revoked, valid_till, rebound, changed_at"
+
+
+def license_key_id(license_key: str) -> str:
+    """Public identifier of a license in the feed (the key itself is a secret)"""
+    return hashlib.sha256(license_key.encode('utf-8')).hexdigest()
+
+
+def _to_change(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Feed entry for a license_changes row"""
+    return {
+        "version": row['seq'],
+        "license_key_id": license_key_id(row['license_key']),
+        "is_revoked": bool(row['is_revoked']),
+        "valid_till": row['valid_till'].isoformat() if isinstance(row['valid_till'], datetime) else row['valid_till'],
+        "rebound": bool(row['rebound']),
+        "changed_at": row['changed_at'].isoformat() if isinstance(row['changed_at'], datetime) else row['changed_at'],
+    }
+
+
+class ChangeFeed:
+    """Tail ``license_changes`` once per server and fan changes out to clients
+
+    ``license_changes`` is filled by triggers on ``licenses`` whenever a
+    license's revocation, expiry or hardware binding changes, and its
+    ``seq`` serves as the version. Concurrent writers can commit sequence
+    numbers out of order, so the poller stops at a gap and only skips it
+    once it has stayed open for ``gap_timeout`` seconds (a rolled-back
+    write never fills it). One poll task reads new rows every
+    ``poll_interval`` seconds, keeps the newest ``buffer_size`` changes in
+    memory and wakes every waiting long-poll or stream; clients with an
+    older cursor are answered from the table. ``on_change`` is called with each changed license key, which
+    keeps other workers' license caches coherent with admin writes.
+    """
+
+    def __init__(self,
+                 db: AsyncDatabase,
+                 poll_interval: float = 1.0,
+                 buffer_size: int = 10000,
+                 page_size: int = 1000,
+                 gap_timeout: float = 5.0,
+                 on_change: Callable[[str], None] = None):
+        """Initialize feed; polling starts with ``start``"""
+        self.db = db
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.gap_timeout = gap_timeout
+        self.on_change = on_change
+
+        self._buffer = deque(maxlen=buffer_size)  # feed entries ordered by version
+        self._head = None   # highest version read from the table
+        self._floor = None  # the buffer holds every change in (floor, head]
+        self._changed = asyncio.Event()
+        self._task = None
+        self._gap_since = None  # when the oldest unfilled sequence gap was first seen
+
+        # Statistics
+        self._polls = 0
+        self._poll_errors = 0
+        self._changes = 0
+        self._table_reads = 0
+        self._skipped_gaps = 0
+
+    @property
+    def head(self) -> int:
+        """Latest version known to this server"""
+        return self._head or 0
+
+    def start(self):
+        """Start polling on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                full_page = await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._poll_errors += 1
+                logger.warning(f"License change feed poll failed: {e}")
+                full_page = False
+            # Catch up without sleeping after a burst of changes
+            if not full_page:
+                await asyncio.sleep(self.poll_interval)
+
+    async def current_head(self) -> int:
+        """Latest version, read from the table if the poll task has not started yet"""
+        if self._head is None:
+            await self.load_head()
+        return self.head
+
+    async def load_head(self):
+        """Start at the newest change in the table"""
+        row = await self.db.fetchone("SELECT COALESCE(MAX(seq), 0) AS head FROM license_changes")
+        if self._head is None:
+            self._head = self._floor = row['head']
+
+    async def poll(self) -> bool:
+        """Read new changes once; returns whether a full page was read"""
+        self._polls += 1
+        if self._head is None:
+            await self.load_head()
+            return False
+
+        rows = await self.db.fetchall(
+            f"SELECT {CHANGE_COLUMNS} FROM license_changes WHERE seq > %s ORDER BY seq LIMIT %s",
+            (self._head, self.page_size)
+        )
+        rows = self._contiguous(rows)
+        if not rows:
+            return False
+
+        for row in rows:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._floor = self._buffer[0]['version']
+            self._buffer.append(_to_change(row))
+            if self.on_change is not None:
+                self.on_change(row['license_key'])
+        self._head = rows[-1]['seq']
+        self._changes += len(rows)
+
+        # Wake everyone waiting on the old event; later waiters get a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return len(rows) == self.page_size
+
+    def _contiguous(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows up to the first sequence gap, or all of them once the gap is old"""
+        expected = self._head + 1
+        for index, row in enumerate(rows):
+            if row['seq'] != expected:
+                break
+            expected += 1
+        else:
+            self._gap_since = None
+            return rows
+
+        now = time.monotonic()
+        if index == 0 and self._gap_since is not None and now - self._gap_since >= self.gap_timeout:
+            self._gap_since = None
+            self._skipped_gaps += 1
+            return rows
+        if index == 0 and self._gap_since is None:
+            self._gap_since = now
+        return rows[:index]
+
+    async def changes_since(self, cursor: Optional[int], limit: int = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Changes after ``cursor`` (oldest first) and the cursor to send next time
+
+        A missing cursor starts at the current head. A cursor ahead of the
+        head (the table was rebuilt) is reset to it. The head is read from
+        the table first if the poll task has not done so yet, so clients
+        reconnecting right after a restart keep their place.
+        """
+        head = await self.current_head()
+        limit = limit or self.page_size
+        if cursor is None or cursor >= head:
+            return [], head
+
+        if self._floor is not None and cursor >= self._floor:
+            changes = []
+            for change in reversed(self._buffer):
+                if change['version'] <= cursor:
+                    break
+                changes.append(change)
+            changes.reverse()
+            changes = changes[:limit]
+        else:
+            self._table_reads += 1
+            rows = await self.db.fetchall(
+                f"SELECT {CHANGE_COLUMNS} FROM license_changes WHERE seq > %s AND seq <= %s "
+                "ORDER BY seq LIMIT %s",
+                (cursor, head, limit)
+            )
+            changes = [_to_change(row) for row in rows]
+
+        return changes, changes[-1]['version'] if changes else head
+
+    async def wait(self, cursor: Optional[int], timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a change after ``cursor``"""
+        if cursor is not None and cursor < self.head:
+            return True
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get feed position and counters"""
+        return {
+            "head": self.head,
+            "buffered": len(self._buffer),
+            "buffer_floor": self._floor,
+            "polls": self._polls,
+            "poll_errors": self._poll_errors,
+            "changes": self._changes,
+            "table_reads": self._table_reads,
+            "skipped_gaps": self._skipped_gaps,
+            "running": self._task is not None and not self._task.done(),
+        }
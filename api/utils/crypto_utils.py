@@ -7,10 +7,52 @@ import hashlib
 import base64
 from datetime import datetime
 from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519, padding, utils
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidSignature
 
+# RSA-PSS parameters are immutable, so build them once
+PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+PREHASHED_SHA256 = utils.Prehashed(hashes.SHA256())
+
+# Values of the license ``signature_algorithm`` field
+SIGNATURE_RSA_PSS = 'RSA-PSS-SHA256'
+SIGNATURE_ED25519 = 'Ed25519'
+SIGNATURE_ALGORITHMS = (SIGNATURE_RSA_PSS, SIGNATURE_ED25519)
+
+# Licenses issued before the field existed are RSA-PSS
+DEFAULT_SIGNATURE_ALGORITHM = SIGNATURE_RSA_PSS
+
+def key_algorithm(key):
+    """Get the signature algorithm a private or public key is used with"""
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return SIGNATURE_RSA_PSS
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return SIGNATURE_ED25519
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+def license_algorithm(license_data):
+    """Get the signature algorithm declared by a license"""
+    return license_data.get('signature_algorithm') or DEFAULT_SIGNATURE_ALGORITHM
+
+def canonical_payload(license_data):
+    """Serialize license data (without signature) to the bytes that get signed"""
+    data = {key: value for key, value in license_data.items() if key != 'signature'}
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def payload_digest(payload):
+    """Digest handed to RSA-PSS as a prehashed message
+    
+    Licenses have always been signed as sign(SHA256(payload)) with SHA-256
+    as the PSS hash, i.e. over SHA256(SHA256(payload)). The payload is hashed
+    once here and the outer hash is over 32 bytes, which keeps every
+    existing signature valid.
+    """
+    return hashlib.sha256(hashlib.sha256(payload).digest()).digest()
+
 class LicenseCrypto:
     """License cryptography utilities"""
     
@@ -20,6 +62,8 @@ class LicenseCrypto:
         self.public_key_path = public_key_path
         self._private_key = None
         self._public_key = None
+        # Public keys by algorithm, so RSA and Ed25519 licenses verify side by side
+        self._public_keys = {}
     
     def load_private_key(self, key_path=None):
         """Load private key from PEM file"""
@@ -33,6 +77,7 @@ class LicenseCrypto:
                     password=None,
                     backend=default_backend()
                 )
+            key_algorithm(private_key)
             self._private_key = private_key
             return private_key
         except Exception as e:
@@ -49,72 +94,77 @@ class LicenseCrypto:
                     key_file.read(),
                     backend=default_backend()
                 )
+            self._public_keys[key_algorithm(public_key)] = public_key
             self._public_key = public_key
             return public_key
         except Exception as e:
             raise Exception(f"Failed to load public key: {e}")
     
-    def sign_license(self, license_data):
-        """Sign license data with private key"""
+    @property
+    def signature_algorithm(self):
+        """Algorithm of the loaded private key"""
+        if self._private_key is None:
+            self.load_private_key()
+        return key_algorithm(self._private_key)
+    
+    def sign_payload(self, payload):
+        """Sign canonical license bytes with private key"""
         if self._private_key is None:
             self.load_private_key()
         
-        # Create a copy of license data without signature
-        data_to_sign = license_data.copy()
-        if 'signature' in data_to_sign:
-            del data_to_sign['signature']
-        
-        # Convert to JSON string and encode
-        json_string = json.dumps(data_to_sign, sort_keys=True, separators=(',', ':'))
-        data_bytes = json_string.encode('utf-8')
-        
-        # Create hash of the data
-        data_hash = hashlib.sha256(data_bytes).digest()
-        
-        # Sign the hash
-        signature = self._private_key.sign(
-            data_hash,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        if isinstance(self._private_key, ed25519.Ed25519PrivateKey):
+            # Ed25519 hashes internally and is deterministic
+            signature = self._private_key.sign(payload)
+        else:
+            # Sign the precomputed digest; Prehashed stops the library hashing it again
+            signature = self._private_key.sign(payload_digest(payload), PSS_PADDING, PREHASHED_SHA256)
         
         # Return base64 encoded signature
         return base64.b64encode(signature).decode('utf-8')
     
+    def sign_license(self, license_data):
+        """Sign license data with private key
+        
+        A ``signature_algorithm`` field in ``license_data`` is covered by the
+        signature, so it must match the private key.
+        """
+        algorithm = license_data.get('signature_algorithm')
+        if algorithm is not None and algorithm != self.signature_algorithm:
+            raise ValueError(f"License declares {algorithm} but the private key is {self.signature_algorithm}")
+        return self.sign_payload(canonical_payload(license_data))
+    
+    def sign_many(self, licenses):
+        """Sign a list of licenses, loading the key only once"""
+        return [self.sign_license(license_data) for license_data in licenses]
+    
     def verify_signature(self, license_data, signature):
-        """Verify license signature with public key"""
-        if self._public_key is None:
+        """Verify license signature with the public key for its algorithm"""
+        if not self._public_keys:
             self.load_public_key()
         
+        algorithm = license_algorithm(license_data)
+        if algorithm not in SIGNATURE_ALGORITHMS:
+            raise Exception(f"Signature verification failed: unsupported algorithm {algorithm}")
+        
+        public_key = self._public_keys.get(algorithm)
+        if public_key is None:
+            raise Exception(f"Signature verification failed: no {algorithm} public key loaded")
+        
         try:
-            # Create a copy of license data without signature
-            data_to_verify = license_data.copy()
-            if 'signature' in data_to_verify:
-                del data_to_verify['signature']
-            
-            # Convert to JSON string and encode
-            json_string = json.dumps(data_to_verify, sort_keys=True, separators=(',', ':'))
-            data_bytes = json_string.encode('utf-8')
-            
-            # Create hash of the data
-            data_hash = hashlib.sha256(data_bytes).digest()
-            
             # Decode signature
             signature_bytes = base64.b64decode(signature.encode('utf-8'))
+            payload = canonical_payload(license_data)
             
             # Verify signature
-            self._public_key.verify(
-                signature_bytes,
-                data_hash,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            if algorithm == SIGNATURE_ED25519:
+                public_key.verify(signature_bytes, payload)
+            else:
+                public_key.verify(
+                    signature_bytes,
+                    payload_digest(payload),
+                    PSS_PADDING,
+                    PREHASHED_SHA256
+                )
             
             return True
             
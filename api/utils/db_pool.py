@@ -0,0 +1,266 @@
+"""
+Bounded database connection pool for the license API server
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be acquired within the timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable database connections
+
+    Connections are created lazily up to ``max_size`` and handed out in
+    LIFO order so the hottest connections stay warm. Idle connections older
+    than ``idle_timeout`` (or alive longer than ``max_lifetime``) are
+    recycled, and a connection that sat idle for more than ``ping_interval``
+    seconds is pinged before it is returned to a caller.
+    """
+
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 acquire_timeout: float = 5.0,
+                 idle_timeout: float = 300.0,
+                 max_lifetime: float = 3600.0,
+                 ping_interval: float = 5.0):
+        """Initialize pool with a connection factory"""
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        # Idle entries are (connection, created_at, last_used_at)
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        # Statistics
+        self._acquired = 0
+        self._timeouts = 0
+        self._waiting = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._created = 0
+        self._recycled = 0
+        self._broken = 0
+
+    def _create(self):
+        """Open a new connection (called without the lock held)"""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+            self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn, broken: bool = False):
+        """Close a connection and free its slot"""
+        with self._cond:
+            if broken:
+                self._broken += 1
+            self._created_at.pop(id(conn), None)
+            self._size -= 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_stale(self, created_at: float, last_used: float, now: float) -> bool:
+        """Check whether an idle connection should be recycled"""
+        if self.idle_timeout and now - last_used > self.idle_timeout:
+            return True
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        return False
+
+    def warm_up(self):
+        """Open connections until the pool holds ``min_size`` of them"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._create()
+            self.release(conn)
+
+    def acquire(self, timeout: float = None):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            conn = None
+            stale = []
+            needs_ping = False
+
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                while True:
+                    now = time.monotonic()
+
+                    # Reuse the most recently returned idle connection
+                    while self._idle:
+                        candidate, created_at, last_used = self._idle.pop()
+                        if self._is_stale(created_at, last_used, now):
+                            stale.append(candidate)
+                            continue
+                        conn = candidate
+                        needs_ping = now - last_used > self.ping_interval
+                        break
+
+                    if conn is not None or stale:
+                        break
+
+                    # Grow the pool if we are below the limit
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {timeout:.1f}s waiting for a database connection"
+                        )
+
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if stale:
+                with self._cond:
+                    self._recycled += len(stale)
+            for candidate in stale:
+                self._discard(candidate)
+
+            if conn is None:
+                if stale:
+                    # Freed slots may let us (or a waiter) open a fresh one
+                    continue
+                conn = self._create()
+            elif needs_ping:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception as e:
+                    logger.warning(f"Discarding dead pooled connection: {e}")
+                    self._discard(conn, broken=True)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._acquired += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool"""
+        if not discard and _in_transaction(conn):
+            try:
+                # End any transaction left open so the next user gets a fresh snapshot
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            closed = self._closed
+
+        if discard or closed:
+            self._discard(conn, broken=discard)
+            return
+
+        with self._cond:
+            created_at = self._created_at.get(id(conn), time.monotonic())
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Context manager that checks a connection out and back in"""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            # Connection-level failures leave the socket in an unknown state
+            discard = _is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Close all idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool occupancy and wait-time statistics"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "acquired_total": self._acquired,
+                "timeouts_total": self._timeouts,
+                "created_total": self._created,
+                "recycled_total": self._recycled,
+                "broken_total": self._broken,
+                "wait_avg_ms": round(self._wait_total * 1000 / self._acquired, 3) if self._acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+def _in_transaction(conn) -> bool:
+    """Check the server status flags for an open transaction"""
+    # SERVER_STATUS_IN_TRANS; assume the worst for drivers that don't track it
+    return bool(getattr(conn, 'server_status', 1) & 1)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Check if an exception means the underlying connection is unusable"""
+    try:
+        import pymysql
+        return isinstance(error, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+    except ImportError:
+        return False
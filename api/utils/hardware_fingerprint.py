@@ -7,8 +7,84 @@ import subprocess
 import hashlib
 import uuid
 import re
+from functools import lru_cache
 from typing import Dict, List, Optional
 
+# How much each component counts towards a match. The board-level
+# identifiers survive NIC and disk swaps; a MAC is the first thing to change.
+COMPONENT_WEIGHTS = {
+    'UUID': 0.35,
+    'BIOS': 0.25,
+    'DISK': 0.20,
+    'CPU': 0.10,
+    'MAC': 0.10,
+}
+
+# Components that tell one machine from another. CPU only corroborates them:
+# Linux reports a bare processor index and other platforms a model-level id,
+# both shared by every machine with the same CPU.
+DISCRIMINATING_COMPONENTS = frozenset(('UUID', 'BIOS', 'DISK', 'MAC'))
+
+def normalize_component(kind: str, value: str) -> str:
+    """Canonical form of one component value, so formatting noise never mismatches"""
+    value = value.strip()
+    if kind == 'MAC':
+        return re.sub(r'[^0-9a-f]', '', value.lower())
+    if kind == 'UUID':
+        return value.lower().strip('{}')
+    return ' '.join(value.split()).upper()
+
+def parse_fingerprint(fingerprint: str) -> Dict[str, str]:
+    """Split ``KIND:value|KIND:value`` into normalized components"""
+    components = {}
+    for part in (fingerprint or '').split('|'):
+        kind, sep, value = part.partition(':')
+        kind = kind.strip().upper()
+        if sep and kind and value.strip():
+            components.setdefault(kind, normalize_component(kind, value))
+    return components
+
+@lru_cache(maxsize=65536)
+def component_hashes(fingerprint: str) -> Dict[str, str]:
+    """SHA-256 of each normalized component, keyed by component kind
+
+    Cached because the bound fingerprint of a hot license is hashed on
+    every verification; callers must not mutate the result.
+    """
+    return {
+        kind: hashlib.sha256(f"{kind}:{value}".encode('utf-8')).hexdigest()
+        for kind, value in parse_fingerprint(fingerprint).items()
+    }
+
+@lru_cache(maxsize=65536)
+def component_weights(fingerprint: str) -> Dict[str, float]:
+    """Match weight of each component present; a bare CPU processor index weighs nothing"""
+    return {
+        kind: 0.0 if kind == 'CPU' and value.isdigit() else COMPONENT_WEIGHTS.get(kind, 0.0)
+        for kind, value in parse_fingerprint(fingerprint).items()
+    }
+
+def match_score(stored_fingerprint: str, current_fingerprint: str) -> float:
+    """Weighted share of the stored components the current fingerprint still has
+
+    Components the stored fingerprint lacks do not count either way, and
+    nothing scores unless at least one ``DISCRIMINATING_COMPONENTS`` entry
+    matches. Fingerprints without a discriminating component (e.g.
+    ``FALLBACK:...`` or only ``CPU:0``) score 1.0 only on an exact match.
+    """
+    if stored_fingerprint == current_fingerprint:
+        return 1.0
+    stored = component_hashes(stored_fingerprint)
+    current = component_hashes(current_fingerprint)
+    weights = component_weights(stored_fingerprint)
+    total = sum(weights.values())
+    if total <= 0 or DISCRIMINATING_COMPONENTS.isdisjoint(stored):
+        return 1.0 if stored and stored == current else 0.0
+    matched = [kind for kind, digest in stored.items() if current.get(kind) == digest]
+    if DISCRIMINATING_COMPONENTS.isdisjoint(matched):
+        return 0.0
+    return sum(weights[kind] for kind in matched) / total
+
 class HardwareFingerprint:
     """Hardware fingerprinting for license protection"""
     
@@ -260,12 +336,16 @@ class HardwareFingerprint:
             'full_fingerprint': self.generate_fingerprint()
         }
     
-    def validate_fingerprint(self, stored_fingerprint: str, current_fingerprint: str) -> bool:
-        """Validate if current fingerprint matches stored fingerprint"""
-        # For now, do exact match
-        # In production, you might want to implement fuzzy matching
-        # or allow some components to change (like MAC addresses)
-        return stored_fingerprint == current_fingerprint
+    def validate_fingerprint(self, stored_fingerprint: str, current_fingerprint: str,
+                             threshold: float = 0.6) -> bool:
+        """Validate if current fingerprint matches stored fingerprint
+
+        Individual components may change (a new NIC or disk) as long as the
+        weighted share of unchanged components reaches ``threshold``.
+        """
+        if not stored_fingerprint or not current_fingerprint:
+            return False
+        return match_score(stored_fingerprint, current_fingerprint) >= threshold
 
 # Global instance
 hardware_fingerprint = HardwareFingerprint() 
\ No newline at end of file
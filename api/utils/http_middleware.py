@@ -0,0 +1,180 @@
+"""
+ASGI middleware for gzip request/response bodies and Server-Timing
+"""
+
+import time
+import zlib
+import logging
+from typing import Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class CompressionMiddleware:
+    """Accept gzip-encoded request bodies and gzip responses for clients that ask
+
+    Compressed requests are inflated up front, capped at
+    ``max_request_size`` bytes so a small gzip bomb cannot exhaust memory.
+    Streamed responses (NDJSON batch results) are flushed chunk by chunk so
+    clients still see results as they are produced; media types in
+    ``excluded_media_types`` (server-sent events) are never compressed.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 6,
+                 max_request_size: int = 8 * 1024 * 1024,
+                 excluded_media_types: Iterable[str] = ('text/event-stream',)):
+        """Wrap an ASGI app"""
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.max_request_size = max_request_size
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if headers.get('content-encoding', '').strip().lower() == 'gzip':
+            body, error = await self._inflate_request(receive)
+            if error is not None:
+                await error(scope, receive, send)
+                return
+            scope = dict(scope)
+            request_headers = MutableHeaders(scope=scope)
+            del request_headers['content-encoding']
+            request_headers['content-length'] = str(len(body))
+            receive = self._replay(body, receive)
+
+        if self.minimum_size > 0 and 'gzip' in headers.get('accept-encoding', ''):
+            send = self._compressing_send(send)
+
+        await self.app(scope, receive, send)
+
+    async def _inflate_request(self, receive):
+        """Read and decompress the whole request body; (body, None) or (None, error response)"""
+        inflater = zlib.decompressobj(GZIP_WBITS)
+        chunks = []
+        size = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return None, JSONResponse({'detail': 'Client disconnected'}, status_code=400)
+                more_body = message.get('more_body', False)
+                data = inflater.decompress(message.get('body', b''), self.max_request_size - size + 1)
+                size += len(data)
+                if size > self.max_request_size or inflater.unconsumed_tail:
+                    return None, JSONResponse({'detail': 'Request body too large'}, status_code=413)
+                chunks.append(data)
+            data = inflater.flush()
+            size += len(data)
+            if size > self.max_request_size:
+                return None, JSONResponse({'detail': 'Request body too large'}, status_code=413)
+            chunks.append(data)
+        except zlib.error as e:
+            logger.warning(f"Rejected malformed gzip request body: {e}")
+            return None, JSONResponse({'detail': 'Invalid gzip request body'}, status_code=400)
+        return b''.join(chunks), None
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        sent = False
+
+        async def replay_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # The original body is consumed, so this waits for the client to disconnect
+            return await receive()
+
+        return replay_receive
+
+    def _compressing_send(self, send):
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def gzip_send(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if compressor is None:
+                response_headers = Headers(raw=start_message.get('headers', []))
+                media_type = response_headers.get('content-type', '')
+                if ('content-encoding' in response_headers
+                        or media_type.startswith(self.excluded_media_types)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, GZIP_WBITS)
+                response_headers = MutableHeaders(raw=list(start_message.get('headers', [])))
+                start_message['headers'] = response_headers.raw
+                response_headers['Content-Encoding'] = 'gzip'
+                response_headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del response_headers['content-length']
+                else:
+                    body = compressor.compress(body) + compressor.flush()
+                    response_headers['Content-Length'] = str(len(body))
+                    await send(start_message)
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                await send(start_message)
+
+            if more_body:
+                data = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            else:
+                data = compressor.compress(body) + compressor.flush()
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        return gzip_send
+
+
+class ServerTimingMiddleware:
+    """Report time spent in the app as ``Server-Timing: app;dur=<ms>``
+
+    Clients subtract it from their own round-trip time to separate server
+    latency from network and queueing.
+    """
+
+    def __init__(self, app):
+        """Wrap an ASGI app"""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def timed_send(message):
+            if message['type'] == 'http.response.start':
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(raw=list(message.get('headers', [])))
+                headers.append('Server-Timing', f"app;dur={elapsed_ms:.1f}")
+                message['headers'] = headers.raw
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
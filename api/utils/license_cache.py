@@ -0,0 +1,154 @@
+"""
+In-process LRU/TTL cache for joined license records
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Row fields the license info endpoint exposes; a change to any of them
+# must change the record's ETag
+ETAG_FIELDS = ('license_key', 'customer_name', 'username', 'product_name', 'product_code',
+               'valid_till', 'issued_at', 'is_revoked')
+
+
+def record_etag(record: Dict[str, Any]) -> str:
+    """Opaque validator over the exposed fields of a joined license record"""
+    digest = hashlib.blake2b(digest_size=12)
+    for field in ETAG_FIELDS:
+        digest.update(repr(record.get(field)).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def license_cache_key(license_key: str) -> str:
+    """Key a license the way MySQL compares license_key: case-insensitive, trailing spaces ignored"""
+    return license_key.rstrip(' ').upper()
+
+
+class LicenseCache:
+    """LRU cache with per-entry TTL keyed by license key
+
+    Writers must call ``invalidate`` after changing a license row. A load
+    that raced with an invalidation is discarded: callers take a token with
+    ``begin_load`` before querying the database and pass it to ``put``, which
+    refuses to store the row if any invalidation happened in between.
+
+    Each entry carries the record's ETag, computed once when it is stored,
+    so conditional requests for a cached license never rehash the row.
+    Keys are compared as MySQL compares them (``license_cache_key``), so a
+    key looked up in another case is the same entry that ``invalidate``
+    drops.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0):
+        """Initialize cache"""
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # license_key -> (expires_at, record, etag)
+        self._lock = threading.Lock()
+        self._epoch = 0
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._rejected_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is switched on"""
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, license_key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached record, or None on miss/expiry"""
+        entry = self.get_with_etag(license_key)
+        return entry[0] if entry is not None else None
+
+    def get_with_etag(self, license_key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Get a cached ``(record, etag)`` pair, or None on miss/expiry"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        license_key = license_cache_key(license_key)
+        with self._lock:
+            entry = self._entries.get(license_key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, record, etag = entry
+            if now >= expires_at:
+                del self._entries[license_key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(license_key)
+            self._hits += 1
+            return record, etag
+
+    def begin_load(self) -> int:
+        """Get a token to pass to ``put`` after loading from the database"""
+        with self._lock:
+            return self._epoch
+
+    def put(self, license_key: str, record: Dict[str, Any], token: int = None,
+            etag: str = None) -> bool:
+        """Store a record unless it was invalidated while being loaded"""
+        if not self.enabled:
+            return False
+
+        if etag is None:
+            etag = record_etag(record)
+
+        license_key = license_cache_key(license_key)
+        with self._lock:
+            if token is not None and token != self._epoch:
+                self._rejected_puts += 1
+                return False
+
+            self._entries[license_key] = (time.monotonic() + self.ttl_seconds, record, etag)
+            self._entries.move_to_end(license_key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            return True
+
+    def invalidate(self, license_key: str):
+        """Drop one license after revocation, expiry edits or fingerprint rebinds"""
+        license_key = license_cache_key(license_key)
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            self._entries.pop(license_key, None)
+
+    def clear(self):
+        """Drop every cached record"""
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "rejected_puts": self._rejected_puts,
+            }
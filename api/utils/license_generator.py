@@ -2,25 +2,30 @@
 License key generator and license JSON formatter
 """
 
-import random
+import secrets
 import string
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
+# Characters used for the random part of license keys
+RANDOM_ALPHABET = string.ascii_uppercase + string.digits
+
 class LicenseGenerator:
     """Generate unique license keys and format license JSON"""
     
-    def __init__(self, company_abbreviation="OSPL"):
-        """Initialize with company abbreviation"""
+    def __init__(self, company_abbreviation="OSPL", random_length: int = 8):
+        """Initialize with company abbreviation and random part length"""
         self.company_abbreviation = company_abbreviation
+        # 8 characters from a 36-symbol alphabet is ~41 bits per second-timestamp
+        self.random_length = max(5, random_length)
     
     def generate_license_key(self, product_code: str, username: str = None) -> str:
         """
         Generate a unique license key
         
         Format: COMPANY-PRODUCT-DATE-TIME-RANDOM
-        Example: OSPL-VulnScan-20250626-134123-BYTU5JD
+        Example: OSPL-VulnScan-20250626-134123-BYTU5JDQ
         """
         # Get current date and time
         now = datetime.now()
@@ -34,29 +39,30 @@ class LicenseGenerator:
         else:
             product_abbr = product_code[:8]  # Take first 8 chars if no dash
         
-        # Generate random string (5 characters: 3 letters + 2 digits)
-        letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-        digits = ''.join(random.choices(string.digits, k=2))
-        random_part = letters + digits
+        # Cryptographically random suffix; uniqueness is enforced by the
+        # UNIQUE constraint on licenses.license_key, not by reading old keys
+        random_part = ''.join(secrets.choice(RANDOM_ALPHABET) for _ in range(self.random_length))
         
         # Create license key
         license_key = f"{self.company_abbreviation}-{product_abbr}-{date_str}-{time_str}-{random_part}"
         
         return license_key
     
-    def generate_unique_license_key(self, product_code: str, username: str = None, existing_keys: list = None) -> str:
-        """Generate a unique license key that doesn't exist in the database"""
+    def generate_unique_license_key(self, product_code: str, username: str = None, existing_keys=None) -> str:
+        """Generate a license key that is not in ``existing_keys``
+        
+        Callers backed by the database should not pass existing keys; insert
+        the key and call ``generate_license_key`` again on a duplicate-key error.
+        """
         max_attempts = 100  # Prevent infinite loop
+        existing = set(existing_keys) if existing_keys else None
         
         for attempt in range(max_attempts):
             license_key = self.generate_license_key(product_code, username)
             
             # Check if key already exists
-            if existing_keys is None or license_key not in existing_keys:
+            if existing is None or license_key not in existing:
                 return license_key
-            
-            # If we're here, key exists, try again
-            continue
         
         # If we get here, we've tried too many times
         raise Exception("Could not generate unique license key after 100 attempts")
@@ -149,8 +155,8 @@ class LicenseGenerator:
             if len(time) != 6 or not time.isdigit():
                 return False
             
-            # Check random part (5 characters)
-            if len(random_part) != 5:
+            # Check random part (at least 5 alphanumeric characters)
+            if len(random_part) < 5 or not random_part.isalnum():
                 return False
             
             return True
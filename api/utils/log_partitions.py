@@ -0,0 +1,277 @@
+"""
+Monthly partition maintenance, archival and retention for license_logs
+"""
+
+import os
+import gzip
+import json
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional
+
+import pymysql
+
+from api.utils.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Catch-all partition that new months are split off from
+FUTURE_PARTITION = 'p_future'
+
+
+def month_start(day: date, months: int = 0) -> date:
+    """First day of the month ``months`` after the one containing ``day``"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding ``month``'s rows, e.g. p202611"""
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def _parse_bound(description: Optional[str]) -> Optional[date]:
+    """Upper bound of a RANGE COLUMNS partition, or None for MAXVALUE"""
+    if not description or description.upper() == 'MAXVALUE':
+        return None
+    return datetime.strptime(description.strip("'")[:10], '%Y-%m-%d').date()
+
+
+def _to_json(value):
+    """Make a column value JSON serialisable for the archive"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+class LogPartitionManager:
+    """Keep a RANGE COLUMNS(access_time) table partitioned by month
+
+    Each run splits ``p_future`` so that partitions exist for the current
+    month and the next ``months_ahead``, then archives every partition that
+    lies entirely before the retention cutoff to a gzipped JSON Lines file
+    in ``archive_dir`` and drops it. Dropping a partition is a metadata
+    operation, so inserts and the per-partition indexes stay the same size
+    however long the server runs. A partition is only dropped after its
+    archive has been written and synced; ``retention_months=0`` keeps
+    everything.
+
+    Each run holds the MySQL named lock ``<table>_partition_maintenance``
+    (``GET_LOCK``), so when several workers or the admin endpoint run
+    maintenance at once, only one of them archives and drops partitions
+    and the others skip the run.
+    """
+
+    def __init__(self,
+                 pool: ConnectionPool,
+                 table: str = 'license_logs',
+                 months_ahead: int = 3,
+                 retention_months: int = 12,
+                 archive_dir: str = 'log_archive',
+                 interval: float = 6 * 3600):
+        """Initialize manager; maintenance runs with ``start`` or ``run_once``"""
+        self.pool = pool
+        self.table = table
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+        self.interval = interval
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+
+        # Statistics
+        self._runs = 0
+        self._failures = 0
+        self._created = 0
+        self._archived = 0
+        self._archived_rows = 0
+        self._skipped = 0
+        self._last_run = None
+        self._last_error = None
+
+    def start(self):
+        """Run maintenance now and then every ``interval`` seconds in a thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.table}-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the maintenance thread (an archive in progress finishes first)"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"{self.table} partition maintenance failed: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def run_once(self, today: date = None) -> Dict[str, Any]:
+        """Create future partitions and archive expired ones, unless another process is doing so"""
+        today = today or date.today()
+        lock_name = f"{self.table}_partition_maintenance"
+        with self._run_lock, self.pool.connection() as lock_connection:
+            # The named lock belongs to this connection's session and is released with it
+            with lock_connection.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (lock_name,))
+                acquired = cursor.fetchone()['acquired'] == 1
+            if not acquired:
+                self._skipped += 1
+                logger.info(f"{self.table} partition maintenance is running elsewhere; skipped")
+                return {"created": [], "archived": [], "skipped": True}
+
+            self._runs += 1
+            self._last_run = datetime.now().isoformat()
+            try:
+                created = self.ensure_future_partitions(today)
+                archived = self.expire_partitions(today)
+                self._last_error = None
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                raise
+            finally:
+                with lock_connection.cursor() as cursor:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+        return {"created": created, "archived": archived, "skipped": False}
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Partitions in order, with their upper bound (None for MAXVALUE) and row estimate"""
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS description,
+                              TABLE_ROWS AS row_estimate
+                       FROM information_schema.PARTITIONS
+                       WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                       ORDER BY PARTITION_ORDINAL_POSITION""",
+                    (self.table,)
+                )
+                rows = cursor.fetchall()
+        return [
+            {"name": row['name'], "less_than": _parse_bound(row['description']), "row_estimate": row['row_estimate']}
+            for row in rows if row['name']
+        ]
+
+    def ensure_future_partitions(self, today: date) -> List[str]:
+        """Split month partitions off ``p_future`` up to ``months_ahead`` months out"""
+        partitions = self.partitions()
+        if not partitions:
+            logger.warning(f"{self.table} is not partitioned; skipping partition maintenance")
+            return []
+        if partitions[-1]['name'] != FUTURE_PARTITION:
+            logger.warning(f"{self.table} has no {FUTURE_PARTITION} partition; cannot add months")
+            return []
+
+        bounds = [p['less_than'] for p in partitions if p['less_than'] is not None]
+        # Months already covered end at the highest bound; never go back before it
+        next_month = max(bounds[-1] if bounds else month_start(today), month_start(today))
+        last_month = month_start(today, self.months_ahead)
+
+        new_partitions = []
+        month = next_month
+        while month <= last_month:
+            new_partitions.append((partition_name(month), month_start(month, 1)))
+            month = month_start(month, 1)
+        if bounds and bounds[-1] < next_month:
+            # A gap since the last run: one partition catches the missed months
+            new_partitions.insert(0, (f"{partition_name(bounds[-1])}_gap", next_month))
+        if not new_partitions:
+            return []
+
+        definitions = ', '.join(
+            f"PARTITION {name} VALUES LESS THAN ('{bound.isoformat()}')" for name, bound in new_partitions
+        )
+        self._execute(
+            f"ALTER TABLE {self.table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+            f"({definitions}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE))"
+        )
+        names = [name for name, _ in new_partitions]
+        self._created += len(names)
+        logger.info(f"Created {self.table} partitions: {', '.join(names)}")
+        return names
+
+    def expire_partitions(self, today: date) -> List[str]:
+        """Archive and drop partitions that end before the retention cutoff"""
+        if self.retention_months <= 0:
+            return []
+        cutoff = month_start(today, -self.retention_months + 1)
+        bounded = [p for p in self.partitions() if p['less_than'] is not None]
+        expired = [p for p in bounded if p['less_than'] <= cutoff]
+        # The table needs at least one partition besides p_future
+        if expired and len(expired) == len(bounded):
+            expired = expired[:-1]
+
+        archived = []
+        for partition in expired:
+            if self._stop_event.is_set():
+                break
+            path, rows = self.archive_partition(partition['name'])
+            self._execute(f"ALTER TABLE {self.table} DROP PARTITION {partition['name']}")
+            self._archived += 1
+            self._archived_rows += rows
+            archived.append(partition['name'])
+            logger.info(f"Archived {rows} {self.table} rows from {partition['name']} to {path} and dropped it")
+        return archived
+
+    def archive_partition(self, name: str) -> tuple:
+        """Stream one partition to ``<archive_dir>/<table>-<name>.jsonl.gz``; returns (path, rows)"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{self.table}-{name}.jsonl.gz")
+        temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        rows = 0
+
+        try:
+            with self.pool.connection() as connection:
+                # Unbuffered cursor: a month of logs never has to fit in memory
+                with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                    cursor.execute(f"SELECT * FROM {self.table} PARTITION ({name}) ORDER BY id")
+                    with open(temp_path, 'wb') as raw:
+                        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                            for row in cursor:
+                                line = json.dumps({k: _to_json(v) for k, v in row.items()}) + '\n'
+                                archive.write(line.encode('utf-8'))
+                                rows += 1
+                        # The gzip trailer is written on close; sync before the partition goes
+                        raw.flush()
+                        os.fsync(raw.fileno())
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        os.replace(temp_path, path)
+        return path, rows
+
+    def _execute(self, sql: str):
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get maintenance counters"""
+        return {
+            "runs": self._runs,
+            "skipped": self._skipped,
+            "failures": self._failures,
+            "partitions_created": self._created,
+            "partitions_archived": self._archived,
+            "rows_archived": self._archived_rows,
+            "last_run": self._last_run,
+            "last_error": self._last_error,
+            "retention_months": self.retention_months,
+        }
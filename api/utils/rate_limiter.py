@@ -0,0 +1,281 @@
+"""
+Daily verification rate limiting with pluggable backends
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Dict, Any, List, Tuple
+
+from api.utils.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Base class for per-license daily verification limits"""
+
+    # Whether ``allow`` performs blocking I/O and must run off the event loop
+    requires_io = True
+
+    def allow(self, license_id: int, daily_limit: int = None) -> bool:
+        """Consume one verification; returns False if the limit is reached"""
+        raise NotImplementedError
+
+    def allow_many(self, requests: List[Tuple[int, int]]) -> List[bool]:
+        """Consume one verification for each (license_id, daily_limit) pair"""
+        return [self.allow(license_id, daily_limit) for license_id, daily_limit in requests]
+
+    def start(self):
+        """Start background work, if any"""
+
+    def stop(self):
+        """Stop background work and persist pending state"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend statistics"""
+        return {}
+
+
+class SqlRateLimiter(RateLimiter):
+    """Single-statement limiter using a conditional UPDATE on licenses
+
+    The counter is reset and incremented in the same statement, and the
+    WHERE clause only matches while the license is under its
+    ``daily_verification_limit``, so the affected row count is the answer.
+    Concurrent verifies cannot race past the limit.
+    """
+
+    CONSUME_SQL = """UPDATE licenses
+        SET verification_count_today = IF(last_verification_reset IS NULL OR last_verification_reset < CURDATE(),
+                                          1, verification_count_today + 1),
+            last_verification_reset = CURDATE()
+        WHERE id = %s
+          AND (last_verification_reset IS NULL
+               OR last_verification_reset < CURDATE()
+               OR verification_count_today < daily_verification_limit)"""
+
+    def __init__(self, pool: ConnectionPool):
+        """Initialize with the shared connection pool"""
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._denied = 0
+
+    def _consume(self, cursor, license_id: int) -> bool:
+        cursor.execute(self.CONSUME_SQL, (license_id,))
+        return cursor.rowcount == 1
+
+    def allow(self, license_id: int, daily_limit: int = None) -> bool:
+        """Consume one verification for ``license_id``"""
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                allowed = self._consume(cursor, license_id)
+            connection.commit()
+        self._record([allowed])
+        return allowed
+
+    def allow_many(self, requests: List[Tuple[int, int]]) -> List[bool]:
+        """Consume verifications for many licenses on one connection"""
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                results = [self._consume(cursor, license_id) for license_id, _ in requests]
+            connection.commit()
+        self._record(results)
+        return results
+
+    def _record(self, results: List[bool]):
+        allowed = sum(1 for result in results if result)
+        with self._lock:
+            self._allowed += allowed
+            self._denied += len(results) - allowed
+
+    def stats(self) -> Dict[str, Any]:
+        """Get allow/deny counters"""
+        with self._lock:
+            return {"backend": "sql", "allowed": self._allowed, "denied": self._denied}
+
+
+class _BucketShard:
+    """One lock-protected slice of the token bucket table"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # license_id -> [day, used, pending]
+        self.entries = {}
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """In-process daily token buckets, reconciled to the licenses table
+
+    Each license gets ``daily_limit`` tokens per calendar day. Buckets are
+    spread over ``shards`` independently locked dicts so concurrent verifies
+    for different licenses do not contend. Every ``sync_interval`` seconds
+    the locally consumed tokens are added to ``verification_count_today`` and
+    the database total (which includes other workers) is read back.
+    Over-admission across workers is bounded by one sync interval.
+    """
+
+    requires_io = False
+
+    ADD_SQL = """UPDATE licenses
+        SET verification_count_today = IF(last_verification_reset IS NULL OR last_verification_reset < %s,
+                                          %s, verification_count_today + %s),
+            last_verification_reset = %s
+        WHERE id = %s"""
+
+    def __init__(self, pool: ConnectionPool, default_limit: int = 10,
+                 shards: int = 16, sync_interval: float = 5.0):
+        """Initialize with the shared connection pool"""
+        self.pool = pool
+        self.default_limit = default_limit
+        self.sync_interval = sync_interval
+        self._shards = [_BucketShard() for _ in range(max(1, shards))]
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._allowed = 0
+        self._denied = 0
+        self._syncs = 0
+        self._sync_errors = 0
+
+    def _shard(self, license_id: int) -> _BucketShard:
+        return self._shards[license_id % len(self._shards)]
+
+    def allow(self, license_id: int, daily_limit: int = None) -> bool:
+        """Take one token from the license's bucket for today"""
+        limit = self.default_limit if daily_limit is None else daily_limit
+        today = date.today()
+        shard = self._shard(license_id)
+
+        with shard.lock:
+            entry = shard.entries.get(license_id)
+            if entry is None or entry[0] != today:
+                # New day (or first sight): refill the bucket
+                entry = [today, 0, 0]
+                shard.entries[license_id] = entry
+
+            allowed = entry[1] < limit
+            if allowed:
+                entry[1] += 1
+                entry[2] += 1
+
+        with self._stats_lock:
+            if allowed:
+                self._allowed += 1
+            else:
+                self._denied += 1
+        return allowed
+
+    def start(self):
+        """Start the reconciliation thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="rate-limit-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the reconciliation thread and flush pending counts"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(self.sync_interval + 5)
+            self._thread = None
+        self.sync()
+
+    def _run(self):
+        while not self._stop_event.wait(self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Push locally consumed tokens and pull the shared daily totals"""
+        pending = []
+        today = date.today()
+        for shard in self._shards:
+            with shard.lock:
+                for license_id, entry in list(shard.entries.items()):
+                    if entry[0] != today:
+                        # Yesterday's bucket; the database resets on the next write
+                        del shard.entries[license_id]
+                    elif entry[2]:
+                        pending.append((license_id, entry[0], entry[2]))
+                        entry[2] = 0
+
+        if not pending:
+            return
+
+        try:
+            totals = self._write(pending)
+        except Exception as e:
+            logger.error(f"Rate limit reconciliation failed: {e}")
+            with self._stats_lock:
+                self._sync_errors += 1
+            # Give the counts back so the next sync retries them
+            for license_id, day, count in pending:
+                shard = self._shard(license_id)
+                with shard.lock:
+                    entry = shard.entries.get(license_id)
+                    if entry is not None and entry[0] == day:
+                        entry[2] += count
+            return
+
+        for license_id, day, _ in pending:
+            total = totals.get(license_id)
+            if total is None:
+                continue
+            shard = self._shard(license_id)
+            with shard.lock:
+                entry = shard.entries.get(license_id)
+                if entry is not None and entry[0] == day:
+                    # Include verifications granted by other workers
+                    entry[1] = max(entry[1], total + entry[2])
+
+        with self._stats_lock:
+            self._syncs += 1
+
+    def _write(self, pending: List[Tuple[int, date, int]]) -> Dict[int, int]:
+        """Apply pending counts and return the current database totals"""
+        day = pending[0][1]
+        ids = [license_id for license_id, _, _ in pending]
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    self.ADD_SQL,
+                    [(day, count, count, day, license_id) for license_id, day, count in pending]
+                )
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(
+                    f"SELECT id, verification_count_today FROM licenses "
+                    f"WHERE id IN ({placeholders}) AND last_verification_reset = %s",
+                    tuple(ids) + (day,)
+                )
+                totals = {row['id']: row['verification_count_today'] for row in cursor.fetchall()}
+            connection.commit()
+        return totals
+
+    def stats(self) -> Dict[str, Any]:
+        """Get allow/deny and reconciliation counters"""
+        tracked = 0
+        for shard in self._shards:
+            with shard.lock:
+                tracked += len(shard.entries)
+        with self._stats_lock:
+            return {
+                "backend": "memory",
+                "allowed": self._allowed,
+                "denied": self._denied,
+                "tracked_licenses": tracked,
+                "syncs": self._syncs,
+                "sync_errors": self._sync_errors,
+            }
+
+
+def create_rate_limiter(backend: str, pool: ConnectionPool, default_limit: int = 10,
+                        shards: int = 16, sync_interval: float = 5.0) -> RateLimiter:
+    """Build the rate limiter selected by configuration"""
+    if backend == 'sql':
+        return SqlRateLimiter(pool)
+    if backend == 'memory':
+        return TokenBucketRateLimiter(pool, default_limit=default_limit,
+                                      shards=shards, sync_interval=sync_interval)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
@@ -0,0 +1,285 @@
+"""
+Streaming license-sharing detector over license_logs
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from api.utils.async_db import AsyncDatabase
+from api.utils.hardware_fingerprint import COMPONENT_WEIGHTS, DISCRIMINATING_COMPONENTS, component_hashes
+
+logger = logging.getLogger(__name__)
+
+# Strongest component first: it names the machine even after a NIC or disk swap.
+# CPU ids are shared by many machines, so they never name one.
+MACHINE_COMPONENTS = sorted(DISCRIMINATING_COMPONENTS, key=COMPONENT_WEIGHTS.get, reverse=True)
+
+
+def _short_hash(value: str) -> int:
+    """64-bit digest, so window entries cost a few bytes instead of a full string"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def machine_id(fingerprint: str) -> int:
+    """Compact id of the machine behind a fingerprint
+
+    Keyed on the strongest discriminating component present, so a machine
+    whose weaker components change still counts once; without one, the
+    whole fingerprint names the machine.
+    """
+    hashes = component_hashes(fingerprint)
+    for kind in MACHINE_COMPONENTS:
+        if kind in hashes:
+            return _short_hash(f"{kind}:{hashes[kind]}")
+    return _short_hash(fingerprint)
+
+
+class _Window:
+    """Last-seen times of distinct machines and source IPs of one license"""
+
+    __slots__ = ('machines', 'verified', 'ips', 'mismatches', 'last_seen', 'flagged', 'revocable')
+
+    def __init__(self):
+        self.machines = {}    # machine id -> last seen (epoch seconds), any attempt
+        self.verified = {}    # machine id -> last seen, VALID attempts only
+        self.ips = {}         # short ip hash -> last seen
+        self.mismatches = []  # SHARING_DETECTED times, oldest first
+        self.last_seen = 0.0
+        self.flagged = False
+        self.revocable = False
+
+    def prune(self, cutoff: float):
+        """Drop everything last seen before ``cutoff``"""
+        for seen in (self.machines, self.verified, self.ips):
+            stale = [key for key, at in seen.items() if at < cutoff]
+            for key in stale:
+                del seen[key]
+        drop = 0
+        while drop < len(self.mismatches) and self.mismatches[drop] < cutoff:
+            drop += 1
+        if drop:
+            del self.mismatches[:drop]
+
+
+class SharingDetector:
+    """Flag licenses used from too many machines or networks within a window
+
+    One task tails ``license_logs`` by id (a high-water mark, never a
+    rescan) and keeps a sliding window per license of the distinct
+    machines and source IPs it was used from. A license is flagged once
+    it exceeds ``max_machines`` or ``max_ips`` within ``window_seconds``
+    and ``on_flag`` is called with the flag.
+
+    Anyone who knows a key can post made-up fingerprints, so rejected
+    attempts only ever flag. A flag is ``revocable`` only once more than
+    ``max_machines`` distinct machines actually verified (status VALID)
+    within the window; a flagged license that later crosses that limit is
+    flagged again as revocable. IP counts never revoke, since IPs change
+    with NAT and mobile networks. Windows start empty when the server
+    starts: the high-water mark begins at the newest row. Run one detector
+    per deployment.
+    """
+
+    def __init__(self,
+                 db: AsyncDatabase,
+                 window_seconds: float = 86400,
+                 max_machines: int = 2,
+                 max_ips: int = 10,
+                 poll_interval: float = 2.0,
+                 page_size: int = 5000,
+                 max_flagged: int = 10000,
+                 on_flag: Callable[[Dict[str, Any]], Any] = None):
+        """Initialize detector; polling starts with ``start``"""
+        self.db = db
+        self.window_seconds = window_seconds
+        self.max_machines = max_machines
+        self.max_ips = max_ips
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.max_flagged = max_flagged
+        self.on_flag = on_flag
+
+        self._windows = {}  # license_id -> _Window
+        self._flagged = OrderedDict()  # license_id -> flag
+        self._high_water = None
+        self._task = None
+        self._last_sweep = time.time()
+
+        # Statistics
+        self._events = 0
+        self._polls = 0
+        self._poll_errors = 0
+        self._flags = 0
+        self._lag_seconds = 0.0
+
+    def start(self):
+        """Start tailing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop tailing"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                full_page = await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._poll_errors += 1
+                logger.warning(f"Sharing detector poll failed: {e}")
+                full_page = False
+            if not full_page:
+                await asyncio.sleep(self.poll_interval)
+
+    async def poll(self) -> bool:
+        """Process new log rows once; returns whether a full page was read"""
+        self._polls += 1
+        if self._high_water is None:
+            row = await self.db.fetchone("SELECT COALESCE(MAX(id), 0) AS high_water FROM license_logs")
+            self._high_water = row['high_water']
+            return False
+
+        rows = await self.db.fetchall(
+            """SELECT id, license_id, status, access_time, source_ip, hardware_fingerprint
+               FROM license_logs WHERE id > %s ORDER BY id LIMIT %s""",
+            (self._high_water, self.page_size)
+        )
+        if rows:
+            self._high_water = rows[-1]['id']
+            for flag in self.process(rows):
+                if self.on_flag is not None:
+                    try:
+                        result = self.on_flag(flag)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        logger.error(f"Sharing flag handler failed for license {flag['license_id']}: {e}")
+        self._sweep()
+        return len(rows) == self.page_size
+
+    def process(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold log rows into the windows and return the licenses newly flagged"""
+        flags = []
+        for row in rows:
+            license_id = row['license_id']
+            if not license_id:
+                continue
+            access_time = row['access_time']
+            at = access_time.timestamp() if isinstance(access_time, datetime) else time.time()
+            self._events += 1
+
+            window = self._windows.get(license_id)
+            if window is None:
+                window = self._windows[license_id] = _Window()
+            window.last_seen = max(window.last_seen, at)
+            if row.get('hardware_fingerprint'):
+                machine = machine_id(row['hardware_fingerprint'])
+                window.machines[machine] = max(window.machines.get(machine, 0.0), at)
+                if row['status'] == 'VALID':
+                    window.verified[machine] = max(window.verified.get(machine, 0.0), at)
+            if row.get('source_ip'):
+                ip = _short_hash(row['source_ip'])
+                window.ips[ip] = max(window.ips.get(ip, 0.0), at)
+            if row['status'] == 'SHARING_DETECTED':
+                window.mismatches.append(at)
+
+            if len(window.machines) <= self.max_machines and len(window.ips) <= self.max_ips:
+                continue
+            # Only prune when a limit looks crossed: most rows never pay for it,
+            # and no window grows much past its limits
+            window.prune(at - self.window_seconds)
+            too_many_machines = len(window.machines) > self.max_machines
+            revocable = len(window.verified) > self.max_machines
+            if (not window.flagged and (too_many_machines or len(window.ips) > self.max_ips)) \
+                    or (revocable and not window.revocable):
+                window.flagged = True
+                window.revocable = revocable
+                flags.append(self._flag(license_id, window, too_many_machines, revocable, at))
+
+        if rows:
+            last = rows[-1]['access_time']
+            if isinstance(last, datetime):
+                self._lag_seconds = max(0.0, time.time() - last.timestamp())
+        return flags
+
+    def _flag(self, license_id: int, window: _Window, too_many_machines: bool, revocable: bool,
+              at: float) -> Dict[str, Any]:
+        """Record a flag for a license that crossed a limit"""
+        flag = {
+            "license_id": license_id,
+            "reason": "machines" if too_many_machines else "ips",
+            "revocable": revocable,
+            "distinct_machines": len(window.machines),
+            "verified_machines": len(window.verified),
+            "distinct_ips": len(window.ips),
+            "mismatches": len(window.mismatches),
+            "window_seconds": self.window_seconds,
+            "flagged_at": datetime.fromtimestamp(at).isoformat(),
+        }
+        self._flagged[license_id] = flag
+        self._flagged.move_to_end(license_id)
+        while len(self._flagged) > self.max_flagged:
+            self._flagged.popitem(last=False)
+        self._flags += 1
+        logger.warning(f"License {license_id} flagged for sharing: {len(window.machines)} machines, "
+                       f"{len(window.ips)} IPs in {self.window_seconds:.0f}s")
+        return flag
+
+    def _sweep(self):
+        """Forget licenses idle for a whole window, at most once per window/10"""
+        now = time.time()
+        if now - self._last_sweep < self.window_seconds / 10:
+            return
+        self._last_sweep = now
+        cutoff = now - self.window_seconds
+        idle = [license_id for license_id, window in self._windows.items() if window.last_seen < cutoff]
+        for license_id in idle:
+            del self._windows[license_id]
+
+    def reset(self, license_id: int):
+        """Forget a license's window and flag, e.g. after an administrator rebinds it"""
+        self._windows.pop(license_id, None)
+        self._flagged.pop(license_id, None)
+
+    def flagged(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent flags, newest first"""
+        return list(reversed(self._flagged.values()))[:limit]
+
+    def window(self, license_id: int) -> Optional[Dict[str, Any]]:
+        """Current window counts of one license"""
+        window = self._windows.get(license_id)
+        if window is None:
+            return None
+        window.prune(time.time() - self.window_seconds)
+        return {
+            "distinct_machines": len(window.machines),
+            "verified_machines": len(window.verified),
+            "distinct_ips": len(window.ips),
+            "mismatches": len(window.mismatches),
+            "flagged": window.flagged,
+            "revocable": window.revocable,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get tailing position and counters"""
+        return {
+            "high_water": self._high_water,
+            "tracked_licenses": len(self._windows),
+            "events": self._events,
+            "flags": self._flags,
+            "flagged": len(self._flagged),
+            "polls": self._polls,
+            "poll_errors": self._poll_errors,
+            "lag_seconds": round(self._lag_seconds, 1),
+            "running": self._task is not None and not self._task.done(),
+        }
@@ -0,0 +1,138 @@
+"""
+Process pool for license signing
+"""
+
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, Any, List
+
+from api.utils.crypto_utils import LicenseCrypto, canonical_payload
+from api.utils.workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Per-process signer, set up by the pool initializer
+_worker_crypto = None
+
+
+def _init_worker(private_key_path: str):
+    """Load the private key once when a worker process starts"""
+    global _worker_crypto
+    _worker_crypto = LicenseCrypto(private_key_path=private_key_path)
+    _worker_crypto.load_private_key()
+
+
+def _sign_payloads(payloads: List[bytes]) -> List[str]:
+    """Sign canonical payloads inside a worker process"""
+    return [_worker_crypto.sign_payload(payload) for payload in payloads]
+
+
+class SigningPool:
+    """Sign licenses on worker processes that each hold the private key
+
+    RSA signing holds the GIL for part of its run, so thread pools stop
+    scaling at a few cores. Each worker process parses the PEM once in its
+    initializer; jobs carry only the canonical payload bytes and return the
+    base64 signature. With ``workers=0`` signing stays in-process on
+    ``fallback`` (a thread pool), which suits small deployments.
+    """
+
+    def __init__(self, private_key_path: str, workers: int = 0,
+                 fallback: WorkerPool = None, chunk_size: int = 64):
+        """Initialize signer for the key at ``private_key_path``"""
+        self.private_key_path = private_key_path
+        self.workers = workers
+        self.fallback = fallback
+        self.chunk_size = chunk_size
+        self._crypto = LicenseCrypto(private_key_path=private_key_path)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._signed = 0
+
+    @property
+    def algorithm(self) -> str:
+        """Signature algorithm of the configured private key"""
+        return self._crypto.signature_algorithm
+
+    def start(self):
+        """Start the worker processes"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        # spawn: the API process runs DB and writer threads, which fork would copy mid-state
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.private_key_path,)
+        )
+        logger.info(f"Started {self.workers} signing processes")
+
+    def stop(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _count(self, amount: int):
+        with self._lock:
+            self._signed += amount
+
+    def _sign_local(self, payloads: List[bytes]) -> List[str]:
+        signatures = [self._crypto.sign_payload(payload) for payload in payloads]
+        self._count(len(signatures))
+        return signatures
+
+    def submit(self, license_data: Dict[str, Any]) -> Future:
+        """Sign one license; returns a concurrent.futures.Future of the signature"""
+        payload = canonical_payload(license_data)
+        on_workers = self._executor is not None
+        if on_workers:
+            future = self._executor.submit(_sign_payloads, [payload])
+        elif self.fallback is not None:
+            future = self.fallback.submit(self._sign_local, [payload])
+        else:
+            future = Future()
+            future.set_result(self._sign_local([payload]))
+
+        result = Future()
+
+        def unwrap(done):
+            error = done.exception()
+            if error is not None:
+                result.set_exception(error)
+                return
+            if on_workers:
+                self._count(1)
+            result.set_result(done.result()[0])
+
+        future.add_done_callback(unwrap)
+        return result
+
+    async def sign(self, license_data: Dict[str, Any]) -> str:
+        """Sign one license without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(license_data))
+
+    def sign_many(self, licenses: List[Dict[str, Any]]) -> List[str]:
+        """Sign many licenses, spreading chunks over the worker processes"""
+        payloads = [canonical_payload(license_data) for license_data in licenses]
+        if self._executor is None:
+            return self._sign_local(payloads)
+
+        chunks = [payloads[i:i + self.chunk_size] for i in range(0, len(payloads), self.chunk_size)]
+        signatures = []
+        for chunk_signatures in self._executor.map(_sign_payloads, chunks):
+            signatures.extend(chunk_signatures)
+        self._count(len(signatures))
+        return signatures
+
+    def stats(self) -> Dict[str, Any]:
+        """Get signer mode and counters"""
+        with self._lock:
+            return {
+                "mode": "process" if self._executor is not None else "thread",
+                "workers": self.workers if self._executor is not None else 0,
+                "signed_total": self._signed,
+            }
@@ -0,0 +1,340 @@
+"""
+Incremental daily rollups of license_logs and license_verifications
+"""
+
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from api.utils.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the response time histogram; one more bucket holds slower responses
+RESPONSE_BUCKETS_MS = (1, 2, 3, 5, 7, 10, 15, 20, 30, 50, 70, 100, 150, 200, 300, 500,
+                       700, 1000, 1500, 2000, 3000, 5000, 7000, 10000)
+
+# Raw tables rolled up: rollup source name -> how to read one row
+SOURCES = {
+    'log': {
+        'table': 'license_logs',
+        'columns': 'id, license_id, access_time AS at, status, verification_type, NULL AS response_time_ms',
+    },
+    'verification': {
+        'table': 'license_verifications',
+        'columns': 'id, license_id, verification_time AS at, status, verification_type, response_time_ms',
+    },
+}
+
+STAT_COLUMNS = "count, response_count, response_histogram, p50_ms, p95_ms"
+
+
+def empty_histogram() -> List[int]:
+    """Zeroed response time histogram"""
+    return [0] * (len(RESPONSE_BUCKETS_MS) + 1)
+
+
+def add_response_time(histogram: List[int], response_time_ms: float):
+    """Count one response time into its bucket"""
+    histogram[bisect_left(RESPONSE_BUCKETS_MS, response_time_ms)] += 1
+
+
+def merge_histograms(target: List[int], other: Sequence[int]):
+    """Add ``other``'s buckets into ``target``"""
+    for index, count in enumerate(other[:len(target)]):
+        target[index] += count
+
+
+def histogram_percentile(histogram: Sequence[int], q: float) -> Optional[int]:
+    """Upper bucket bound reaching quantile ``q``; the overflow bucket reports the largest bound"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return RESPONSE_BUCKETS_MS[min(index, len(RESPONSE_BUCKETS_MS) - 1)]
+    return RESPONSE_BUCKETS_MS[-1]
+
+
+class _Stat:
+    """Count and response histogram of one rollup key"""
+
+    __slots__ = ('count', 'histogram')
+
+    def __init__(self, count: int = 0, histogram: List[int] = None):
+        self.count = count
+        self.histogram = histogram or empty_histogram()
+
+    def merge(self, other: '_Stat'):
+        self.count += other.count
+        merge_histograms(self.histogram, other.histogram)
+
+    def row(self) -> tuple:
+        """Values for STAT_COLUMNS"""
+        return (self.count, sum(self.histogram), json.dumps(self.histogram),
+                histogram_percentile(self.histogram, 0.5), histogram_percentile(self.histogram, 0.95))
+
+
+class DailyRollup:
+    """Fold new raw rows into per-day license and product statistics
+
+    Each source table is read past a high-water mark on its id, which is
+    saved in ``rollup_state`` in the same transaction as the rollup rows,
+    so every raw row is counted exactly once across restarts. Concurrent
+    inserts can commit ids out of order, and the row timestamps are set by
+    the application (spill replays carry old ones), so neither says what
+    has committed: a pass stops at the first gap in the ids, and only
+    steps over a gap once it has stayed open for ``settle_seconds`` (a
+    rolled-back insert never fills it).
+
+    Percentiles cannot be merged, so each rollup row keeps a response time
+    histogram (``RESPONSE_BUCKETS_MS``) and the precomputed p50/p95 are the
+    bucket bounds they fall in. Only one process should run the rollup.
+    """
+
+    def __init__(self,
+                 pool: ConnectionPool,
+                 interval: float = 60.0,
+                 page_size: int = 10000,
+                 settle_seconds: float = 30.0):
+        """Initialize rollup; passes run with ``start`` or ``run_once``"""
+        self.pool = pool
+        self.interval = interval
+        self.page_size = page_size
+        self.settle_seconds = settle_seconds
+
+        self._products = {}  # license_id -> product_id; a license never changes product
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+
+        # Statistics
+        self._runs = 0
+        self._failures = 0
+        self._rows = {name: 0 for name in SOURCES}
+        self._high_water = {name: None for name in SOURCES}
+        self._gaps = {}  # source name -> (first missing id, when it was first seen)
+        self._skipped_gaps = 0
+        self._last_error = None
+
+    def start(self):
+        """Roll up in a background thread every ``interval`` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the rollup thread after the page in progress"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Statistics rollup failed: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def run_once(self) -> Dict[str, int]:
+        """Roll up every source until it is caught up; returns rows folded per source"""
+        with self._run_lock:
+            self._runs += 1
+            folded = {}
+            try:
+                for name in SOURCES:
+                    folded[name] = 0
+                    while not self._stop_event.is_set():
+                        rows, full_page = self.roll_up_page(name)
+                        folded[name] += rows
+                        if not full_page:
+                            break
+                self._last_error = None
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                raise
+        return folded
+
+    def roll_up_page(self, name: str) -> Tuple[int, bool]:
+        """Fold one page of a source; returns (rows folded, whether more may be waiting)"""
+        source = SOURCES[name]
+
+        with self.pool.connection() as connection:
+            try:
+                connection.begin()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT high_water FROM rollup_state WHERE name = %s FOR UPDATE", (name,))
+                    state = cursor.fetchone()
+                    high_water = state['high_water'] if state else 0
+
+                    cursor.execute(
+                        f"SELECT {source['columns']} FROM {source['table']} "
+                        f"WHERE id > %s ORDER BY id LIMIT %s",
+                        (high_water, self.page_size)
+                    )
+                    rows = cursor.fetchall()
+                    full_page = len(rows) == self.page_size
+                    contiguous = self._contiguous(name, high_water, rows)
+                    if len(contiguous) < len(rows):
+                        rows, full_page = contiguous, False
+
+                    if rows:
+                        self._fold(cursor, name, rows)
+                        high_water = rows[-1]['id']
+                        cursor.execute(
+                            """INSERT INTO rollup_state (name, high_water) VALUES (%s, %s)
+                               ON DUPLICATE KEY UPDATE high_water = VALUES(high_water)""",
+                            (name, high_water)
+                        )
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+        self._high_water[name] = high_water
+        self._rows[name] += len(rows)
+        return len(rows), full_page
+
+    def _contiguous(self, name: str, high_water: int, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows up to the first id gap that has not yet been open for ``settle_seconds``"""
+        expected = high_water + 1
+        for index, row in enumerate(rows):
+            if row['id'] == expected:
+                expected += 1
+                continue
+            now = time.monotonic()
+            gap = self._gaps.get(name)
+            if gap is not None and gap[0] == expected and now - gap[1] >= self.settle_seconds:
+                del self._gaps[name]
+                self._skipped_gaps += 1
+                expected = row['id'] + 1
+                continue
+            if gap is None or gap[0] != expected:
+                self._gaps[name] = (expected, now)
+            return rows[:index]
+
+        gap = self._gaps.get(name)
+        if gap is not None and gap[0] < expected:
+            del self._gaps[name]  # filled
+        return rows
+
+    def _fold(self, cursor, name: str, rows: List[Dict[str, Any]]):
+        """Add rows to the license-level and product-level rollup tables"""
+        products = self._product_ids(cursor, {row['license_id'] for row in rows})
+
+        by_license, by_product = {}, {}
+        for row in rows:
+            if row['at'] is None:
+                continue
+            day = row['at'].date()
+            product_id = products.get(row['license_id'], 0)
+            status = row['status'] or ''
+            verification_type = row['verification_type'] or ''
+            stat = _Stat(1)
+            if row['response_time_ms'] is not None:
+                add_response_time(stat.histogram, row['response_time_ms'])
+
+            for stats, key in ((by_license, (day, name, row['license_id'], status, verification_type)),
+                               (by_product, (day, name, product_id, status, verification_type))):
+                stats.setdefault(key, _Stat()).merge(stat)
+
+        self._upsert(cursor, 'verification_daily_stats', 'license_id', by_license, products)
+        self._upsert(cursor, 'verification_daily_product_stats', 'product_id', by_product)
+
+    def _product_ids(self, cursor, license_ids) -> Dict[int, int]:
+        """Product of each license, read once per license"""
+        missing = [license_id for license_id in license_ids if license_id and license_id not in self._products]
+        if missing:
+            placeholders = ', '.join(['%s'] * len(missing))
+            cursor.execute(f"SELECT id, product_id FROM licenses WHERE id IN ({placeholders})", tuple(missing))
+            for row in cursor.fetchall():
+                self._products[row['id']] = row['product_id']
+        return {license_id: self._products.get(license_id, 0) for license_id in license_ids}
+
+    def _upsert(self, cursor, table: str, id_column: str, stats: Dict[tuple, _Stat],
+                products: Dict[int, int] = None, chunk_size: int = 500):
+        """Merge ``stats`` into existing rollup rows and write them back"""
+        keys = list(stats)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+            cursor.execute(
+                f"""SELECT day, source, {id_column} AS id, status, verification_type, count, response_histogram
+                    FROM {table}
+                    WHERE (day, source, {id_column}, status, verification_type) IN ({placeholders})
+                    FOR UPDATE""",
+                tuple(value for key in chunk for value in key)
+            )
+            for row in cursor.fetchall():
+                key = (row['day'], row['source'], row['id'], row['status'], row['verification_type'])
+                if key in stats:
+                    histogram = empty_histogram()
+                    merge_histograms(histogram, json.loads(row['response_histogram'] or '[]'))
+                    stats[key].merge(_Stat(row['count'], histogram))
+
+            extra_columns = ", product_id" if products is not None else ""
+            extra_placeholders = ", %s" if products is not None else ""
+            values = []
+            for key in chunk:
+                extra = (products.get(key[2], 0),) if products is not None else ()
+                values.append(key + extra + stats[key].row())
+            cursor.executemany(
+                f"""INSERT INTO {table}
+                    (day, source, {id_column}, status, verification_type{extra_columns}, {STAT_COLUMNS})
+                    VALUES (%s, %s, %s, %s, %s{extra_placeholders}, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE count = VALUES(count), response_count = VALUES(response_count),
+                        response_histogram = VALUES(response_histogram),
+                        p50_ms = VALUES(p50_ms), p95_ms = VALUES(p95_ms)""",
+                values
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get rollup progress counters"""
+        return {
+            "runs": self._runs,
+            "failures": self._failures,
+            "rows_folded": dict(self._rows),
+            "high_water": dict(self._high_water),
+            "open_gaps": {name: gap[0] for name, gap in self._gaps.items()},
+            "skipped_gaps": self._skipped_gaps,
+            "last_error": self._last_error,
+        }
+
+
+def query_daily_stats(connection, start: date, end: date, license_id: int = None,
+                      product_id: int = None, source: str = None) -> List[Dict[str, Any]]:
+    """Rollup rows for ``start``..``end`` (inclusive), per license when ``license_id`` is given"""
+    if license_id is not None:
+        table, conditions, params = 'verification_daily_stats', ['license_id = %s'], [license_id]
+    else:
+        table, conditions, params = 'verification_daily_product_stats', [], []
+        if product_id is not None:
+            conditions.append('product_id = %s')
+            params.append(product_id)
+    conditions.append('day BETWEEN %s AND %s')
+    params.extend([start, end])
+    if source:
+        conditions.append('source = %s')
+        params.append(source)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT day, source, product_id, status, verification_type, count, response_count, p50_ms, p95_ms
+                FROM {table} WHERE {' AND '.join(conditions)}
+                ORDER BY day, source, product_id, status, verification_type""",
+            tuple(params)
+        )
+        return [{**row, "day": row['day'].isoformat()} for row in cursor.fetchall()]
@@ -0,0 +1,133 @@
+"""
+Per-phase timing of license verification requests
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Sequence
+
+# Phases of the verify path, in the order they run
+VERIFY_PHASES = ('lookup', 'rate_limit', 'fingerprint', 'logging')
+
+# Upper bounds (ms) of the in-process histograms; cache hits finish well under a millisecond,
+# so the low end is finer than the daily rollup's buckets. One more bucket holds slower requests.
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PhaseTimer:
+    """Wall-clock time of one request, split into named phases
+
+    Phases that do not run (e.g. fingerprint compare after a failed lookup)
+    are simply absent from ``phases``.
+    """
+
+    __slots__ = ('started', 'phases')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # phase name -> milliseconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as ``name`` (repeated blocks add up)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        """Milliseconds since the timer was created"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def rounded(self) -> Dict[str, float]:
+        """Phase timings rounded to microseconds, for storage"""
+        return {name: round(ms, 3) for name, ms in self.phases.items()}
+
+
+class _Histogram:
+    """Bucket counts and sum of one latency series"""
+
+    __slots__ = ('buckets', 'count', 'sum_ms', 'max_ms')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound reaching quantile ``q``; the overflow bucket reports the max seen"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": self.buckets[:],
+        }
+
+
+class LatencyHistograms:
+    """Process-wide latency histograms of each verify phase and of the whole request
+
+    Counts are cumulative since start (or the last ``reset``), as with
+    Prometheus histograms: take differences between two scrapes for a rate.
+    ``buckets`` line up with ``LATENCY_BUCKETS_MS`` plus one overflow bucket.
+    """
+
+    def __init__(self, phases: Sequence[str] = VERIFY_PHASES):
+        """Initialize empty histograms for ``phases``"""
+        self.phases = tuple(phases)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start counting from zero"""
+        with self._lock:
+            self._phases = {name: _Histogram() for name in self.phases}
+            self._total = _Histogram()
+            self._outcomes = {}
+
+    def record(self, timer: PhaseTimer, outcome: str, total_ms: float = None):
+        """Count one finished request"""
+        total_ms = timer.total_ms if total_ms is None else total_ms
+        with self._lock:
+            for name, ms in timer.phases.items():
+                histogram = self._phases.get(name)
+                if histogram is None:
+                    histogram = self._phases[name] = _Histogram()
+                histogram.add(ms)
+            self._total.add(total_ms)
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-phase and total latency summaries"""
+        with self._lock:
+            return {
+                "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+                "phases": {name: histogram.summary() for name, histogram in self._phases.items()},
+                "total": self._total.summary(),
+                "outcomes": dict(self._outcomes),
+            }
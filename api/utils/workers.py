@@ -0,0 +1,69 @@
+"""
+Bounded worker pools for running blocking work off the asyncio event loop
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable
+
+
+class WorkerPool:
+    """Thread pool with bounded concurrency and an awaitable ``run``
+
+    Blocking drivers (pymysql) and C extensions that release the GIL
+    (bcrypt, cryptography) are executed here so a slow query or password
+    check never stalls other requests on the same event loop.
+    """
+
+    def __init__(self, max_workers: int, name: str = "worker"):
+        """Initialize pool"""
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+
+    def _call(self, func: Callable, args, kwargs):
+        """Execute a job inside a worker thread"""
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def submit(self, func: Callable, *args, **kwargs):
+        """Submit a job and get a concurrent.futures.Future"""
+        with self._lock:
+            self._pending += 1
+        return self._executor.submit(self._call, func, args, kwargs)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run a blocking callable in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._call, func, args, kwargs)
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and wait for running jobs"""
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and utilisation"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._pending,
+                "completed_total": self._completed,
+            }
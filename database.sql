@@ -3,8 +3,15 @@ USE zayona;
 
 
 -- Drop existing tables if needed (in reverse order of dependencies)
+DROP TRIGGER IF EXISTS trg_license_changes_update;
+DROP TRIGGER IF EXISTS trg_license_changes_delete;
+DROP TABLE IF EXISTS license_changes;
+DROP TABLE IF EXISTS verification_daily_stats;
+DROP TABLE IF EXISTS verification_daily_product_stats;
+DROP TABLE IF EXISTS rollup_state;
 DROP TABLE IF EXISTS license_logs;
 DROP TABLE IF EXISTS license_verifications;
+DROP TABLE IF EXISTS license_fingerprint_components;
 DROP TABLE IF EXISTS licenses;
 DROP TABLE IF EXISTS products;
 DROP TABLE IF EXISTS users;
@@ -71,18 +78,26 @@ CREATE TABLE licenses (
 -- ========================================
 -- 4. license_logs Table (Enhanced)
 -- ========================================
+-- Partitioned by month on access_time. The API's partition maintenance
+-- splits new months off p_future ahead of time, and archives then drops
+-- months older than LOG_RETENTION_MONTHS. Partitioned tables cannot have
+-- foreign keys, so license_id is not constrained (rejections log 0).
 CREATE TABLE license_logs (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    license_id INT NOT NULL,
+    id BIGINT AUTO_INCREMENT,
+    license_id INT NOT NULL,                    -- 0 when no license matched
     status ENUM('VALID', 'EXPIRED', 'REJECTED', 'REVOKED', 'SHARING_DETECTED', 'RATE_LIMITED') NOT NULL,
-    access_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+    access_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     source_ip VARCHAR(45),
     user_agent TEXT,
     hardware_fingerprint VARCHAR(255),
     verification_type ENUM('ONLINE', 'OFFLINE', 'PERIODIC') DEFAULT 'ONLINE',
     error_message TEXT,
 
-    CONSTRAINT fk_license FOREIGN KEY (license_id) REFERENCES licenses(id) ON DELETE CASCADE
+    PRIMARY KEY (id, access_time)
+)
+PARTITION BY RANGE COLUMNS (access_time) (
+    PARTITION p_initial VALUES LESS THAN ('2026-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
 );
 
 -- ========================================
@@ -92,18 +107,110 @@ CREATE TABLE license_verifications (
     id INT AUTO_INCREMENT PRIMARY KEY,
     license_id INT NOT NULL,
     verification_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-    verification_type ENUM('DAILY', 'WEEKLY', 'MANUAL') DEFAULT 'DAILY',
+    verification_type ENUM('DAILY', 'WEEKLY', 'MANUAL', 'ONLINE', 'BATCH') DEFAULT 'DAILY',
     status ENUM('SUCCESS', 'FAILED', 'EXPIRED', 'REVOKED') NOT NULL,
     hardware_fingerprint VARCHAR(255),
     source_ip VARCHAR(45),
     response_time_ms INT,
+    -- JSON object of server-side phase timings in ms (lookup, rate_limit, fingerprint, logging),
+    -- for BATCH rows those of the whole chunk plus its chunk_size
+    phase_timings TEXT,
     error_details TEXT,
 
     CONSTRAINT fk_license_verification FOREIGN KEY (license_id) REFERENCES licenses(id) ON DELETE CASCADE
 );
 
 -- ========================================
--- 6. security_settings Table (New - for system-wide security config)
+-- 6. license_fingerprint_components Table (hashed hardware components)
+-- ========================================
+-- One row per component of a license's bound fingerprint (MAC, CPU, DISK,
+-- UUID, BIOS), hashed after normalization, so licenses sharing hardware are
+-- found with an index lookup
+CREATE TABLE license_fingerprint_components (
+    license_id INT NOT NULL,
+    component_type VARCHAR(16) NOT NULL,
+    component_hash CHAR(64) NOT NULL,
+
+    PRIMARY KEY (license_id, component_type),
+    CONSTRAINT fk_license_component FOREIGN KEY (license_id) REFERENCES licenses(id) ON DELETE CASCADE
+);
+
+-- ========================================
+-- 7. license_changes Table (revocation/expiry change feed)
+-- ========================================
+-- Filled by the triggers below, seq is the version clients resume from
+CREATE TABLE license_changes (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    license_id INT NOT NULL,
+    license_key VARCHAR(255) NOT NULL,
+    is_revoked BOOLEAN NOT NULL,
+    valid_till DATETIME NOT NULL,
+    rebound BOOLEAN DEFAULT FALSE,              -- Hardware fingerprint changed
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER trg_license_changes_update AFTER UPDATE ON licenses
+FOR EACH ROW
+    INSERT INTO license_changes (license_id, license_key, is_revoked, valid_till, rebound)
+    SELECT NEW.id, NEW.license_key, NEW.is_revoked, NEW.valid_till,
+           NOT (OLD.hardware_fingerprint <=> NEW.hardware_fingerprint)
+    FROM DUAL
+    WHERE NOT (OLD.is_revoked <=> NEW.is_revoked
+               AND OLD.valid_till <=> NEW.valid_till
+               AND OLD.hardware_fingerprint <=> NEW.hardware_fingerprint);
+
+-- A deleted license can no longer be valid anywhere
+CREATE TRIGGER trg_license_changes_delete AFTER DELETE ON licenses
+FOR EACH ROW
+    INSERT INTO license_changes (license_id, license_key, is_revoked, valid_till)
+    VALUES (OLD.id, OLD.license_key, TRUE, OLD.valid_till);
+
+-- ========================================
+-- 8. Daily verification statistics (rolled up from license_logs and
+--    license_verifications by the API's statistics rollup)
+-- ========================================
+-- source is 'log' or 'verification', response_histogram holds bucket counts
+-- so p50/p95 stay correct as new rows are merged in
+CREATE TABLE verification_daily_stats (
+    day DATE NOT NULL,
+    source VARCHAR(16) NOT NULL,
+    license_id INT NOT NULL,                    -- 0 for requests matching no license
+    status VARCHAR(32) NOT NULL,
+    verification_type VARCHAR(16) NOT NULL,
+    product_id INT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    response_count INT NOT NULL DEFAULT 0,      -- Rows that carried a response time
+    response_histogram TEXT,
+    p50_ms INT NULL,
+    p95_ms INT NULL,
+
+    PRIMARY KEY (day, source, license_id, status, verification_type)
+);
+
+CREATE TABLE verification_daily_product_stats (
+    day DATE NOT NULL,
+    source VARCHAR(16) NOT NULL,
+    product_id INT NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    verification_type VARCHAR(16) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    response_count INT NOT NULL DEFAULT 0,
+    response_histogram TEXT,
+    p50_ms INT NULL,
+    p95_ms INT NULL,
+
+    PRIMARY KEY (day, source, product_id, status, verification_type)
+);
+
+-- High-water marks of incremental jobs, committed with the rows they cover
+CREATE TABLE rollup_state (
+    name VARCHAR(64) PRIMARY KEY,
+    high_water BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- ========================================
+-- 9. security_settings Table (New - for system-wide security config)
 -- ========================================
 CREATE TABLE security_settings (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -131,4 +238,7 @@ CREATE INDEX idx_license_valid_till ON licenses(valid_till);
 CREATE INDEX idx_license_hardware ON licenses(hardware_fingerprint);
 CREATE INDEX idx_logs_license_time ON license_logs(license_id, access_time);
 CREATE INDEX idx_logs_status ON license_logs(status);
-CREATE INDEX idx_verifications_license_time ON license_verifications(license_id, verification_time);
\ No newline at end of file
+CREATE INDEX idx_verifications_license_time ON license_verifications(license_id, verification_time);
+CREATE INDEX idx_fingerprint_component ON license_fingerprint_components(component_type, component_hash);
+CREATE INDEX idx_daily_stats_license ON verification_daily_stats(license_id, day);
+CREATE INDEX idx_daily_product_stats_product ON verification_daily_product_stats(product_id, day);
\ No newline at end of file
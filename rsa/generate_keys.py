@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """
-RSA Key Generation Script
-Generates private and public keys for license signing and verification
+Key Generation Script
+Generates private and public keys (RSA or Ed25519) for license signing and verification
 """
 
 import os
 import sys
+import argparse
 from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
 from cryptography.hazmat.backends import default_backend
 
 def generate_rsa_keys(key_size=2048):
@@ -26,6 +27,21 @@ def generate_rsa_keys(key_size=2048):
     
     return private_key, public_key
 
+def generate_ed25519_keys():
+    """Generate Ed25519 key pair"""
+    print("🔐 Generating Ed25519 key pair...")
+    
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    public_key = private_key.public_key()
+    
+    return private_key, public_key
+
+# Output file names per algorithm; the RSA names are the historical defaults
+KEY_FILES = {
+    'rsa': ("private_key.pem", "public_key.pem"),
+    'ed25519': ("ed25519_private_key.pem", "ed25519_public_key.pem"),
+}
+
 def save_private_key(private_key, filename="private_key.pem"):
     """Save private key to PEM file"""
     print(f"💾 Saving private key to {filename}...")
@@ -58,8 +74,17 @@ def save_public_key(public_key, filename="public_key.pem"):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Generate license signing keys")
+    parser.add_argument('--algorithm', choices=sorted(KEY_FILES), default='rsa',
+                        help='Signature scheme (default: rsa)')
+    parser.add_argument('--key-size', type=int, default=2048, help='RSA modulus size in bits')
+    args = parser.parse_args()
+    
+    label = "RSA" if args.algorithm == 'rsa' else "Ed25519"
+    private_file, public_file = KEY_FILES[args.algorithm]
+    
     print("=" * 50)
-    print("🔐 RSA KEY GENERATOR FOR LICENSE SYSTEM")
+    print(f"🔐 {label} KEY GENERATOR FOR LICENSE SYSTEM")
     print("=" * 50)
     
     try:
@@ -70,22 +95,28 @@ def main():
         os.chdir('rsa')
         
         # Generate keys
-        private_key, public_key = generate_rsa_keys()
+        if args.algorithm == 'ed25519':
+            private_key, public_key = generate_ed25519_keys()
+        else:
+            private_key, public_key = generate_rsa_keys(args.key_size)
         
         # Save keys
-        save_private_key(private_key, "private_key.pem")
-        save_public_key(public_key, "public_key.pem")
+        save_private_key(private_key, private_file)
+        save_public_key(public_key, public_file)
         
         print("\n" + "=" * 50)
-        print("🎉 RSA KEYS GENERATED SUCCESSFULLY!")
+        print(f"🎉 {label} KEYS GENERATED SUCCESSFULLY!")
         print("=" * 50)
         print("📁 Files created:")
-        print("   - private_key.pem (KEEP SECURE!)")
-        print("   - public_key.pem (can be shared)")
+        print(f"   - {private_file} (KEEP SECURE!)")
+        print(f"   - {public_file} (can be shared)")
         print("\n⚠️  IMPORTANT:")
-        print("   - Never commit private_key.pem to version control")
-        print("   - Keep private_key.pem secure on the server only")
-        print("   - public_key.pem can be distributed with the agent")
+        print(f"   - Never commit {private_file} to version control")
+        print(f"   - Keep {private_file} secure on the server only")
+        print(f"   - {public_file} can be distributed with the agent")
+        if args.algorithm == 'ed25519':
+            print(f"   - Point PRIVATE_KEY_PATH at {private_file} to issue Ed25519 licenses")
+            print("   - Keep public_key.pem deployed until all RSA licenses are reissued")
         
     except Exception as e:
         print(f"❌ Error generating keys: {e}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Signature Benchmark
+Compares sign/verify throughput and signature size of the license signature schemes
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.utils.crypto_utils import LicenseCrypto, SIGNATURE_RSA_PSS, SIGNATURE_ED25519
+from api.utils.license_generator import LicenseGenerator
+
+
+def make_crypto(algorithm, key_size, key_dir):
+    """Write a fresh key pair to ``key_dir`` and load it like the API does"""
+    if algorithm == SIGNATURE_ED25519:
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+
+    private_path = os.path.join(key_dir, f"{algorithm}_private.pem")
+    public_path = os.path.join(key_dir, f"{algorithm}_public.pem")
+    with open(private_path, 'wb') as f:
+        f.write(private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+    with open(public_path, 'wb') as f:
+        f.write(private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ))
+
+    crypto = LicenseCrypto(private_path, public_path)
+    crypto.load_private_key()
+    crypto.load_public_key()
+    return crypto
+
+
+def ops_per_second(func, duration):
+    """Call ``func`` repeatedly for ``duration`` seconds"""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        func()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark license signature schemes")
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds per measurement')
+    parser.add_argument('--rsa-key-size', type=int, default=2048)
+    args = parser.parse_args()
+
+    generator = LicenseGenerator()
+    license_key = generator.generate_license_key('BENCH', 'bench')
+    base_license = generator.format_license_json(
+        customer_name='Benchmark Customer',
+        username='bench',
+        product_name='Benchmark Product',
+        product_id='BENCH',
+        license_key=license_key,
+        email='bench@example.com'
+    )
+
+    print("=" * 78)
+    print("🔐 SIGNATURE BENCHMARK")
+    print("=" * 78)
+    print(f"{'scheme':<16} {'sign/s':>10} {'verify/s':>10} {'sig bytes':>10} {'b64 chars':>10} {'license B':>10}")
+
+    with tempfile.TemporaryDirectory(prefix='license-bench-') as key_dir:
+        for algorithm in (SIGNATURE_RSA_PSS, SIGNATURE_ED25519):
+            crypto = make_crypto(algorithm, args.rsa_key_size, key_dir)
+            license_data = dict(base_license, signature_algorithm=algorithm)
+
+            signature = crypto.sign_license(license_data)
+            if not crypto.verify_signature(license_data, signature):
+                print(f"❌ {algorithm}: signature did not verify")
+                return 1
+
+            sign_rate = ops_per_second(lambda: crypto.sign_license(license_data), args.duration)
+            verify_rate = ops_per_second(lambda: crypto.verify_signature(license_data, signature), args.duration)
+
+            # Size of license.json as the agent saves it
+            signed = dict(license_data, signature=signature)
+            license_size = len(json.dumps(signed, indent=2, ensure_ascii=False).encode('utf-8'))
+            print(f"{algorithm:<16} {sign_rate:>10.1f} {verify_rate:>10.1f} "
+                  f"{len(base64.b64decode(signature)):>10} {len(signature):>10} {license_size:>10}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures import time of the agent CLI and verifier entry points with
+``python -X importtime`` and fails when a budget is exceeded
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point -> module imported at startup
+ENTRY_POINTS = {
+    'verifier': 'verifier.verify_license',
+    'agent': 'agent.agent_cli',
+}
+
+# Heavy packages that must only load for the command that needs them
+DEFERRED_PACKAGES = {
+    'verifier': ('cryptography', 'multiprocessing', 'requests', 'dotenv', 'subprocess', 'colorama'),
+    'agent': ('cryptography', 'requests', 'dotenv', 'subprocess', 'colorama'),
+}
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space after the bar, then two per nesting level
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module):
+    """Import ``module`` in a fresh interpreter and return the parsed rows"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup import time")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per entry point')
+    parser.add_argument('--verifier-budget-ms', type=float, default=120.0)
+    parser.add_argument('--agent-budget-ms', type=float, default=80.0)
+    parser.add_argument('--top', type=int, default=8, help='Slowest modules to list')
+    args = parser.parse_args()
+
+    budgets = {'verifier': args.verifier_budget_ms, 'agent': args.agent_budget_ms}
+    failed = False
+
+    print("=" * 78)
+    print("⏱️ STARTUP BENCHMARK (python -X importtime)")
+    print("=" * 78)
+
+    for entry, module in ENTRY_POINTS.items():
+        totals = []
+        rows = []
+        for _ in range(args.runs):
+            rows = measure(module)
+            totals.append(sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000)
+
+        median_ms = statistics.median(totals)
+        budget_ms = budgets[entry]
+        within = median_ms <= budget_ms
+        failed = failed or not within
+
+        print(f"\n{'✅' if within else '❌'} {entry}: import {module}")
+        print(f"   median {median_ms:.1f} ms over {args.runs} runs (budget {budget_ms:.0f} ms, "
+              f"min {min(totals):.1f}, max {max(totals):.1f})")
+
+        loaded = {name.split('.')[0] for name, _, _, _ in rows}
+        leaked = [package for package in DEFERRED_PACKAGES[entry] if package in loaded]
+        if leaked:
+            failed = True
+            print(f"   ❌ imported at startup: {', '.join(leaked)}")
+
+        print("   slowest modules (self time):")
+        for name, self_us, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+            print(f"     {self_us / 1000:>7.2f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+Measures throughput and latency of the license API at increasing concurrency
+"""
+
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def percentile(sorted_values, pct):
+    """Get a percentile from an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def build_request(args):
+    """Build the (method, url, body) tuple for the selected endpoint"""
+    base_url = args.url.rstrip('/')
+    if args.endpoint == 'verify':
+        body = {
+            'license_key': args.license_key,
+            'hardware_fingerprint': args.fingerprint
+        }
+        return 'POST', f"{base_url}/api/v1/verify-license", body
+    if args.endpoint == 'info':
+        return 'GET', f"{base_url}/api/v1/licenses/{args.license_key}", None
+    return 'GET', f"{base_url}/health", None
+
+
+def run_level(concurrency, total_requests, request_spec):
+    """Fire ``total_requests`` requests with ``concurrency`` in flight"""
+    method, url, body = request_spec
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def session():
+        # One keep-alive session per worker thread
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.mount('http://', HTTPAdapter(pool_maxsize=1))
+            local.session.mount('https://', HTTPAdapter(pool_maxsize=1))
+        return local.session
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            response = session().request(method, url, json=body, timeout=30)
+            status = response.status_code
+        except requests.RequestException:
+            status = 'error'
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'duration_s': duration,
+        'rps': total_requests / duration if duration else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'statuses': statuses
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Load test the license API at increasing concurrency")
+    parser.add_argument('--url', default='http://localhost:8000', help='API base URL')
+    parser.add_argument('--endpoint', choices=['verify', 'info', 'health'], default='verify')
+    parser.add_argument('--license-key', default='OSPL-VulnScan-20250626-134123-BYTU5JD')
+    parser.add_argument('--fingerprint', default='MAC:00:1B:44:11:3A:B7|CPU:BFEBFBFF000906EA|DISK:WD-WCC4E5XK1234')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level')
+    parser.add_argument('--concurrency', default='1,8,32,128', help='Comma-separated concurrency levels')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    request_spec = build_request(args)
+
+    print("=" * 78)
+    print(f"🔥 LOAD TEST: {request_spec[0]} {request_spec[1]}")
+    print("=" * 78)
+    if args.endpoint == 'verify':
+        print("Note: raise daily_verification_limit for the test license, otherwise most")
+        print("      responses are 429 (they still exercise the lookup and rate-limit path).")
+
+    print(f"{'conc':>6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'scale':>7}  statuses")
+    baseline = None
+    for concurrency in levels:
+        result = run_level(concurrency, args.requests, request_spec)
+        if baseline is None:
+            baseline = result['rps'] or 1.0
+        statuses = ', '.join(f"{code}={count}" for code, count in sorted(result['statuses'].items(), key=str))
+        print(f"{result['concurrency']:>6} {result['rps']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['rps'] / baseline:>6.1f}x  {statuses}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+License verification library
+
+    from verifier import check
+    verdict = check('/etc/octopyder/license.json')
+    if not verdict.valid:
+        ...
+"""
+
+from verifier.checker import LicenseChecker, Verdict, check, license_checker
@@ -0,0 +1,317 @@
+"""
+In-process license checks for products embedding the verifier
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple, Callable, NamedTuple
+
+from verifier.result_cache import VerificationCache, file_identity, expiry_timestamp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LICENSE_PATH = '/etc/octopyder/license.json'
+DEFAULT_PUBLIC_KEY_PATH = '../rsa/public_key.pem'
+
+# Mirrors api.utils.crypto_utils, which is imported only when a signature is checked
+DEFAULT_SIGNATURE_ALGORITHM = 'RSA-PSS-SHA256'
+
+# License fields kept with a cached verdict for the result summary
+CACHED_LICENSE_FIELDS = ('customer_name', 'product_name', 'license_key', 'status', 'expiry_date')
+
+
+class Verdict(NamedTuple):
+    """Outcome of one license check"""
+
+    valid: bool
+    errors: Tuple[str, ...]
+    warnings: Tuple[str, ...]
+    # Individual checks: signature, expiry, status, hardware
+    checks: Dict[str, bool]
+    license_info: Dict[str, Any]
+    signature_algorithm: Optional[str] = None
+    # True when no file was parsed and no signature verified for this check
+    cached: bool = False
+    checked_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Result dictionary in the format ``LicenseVerifier`` has always returned"""
+        return {
+            'valid': self.valid,
+            'errors': list(self.errors),
+            'warnings': list(self.warnings),
+            'checks': dict(self.checks),
+            'license_info': dict(self.license_info),
+            'signature_algorithm': self.signature_algorithm,
+            'cached': self.cached,
+        }
+
+
+class _LicenseState:
+    """What is known about one license file between checks"""
+
+    __slots__ = ('identity', 'fingerprint', 'static_errors', 'warnings', 'checks',
+                 'license_info', 'signature_algorithm', 'expires_at')
+
+    def __init__(self, identity, fingerprint):
+        self.identity = identity
+        self.fingerprint = fingerprint
+        self.static_errors = []
+        self.warnings = []
+        self.checks = {}
+        self.license_info = {}
+        self.signature_algorithm = None
+        self.expires_at = None
+
+
+class LicenseChecker:
+    """Verify licenses in-process, keeping keys, licenses and fingerprint warm
+
+    The first check of a file loads the public keys, parses and verifies
+    the license (or takes a still-valid verdict from the signed result
+    cache). Later checks stat() the file and only redo the work if its
+    (inode, mtime, size) changed; expiry is re-evaluated on every check.
+    Nothing is printed; callers get a ``Verdict``.
+    """
+
+    def __init__(self,
+                 public_key_path: str = None,
+                 ed25519_public_key_path: str = None,
+                 result_cache: VerificationCache = None,
+                 fingerprint_provider: Callable[[], str] = None,
+                 fingerprint_ttl: float = 300.0,
+                 check_hardware: bool = True):
+        """Initialize checker; keys and fingerprint are loaded on first use
+
+        ``check_hardware=False`` checks licenses that belong to other
+        machines (audits): no fingerprint is taken and no verdict is cached.
+        """
+        self.public_key_path = public_key_path or os.getenv('PUBLIC_KEY_PATH', DEFAULT_PUBLIC_KEY_PATH)
+        # Ed25519 key shipped next to the RSA key, used by licenses that declare it
+        self.ed25519_public_key_path = ed25519_public_key_path or os.path.join(
+            os.path.dirname(self.public_key_path), 'ed25519_public_key.pem'
+        )
+        self.result_cache = result_cache or VerificationCache(
+            os.getenv('VERIFY_CACHE_PATH', '~/.cache/octopyder/verify-cache.json'),
+            float(os.getenv('VERIFY_CACHE_TTL', 3600))
+        )
+        self.fingerprint_provider = fingerprint_provider
+        self.fingerprint_ttl = fingerprint_ttl
+        self.check_hardware = check_hardware
+
+        # Parsed on first signature check; a cached verdict needs no cryptography import
+        self.crypto = None
+        self._key_hash = None
+        self._fingerprint = None
+        self._fingerprint_at = None
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _hash_public_keys(self) -> str:
+        digest = hashlib.sha256()
+        for key_path in (self.public_key_path, self.ed25519_public_key_path):
+            try:
+                with open(key_path, 'rb') as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b'-')
+        return digest.hexdigest()
+
+    def load_public_keys(self):
+        """(Re)load the RSA public key and, if present, the Ed25519 public key"""
+        from api.utils.crypto_utils import LicenseCrypto
+
+        crypto = LicenseCrypto()
+        loaded = False
+        for key_path in (self.public_key_path, self.ed25519_public_key_path):
+            if os.path.exists(key_path):
+                crypto.load_public_key(key_path)
+                loaded = True
+        if not loaded:
+            # Old licenses carry no signature_algorithm field and are always RSA
+            crypto.load_public_key(self.public_key_path)
+
+        with self._lock:
+            self.crypto = crypto
+            self._key_hash = self._hash_public_keys()
+            self._states.clear()
+
+    @property
+    def key_hash(self) -> str:
+        """SHA-256 over the public key files in use"""
+        if self._key_hash is None:
+            self._key_hash = self._hash_public_keys()
+        return self._key_hash
+
+    def current_fingerprint(self) -> Optional[str]:
+        """Hardware fingerprint, refreshed at most every ``fingerprint_ttl`` seconds"""
+        if not self.check_hardware:
+            return None
+
+        now = time.monotonic()
+        if self._fingerprint_at is not None and now - self._fingerprint_at < self.fingerprint_ttl:
+            return self._fingerprint
+
+        provider = self.fingerprint_provider
+        if provider is None:
+            from agent.utils.hardware_fingerprint import hardware_fingerprint
+            provider = self.fingerprint_provider = hardware_fingerprint.generate_fingerprint
+
+        try:
+            self._fingerprint = provider()
+        except Exception as e:
+            logger.error(f"Hardware fingerprint error: {e}")
+            self._fingerprint = None
+        self._fingerprint_at = now
+        return self._fingerprint
+
+    def invalidate(self, license_path: str = None):
+        """Forget warm state for one license, or for all of them"""
+        with self._lock:
+            if license_path is None:
+                self._states.clear()
+            else:
+                self._states.pop(os.path.abspath(license_path), None)
+
+    def check(self, license_path: str = None, remember: bool = True) -> Verdict:
+        """Check a license file and return a structured verdict
+
+        ``remember=False`` skips keeping warm state, for one-off checks of
+        many files.
+        """
+        path = os.path.abspath(license_path or DEFAULT_LICENSE_PATH)
+        identity = file_identity(path)
+        fingerprint = self.current_fingerprint()
+
+        state = self._states.get(path)
+        cached = state is not None and state.identity == identity and state.fingerprint == fingerprint
+        if not cached:
+            state, cached = self._load_state(path, identity, fingerprint)
+            if remember:
+                with self._lock:
+                    self._states[path] = state
+
+        return self._verdict(state, cached)
+
+    def _verdict(self, state: _LicenseState, cached: bool) -> Verdict:
+        """Evaluate the time-dependent checks against a known license state"""
+        now = time.time()
+        errors = list(state.static_errors)
+        checks = dict(state.checks)
+
+        if 'expiry' in checks:
+            checks['expiry'] = state.expires_at is not None and now <= state.expires_at
+            if not checks['expiry']:
+                errors.append("License has expired")
+
+        return Verdict(
+            valid=not errors,
+            errors=tuple(errors),
+            warnings=tuple(state.warnings),
+            checks=checks,
+            license_info=dict(state.license_info),
+            signature_algorithm=state.signature_algorithm,
+            cached=cached,
+            checked_at=now,
+        )
+
+    def _load_state(self, path: str, identity, fingerprint: Optional[str]) -> Tuple[_LicenseState, bool]:
+        """Cold path: consult the signed result cache, else verify in full
+
+        Returns the state and whether it came from the result cache.
+        """
+        state = _LicenseState(identity, fingerprint)
+
+        if identity is None:
+            state.static_errors.append(f"Verification failed: License file not found: {path}")
+            return state, False
+
+        try:
+            key_hash = self.key_hash
+        except Exception as e:
+            state.static_errors.append(f"Verification failed: {e}")
+            return state, False
+
+        if fingerprint:
+            stored = self.result_cache.lookup(path, key_hash, fingerprint)
+            if stored:
+                state.warnings = list(stored.get('warnings', []))
+                state.license_info = dict(stored.get('license_info', {}))
+                state.checks = dict(stored.get('checks') or
+                                    {'signature': True, 'expiry': True, 'status': True, 'hardware': True})
+                state.signature_algorithm = stored.get('signature_algorithm')
+                state.expires_at = expiry_timestamp(state.license_info.get('expiry_date'))
+                return state, True
+
+        try:
+            with open(path, 'r') as f:
+                license_data = json.load(f)
+        except json.JSONDecodeError as e:
+            state.static_errors.append(f"Verification failed: Invalid JSON in license file: {e}")
+            return state, False
+        except Exception as e:
+            state.static_errors.append(f"Verification failed: Failed to load license: {e}")
+            return state, False
+
+        state.license_info = license_data
+        state.signature_algorithm = license_data.get('signature_algorithm') or DEFAULT_SIGNATURE_ALGORITHM
+
+        # Signature
+        state.checks['signature'] = self._verify_signature(license_data)
+        if not state.checks['signature']:
+            state.static_errors.append("Digital signature verification failed")
+
+        # Expiry is evaluated per check; remember the cut-off
+        state.expires_at = expiry_timestamp(license_data.get('expiry_date'))
+        state.checks['expiry'] = True
+
+        # Status
+        status = license_data.get('status', 'Unknown')
+        state.checks['status'] = status == 'Active'
+        if not state.checks['status']:
+            state.static_errors.append(f"License status is not active: {status}")
+
+        # Hardware binding is enforced server-side; offline we only need a fingerprint
+        if self.check_hardware:
+            state.checks['hardware'] = fingerprint is not None
+            if not state.checks['hardware']:
+                state.warnings.append("Hardware fingerprint check failed")
+
+        verdict = self._verdict(state, cached=False)
+        if verdict.valid and fingerprint:
+            self.result_cache.store(path, key_hash, fingerprint, {
+                'valid': True,
+                'errors': [],
+                'warnings': list(verdict.warnings),
+                'checks': verdict.checks,
+                'signature_algorithm': state.signature_algorithm,
+                'license_info': {name: license_data.get(name) for name in CACHED_LICENSE_FIELDS}
+            }, license_data.get('expiry_date'))
+
+        return state, False
+
+    def _verify_signature(self, license_data: Dict[str, Any]) -> bool:
+        signature = license_data.get('signature')
+        if not signature:
+            logger.error("No signature found in license")
+            return False
+        try:
+            if self.crypto is None:
+                self.load_public_keys()
+            return self.crypto.verify_signature(license_data, signature)
+        except Exception as e:
+            logger.error(f"Signature verification error: {e}")
+            return False
+
+
+# Global instance
+license_checker = LicenseChecker()
+
+
+def check(license_path: str = None) -> Verdict:
+    """Check a license with the process-wide checker"""
+    return license_checker.check(license_path)
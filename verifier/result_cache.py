@@ -0,0 +1,153 @@
+"""
+Signed cache of offline verification verdicts
+"""
+
+import os
+import hmac
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+HMAC_CONTEXT = b'octopyder-verification-cache-v1'
+
+
+def file_identity(path: str) -> Optional[list]:
+    """(inode, mtime_ns, size) of a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def expiry_timestamp(expiry_date: str) -> Optional[float]:
+    """Epoch time at which a license ``expiry_date`` stops verifying"""
+    try:
+        return datetime.strptime(expiry_date, "%Y-%m-%d").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class VerificationCache:
+    """Last successful verdict per license file, protected by an HMAC
+
+    The entry is keyed on the license file's (inode, mtime, size) and a
+    hash of the public keys, and expires after ``ttl_seconds`` or at the
+    license ``expiry_date``, whichever comes first. The HMAC key is derived
+    from the hardware fingerprint, so an entry copied from another machine
+    or edited by hand is rejected and the license is verified in full.
+    This makes tampering detectable, not impossible: the key is derivable
+    on the same machine.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        """Initialize cache backed by ``path``"""
+        self.path = os.path.expanduser(path) if path else None
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is switched on"""
+        return bool(self.path) and self.ttl_seconds > 0
+
+    @staticmethod
+    def _mac(fingerprint: str, body: Dict[str, Any]) -> str:
+        key = hmac.new(HMAC_CONTEXT, fingerprint.encode('utf-8'), hashlib.sha256).digest()
+        message = json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+    def _entries(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return {}
+        entries = data.get('entries')
+        return entries if isinstance(entries, dict) else {}
+
+    def lookup(self, license_path: str, key_hash: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Get the cached verdict if nothing relevant changed since it was stored"""
+        if not self.enabled:
+            return None
+
+        identity = file_identity(license_path)
+        if identity is None:
+            return None
+
+        entry = self._entries().get(os.path.abspath(license_path))
+        if not isinstance(entry, dict):
+            return None
+
+        body = entry.get('body')
+        if not isinstance(body, dict) or not hmac.compare_digest(
+                str(entry.get('mac', '')), self._mac(fingerprint, body)):
+            logger.warning("Verification cache entry failed its integrity check")
+            return None
+
+        if body.get('file') != identity or body.get('key_hash') != key_hash:
+            return None
+        if time.time() >= body.get('expires_at', 0):
+            return None
+
+        return body.get('verdict')
+
+    def store(self, license_path: str, key_hash: str, fingerprint: str,
+              verdict: Dict[str, Any], expiry_date: str = None):
+        """Remember a verdict until the TTL or the license expiry, whichever is first"""
+        if not self.enabled:
+            return
+
+        identity = file_identity(license_path)
+        if identity is None:
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        license_expiry = expiry_timestamp(expiry_date)
+        if license_expiry is not None:
+            expires_at = min(expires_at, license_expiry)
+
+        body = {
+            'file': identity,
+            'key_hash': key_hash,
+            'expires_at': expires_at,
+            'verdict': verdict,
+        }
+
+        entries = self._entries()
+        now = time.time()
+        # Drop dead entries so the file does not grow with every license ever checked
+        entries = {
+            path: entry for path, entry in entries.items()
+            if isinstance(entry, dict) and entry.get('body', {}).get('expires_at', 0) > now
+        }
+        entries[os.path.abspath(license_path)] = {'body': body, 'mac': self._mac(fingerprint, body)}
+
+        import tempfile
+
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.verify-cache-')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Could not write verification cache {self.path}: {e}")
+
+    def clear(self):
+        """Delete the cache file"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,177 @@
+"""
+Bulk verification of a directory tree of license files
+"""
+
+import os
+import time
+import fnmatch
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Iterable
+
+from verifier.checker import LicenseChecker
+
+logger = logging.getLogger(__name__)
+
+# Per-process checker, set up by the pool initializer
+_scan_checker = None
+
+
+def iter_license_files(root: str, pattern: str = '*.json') -> Iterator[str]:
+    """Yield matching files under ``root`` without listing the whole tree first"""
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        elif entry.is_file() and fnmatch.fnmatch(entry.name, pattern):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Cannot read directory {directory}: {e}")
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_scan_worker(public_key_path: str, ed25519_public_key_path: str):
+    """Load the public keys once per worker process"""
+    global _scan_checker
+    _scan_checker = LicenseChecker(
+        public_key_path=public_key_path,
+        ed25519_public_key_path=ed25519_public_key_path,
+        check_hardware=False
+    )
+    _scan_checker.load_public_keys()
+
+
+def _scan_chunk(paths: List[str]) -> List[Dict[str, Any]]:
+    """Verify a chunk of files inside a worker process"""
+    return [scan_record(path, _scan_checker.check(path, remember=False)) for path in paths]
+
+
+def scan_record(path: str, verdict) -> Dict[str, Any]:
+    """Flatten a verdict into one JSONL result"""
+    info = verdict.license_info
+    return {
+        'path': path,
+        'valid': verdict.valid,
+        'license_key': info.get('license_key'),
+        'customer_name': info.get('customer_name'),
+        'product_name': info.get('product_name'),
+        'status': info.get('status'),
+        'expiry_date': info.get('expiry_date'),
+        'signature_algorithm': verdict.signature_algorithm,
+        'checks': verdict.checks,
+        'errors': list(verdict.errors),
+    }
+
+
+def scan_directory(root: str,
+                   public_key_path: str = None,
+                   ed25519_public_key_path: str = None,
+                   workers: int = None,
+                   chunk_size: int = 64,
+                   pattern: str = '*.json') -> Iterator[Dict[str, Any]]:
+    """Verify every license file under ``root``, yielding results in walk order
+
+    At most ``workers * 4`` chunks are in flight, so memory stays flat
+    however many files there are. ``workers=0`` verifies in-process.
+    """
+    chunks = _chunks(iter_license_files(root, pattern), chunk_size)
+
+    if workers == 0:
+        _init_scan_worker(public_key_path, ed25519_public_key_path)
+        for chunk in chunks:
+            yield from _scan_chunk(chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_scan_worker,
+                             initargs=(public_key_path, ed25519_public_key_path)) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_scan_chunk, chunk))
+            if len(in_flight) >= workers * 4:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+class ScanSummary:
+    """Running counts over scan results"""
+
+    def __init__(self):
+        """Initialize counters"""
+        self.started = time.perf_counter()
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.bad_signature = 0
+        self.expired = 0
+        self.inactive = 0
+        self.unreadable = 0
+        self.algorithms = {}
+
+    def add(self, record: Dict[str, Any]):
+        """Count one result"""
+        self.total += 1
+        if record['valid']:
+            self.valid += 1
+        else:
+            self.invalid += 1
+
+        checks = record['checks']
+        if not checks:
+            self.unreadable += 1
+            return
+        if not checks.get('signature'):
+            self.bad_signature += 1
+        if not checks.get('expiry'):
+            self.expired += 1
+        if not checks.get('status'):
+            self.inactive += 1
+
+        algorithm = record.get('signature_algorithm')
+        self.algorithms[algorithm] = self.algorithms.get(algorithm, 0) + 1
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the scan started"""
+        return time.perf_counter() - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        """Throughput so far"""
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary counts"""
+        return {
+            'total': self.total,
+            'valid': self.valid,
+            'invalid': self.invalid,
+            'bad_signature': self.bad_signature,
+            'expired': self.expired,
+            'inactive': self.inactive,
+            'unreadable': self.unreadable,
+            'signature_algorithms': self.algorithms,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'files_per_second': round(self.files_per_second, 1),
+        }
@@ -7,18 +7,15 @@ Standalone license verification tool
 import os
 import sys
 import json
+import time
 import logging
-from datetime import datetime
-from colorama import init, Fore, Back, Style
-
-# Initialize colorama
-init()
+import argparse
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from api.utils.crypto_utils import license_crypto
-from agent.utils.hardware_fingerprint import hardware_fingerprint
+from verifier.checker import LicenseChecker
+from verifier.result_cache import VerificationCache
 
 # Configure logging
 logging.basicConfig(
@@ -27,152 +24,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# colorama is imported by use_colors() on the paths that print in colour
+Fore = Back = Style = None
+
+def use_colors():
+    """Import and initialise colorama for coloured terminal output"""
+    global Fore, Back, Style
+    if Fore is None:
+        import colorama
+        colorama.init()
+        Fore, Back, Style = colorama.Fore, colorama.Back, colorama.Style
+
+# Progress lines for each check in the verdict
+CHECK_MESSAGES = (
+    ('signature', "Digital signature verified"),
+    ('expiry', "License is not expired"),
+    ('status', "License status is active"),
+    ('hardware', "Hardware fingerprint check passed"),
+)
+
 class LicenseVerifier:
-    """Standalone license verifier"""
+    """Command-line front end for ``LicenseChecker``"""
     
-    def __init__(self, license_path: str = None, public_key_path: str = None):
+    def __init__(self, license_path: str = None, public_key_path: str = None,
+                 ed25519_public_key_path: str = None, result_cache: VerificationCache = None):
         """Initialize verifier"""
+        use_colors()
         self.license_path = license_path or '/etc/octopyder/license.json'
-        self.public_key_path = public_key_path or '../rsa/public_key.pem'
-        self.crypto = license_crypto
-        self.hw_fingerprint = hardware_fingerprint
-    
-    def load_license(self) -> dict:
-        """Load license from file"""
-        try:
-            if not os.path.exists(self.license_path):
-                raise FileNotFoundError(f"License file not found: {self.license_path}")
-            
-            with open(self.license_path, 'r') as f:
-                license_data = json.load(f)
-            
-            logger.info(f"License loaded from: {self.license_path}")
-            return license_data
-            
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in license file: {e}")
-        except Exception as e:
-            raise Exception(f"Failed to load license: {e}")
-    
-    def verify_signature(self, license_data: dict) -> bool:
-        """Verify license signature"""
-        try:
-            # Load public key
-            self.crypto.load_public_key(self.public_key_path)
-            
-            # Get signature from license
-            signature = license_data.get('signature')
-            if not signature:
-                raise ValueError("No signature found in license")
-            
-            # Verify signature
-            is_valid = self.crypto.verify_signature(license_data, signature)
-            
-            if is_valid:
-                logger.info("License signature verification successful")
-            else:
-                logger.error("License signature verification failed")
-            
-            return is_valid
-            
-        except Exception as e:
-            logger.error(f"Signature verification error: {e}")
-            return False
-    
-    def check_expiry(self, license_data: dict) -> bool:
-        """Check if license is expired"""
-        try:
-            expiry_date_str = license_data.get('expiry_date')
-            if not expiry_date_str:
-                raise ValueError("No expiry date found in license")
-            
-            # Parse expiry date
-            expiry_date = datetime.strptime(expiry_date_str, "%Y-%m-%d")
-            current_date = datetime.now()
-            
-            is_valid = current_date <= expiry_date
-            
-            if is_valid:
-                logger.info(f"License is valid until: {expiry_date_str}")
-            else:
-                logger.error(f"License expired on: {expiry_date_str}")
-            
-            return is_valid
-            
-        except Exception as e:
-            logger.error(f"Expiry check error: {e}")
-            return False
-    
-    def check_hardware_fingerprint(self, license_data: dict) -> bool:
-        """Check hardware fingerprint (basic check)"""
-        try:
-            # For now, just log the fingerprint
-            # In a real implementation, you might want to compare with stored fingerprint
-            current_fingerprint = self.hw_fingerprint.generate_fingerprint()
-            logger.info(f"Current hardware fingerprint: {current_fingerprint}")
-            
-            # Return True for now (hardware fingerprint validation would be done server-side)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Hardware fingerprint check error: {e}")
-            return False
+        self.checker = LicenseChecker(
+            public_key_path=public_key_path or '../rsa/public_key.pem',
+            ed25519_public_key_path=ed25519_public_key_path,
+            result_cache=result_cache
+        )
     
     def verify_license(self) -> dict:
         """Complete license verification"""
-        result = {
-            'valid': False,
-            'errors': [],
-            'warnings': [],
-            'license_info': {}
-        }
+        print(f"{Fore.CYAN}🔍 VERIFYING LICENSE{Style.RESET_ALL}")
+        print(f"{Fore.WHITE}License file: {self.license_path}{Style.RESET_ALL}")
         
-        try:
-            print(f"{Fore.CYAN}🔍 VERIFYING LICENSE{Style.RESET_ALL}")
-            print(f"{Fore.WHITE}License file: {self.license_path}{Style.RESET_ALL}")
-            
-            # Load license
-            print(f"{Fore.YELLOW}🔄 Loading license file...{Style.RESET_ALL}")
-            license_data = self.load_license()
-            result['license_info'] = license_data
-            
-            # Verify signature
-            print(f"{Fore.YELLOW}🔄 Verifying digital signature...{Style.RESET_ALL}")
-            if not self.verify_signature(license_data):
-                result['errors'].append("Digital signature verification failed")
-            else:
-                print(f"{Fore.GREEN}✅ Digital signature verified{Style.RESET_ALL}")
-            
-            # Check expiry
-            print(f"{Fore.YELLOW}🔄 Checking expiry date...{Style.RESET_ALL}")
-            if not self.check_expiry(license_data):
-                result['errors'].append("License has expired")
-            else:
-                print(f"{Fore.GREEN}✅ License is not expired{Style.RESET_ALL}")
-            
-            # Check status
-            status = license_data.get('status', 'Unknown')
-            if status != 'Active':
-                result['errors'].append(f"License status is not active: {status}")
-            else:
-                print(f"{Fore.GREEN}✅ License status is active{Style.RESET_ALL}")
-            
-            # Check hardware fingerprint
-            print(f"{Fore.YELLOW}🔄 Checking hardware fingerprint...{Style.RESET_ALL}")
-            if not self.check_hardware_fingerprint(license_data):
-                result['warnings'].append("Hardware fingerprint check failed")
-            else:
-                print(f"{Fore.GREEN}✅ Hardware fingerprint check passed{Style.RESET_ALL}")
-            
-            # Determine overall validity
-            result['valid'] = len(result['errors']) == 0
-            
-            return result
-            
-        except Exception as e:
-            result['errors'].append(f"Verification failed: {e}")
-            logger.error(f"License verification error: {e}")
-            return result
+        verdict = self.checker.check(self.license_path)
+        
+        if verdict.cached:
+            print(f"{Fore.GREEN}⚡ License unchanged since last verification (cached result){Style.RESET_ALL}")
+        for name, message in CHECK_MESSAGES:
+            if verdict.checks.get(name):
+                print(f"{Fore.GREEN}✅ {message}{Style.RESET_ALL}")
+        
+        return verdict.to_dict()
     
     def print_verification_result(self, result: dict):
         """Print verification results"""
@@ -219,16 +117,73 @@ class LicenseVerifier:
             logger.error(f"Verification failed: {e}")
             return 1
 
+def run_scan(args) -> int:
+    """Verify every license under ``args.scan`` and emit JSONL"""
+    # multiprocessing is only needed here
+    from verifier.scan import scan_directory, ScanSummary
+    
+    # Per-file log lines would drown the results
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    output = open(args.output, 'w') if args.output else sys.stdout
+    summary = ScanSummary()
+    last_progress = time.monotonic()
+    
+    try:
+        for record in scan_directory(args.scan,
+                                     public_key_path=args.public_key,
+                                     workers=args.workers,
+                                     chunk_size=args.chunk_size,
+                                     pattern=args.pattern):
+            summary.add(record)
+            output.write(json.dumps(record) + "\n")
+            
+            now = time.monotonic()
+            if now - last_progress >= 2:
+                last_progress = now
+                print(f"📂 {summary.total} files, {summary.files_per_second:.1f} files/sec", file=sys.stderr)
+        
+        result = summary.as_dict()
+        output.write(json.dumps({'summary': result}) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    use_colors()
+    print(f"{Fore.CYAN}📋 SCAN RESULTS{Style.RESET_ALL}", file=sys.stderr)
+    print(f"{Fore.WHITE}Files: {result['total']}  "
+          f"{Fore.GREEN}Valid: {result['valid']}  "
+          f"{Fore.RED}Invalid: {result['invalid']}{Style.RESET_ALL}", file=sys.stderr)
+    print(f"{Fore.WHITE}Bad signature: {result['bad_signature']}  Expired: {result['expired']}  "
+          f"Inactive: {result['inactive']}  Unreadable: {result['unreadable']}{Style.RESET_ALL}", file=sys.stderr)
+    print(f"{Fore.WHITE}Throughput: {Fore.YELLOW}{result['files_per_second']} files/sec "
+          f"({result['elapsed_seconds']}s){Style.RESET_ALL}", file=sys.stderr)
+    
+    return 0 if result['invalid'] == 0 else 1
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Verify license files")
+    parser.add_argument('--license', dest='license_path', help='License file to verify')
+    parser.add_argument('--public-key', help='RSA public key (an ed25519_public_key.pem next to it is also used)')
+    parser.add_argument('--scan', metavar='DIR', help='Verify every license file under DIR and emit JSONL')
+    parser.add_argument('--pattern', default='*.json', help='File name pattern for --scan')
+    parser.add_argument('--workers', type=int, help='Verification processes for --scan (0 verifies in-process)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Files per worker task for --scan')
+    parser.add_argument('--output', help='Write --scan JSONL here instead of stdout')
+    args = parser.parse_args()
+    
     try:
-        verifier = LicenseVerifier()
+        if args.scan:
+            sys.exit(run_scan(args))
+        verifier = LicenseVerifier(license_path=args.license_path, public_key_path=args.public_key)
         exit_code = verifier.run()
         sys.exit(exit_code)
     except Exception as e:
+        use_colors()
         print(f"{Fore.RED}❌ Failed to start verifier: {e}{Style.RESET_ALL}")
         logger.error(f"Verifier startup error: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file